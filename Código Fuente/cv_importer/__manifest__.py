@@ -23,6 +23,7 @@
         'views/cv_document_views.xml',
         'views/cv_academic_degree_views.xml',
         'views/cv_metrics_views.xml',
+        'views/cv_callback_queue_views.xml',
         'report/cv_reports.xml',
         'views/hr_employee_cv_academic_views.xml',
         'views/cv_work_experience_views.xml',
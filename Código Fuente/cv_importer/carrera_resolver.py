@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""Resolución de etiquetas de carrera (texto libre del CV) a registros `carrera`.
+
+Sin dependencias de Odoo; el índice se construye una vez por base de datos
+desde carrera.name_normalized (ver models/carrera.py).
+"""
+
+# Umbral de similitud Jaccard entre tokens para aceptar un match difuso
+CARRERA_MATCH_THRESHOLD = 0.6
+# Tope de etiquetas memorizadas por índice
+CARRERA_MEMO_SIZE = 20000
+# Longitud de los fragmentos del índice de subcadenas
+CARRERA_GRAM_SIZE = 3
+
+_REEMPLAZOS = (
+    ("á", "a"), ("é", "e"), ("í", "i"),
+    ("ó", "o"), ("ú", "u"),
+    ("Á", "A"), ("É", "E"), ("Í", "I"),
+    ("Ó", "O"), ("Ú", "U"),
+    ("ñ", "n"), ("Ñ", "N"),
+)
+
+_PREFIJOS_CARRERA = (
+    'carrera de ',
+    'carrera en ',
+    'carrera ',
+)
+
+
+def normalize_text(texto):
+    """Minúsculas, sin tildes/ñ, sin signos y con espacios colapsados."""
+    texto = str(texto or '')
+
+    texto = texto.replace('\xa0', ' ').replace('\u200b', '')
+
+    for a, b in _REEMPLAZOS:
+        texto = texto.replace(a, b)
+
+    texto = ''.join(ch for ch in texto if ch.isalnum() or ch.isspace())
+
+    texto = ' '.join(texto.strip().split())
+    return texto.lower()
+
+
+def _char_grams(texto, size=CARRERA_GRAM_SIZE):
+    """Todas las subcadenas de `texto` de longitud 1..size."""
+    return {
+        texto[i:i + n]
+        for n in range(1, size + 1)
+        for i in range(len(texto) - n + 1)
+    }
+
+
+def clean_carrera_label(raw):
+    """
+    Quita prefijos como 'Carrera de', 'Carrera en', 'Carrera '
+    pero mantiene tildes/ñ para que luego normalize_text se encargue.
+    """
+    txt = str(raw or '').strip()
+    txt_lower = txt.lower()
+
+    for p in _PREFIJOS_CARRERA:
+        if txt_lower.startswith(p):
+            # recortar usando la longitud del prefijo original
+            txt = txt[len(p):].strip()
+            break
+
+    return txt
+
+
+class CarreraResolver:
+    """Índice invertido token -> carreras sobre los nombres normalizados.
+
+    Mismo criterio que el antiguo _find_best_carrera: coincidencia exacta, luego la
+    mayor similitud Jaccard (>= umbral) y por último la primera carrera cuyo nombre
+    contiene la etiqueta. La similitud solo se calcula contra las carreras que
+    comparten algún token con la etiqueta (el resto puntúa 0), y cada etiqueta se
+    resuelve una sola vez.
+
+    Si la etiqueta no comparte ningún token con ninguna carrera (p. ej. 'soft' o
+    'telecom'), Jaccard no tiene candidatos y decide la búsqueda por subcadena. Esta
+    usa un segundo índice de fragmentos de 1..3 caracteres: una carrera que contiene
+    la etiqueta contiene todos sus fragmentos, así que solo se comprueban las carreras
+    de la intersección de sus listas, empezando por la más corta. El coste depende de
+    cuántas carreras comparten el fragmento más raro de la etiqueta, no del total.
+    """
+
+    def __init__(self, rows, threshold=CARRERA_MATCH_THRESHOLD):
+        """`rows`: iterable de (id, nombre) en el orden de búsqueda de `carrera`."""
+        self.threshold = threshold
+        # clave normalizada -> (posición, id de la primera carrera, id de la última) con esa clave
+        self._by_key = {}
+        for carrera_id, name in rows:
+            key = normalize_text(name)
+            if not key:
+                continue
+            pos, first_id = self._by_key[key][:2] if key in self._by_key else (len(self._by_key), carrera_id)
+            self._by_key[key] = (pos, first_id, carrera_id)
+        self._keys = sorted(self._by_key, key=lambda k: self._by_key[k][0])
+        self._tokens = {}
+        self._postings = {}
+        self._gram_postings = {}
+        for key in self._keys:
+            tokens = frozenset(key.split())
+            self._tokens[key] = tokens
+            for tok in tokens:
+                self._postings.setdefault(tok, []).append(key)
+            for gram in _char_grams(key):
+                self._gram_postings.setdefault(gram, set()).add(key)
+        self._memo = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def resolve(self, raw_label):
+        """Devuelve (carrera_id, clave_normalizada, score) o (False, clave, 0.0) si no hay match."""
+        hit = self._memo.get(raw_label)
+        if hit is None:
+            hit = self._resolve_key(normalize_text(clean_carrera_label(raw_label)))
+            if len(self._memo) < CARRERA_MEMO_SIZE:
+                self._memo[raw_label] = hit
+        return hit
+
+    def _resolve_key(self, key):
+        if not key:
+            return (False, key, 0.0)
+
+        exact = self._by_key.get(key)
+        if exact:
+            return (exact[2], key, 1.0)
+
+        key_tokens = frozenset(key.split())
+        candidates = {k for tok in key_tokens for k in self._postings.get(tok, ())}
+
+        best = None
+        best_score = 0.0
+        for k in sorted(candidates, key=lambda k: self._by_key[k][0]):
+            tokens = self._tokens[k]
+            score = len(key_tokens & tokens) / float(len(key_tokens | tokens))
+            if score > best_score:
+                best_score = score
+                best = k
+        if best and best_score >= self.threshold:
+            return (self._by_key[best][2], key, best_score)
+
+        # Equivalente al antiguo ilike: primera carrera cuyo nombre contiene la etiqueta
+        contains = [k for k in self._substring_candidates(key) if key in k]
+        if contains:
+            return (min(self._by_key[k][1] for k in contains), key, 0.0)
+        return (False, key, 0.0)
+
+    def _substring_candidates(self, key):
+        """Claves que contienen todos los fragmentos de `key` (superconjunto de las que la contienen)."""
+        if len(key) <= CARRERA_GRAM_SIZE:
+            return self._gram_postings.get(key, ())
+        postings = sorted(
+            (self._gram_postings.get(key[i:i + CARRERA_GRAM_SIZE], ())
+             for i in range(len(key) - CARRERA_GRAM_SIZE + 1)),
+            key=len,
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
+
+
+def legacy_resolve_carrera(rows, raw_label):
+    """Implementación anterior (solo para comparar en los tests): dict clave -> carrera
+    (gana el último id), Jaccard contra todas las claves y, si no, el primer id cuyo
+    nombre contiene la clave (el antiguo ilike)."""
+    carrera_index = {}
+    for carrera_id, name in rows:
+        carrera_index[normalize_text(name)] = carrera_id
+    carrera_key = normalize_text(clean_carrera_label(raw_label))
+    if not carrera_key:
+        return False
+    if carrera_key in carrera_index:
+        return carrera_index[carrera_key]
+
+    key_tokens = set(carrera_key.split())
+    best = None
+    best_score = 0.0
+    for k, carrera_id in carrera_index.items():
+        tokens = set(k.split())
+        score = len(key_tokens & tokens) / float(len(key_tokens | tokens))
+        if score > best_score:
+            best_score = score
+            best = carrera_id
+    if best and best_score >= CARRERA_MATCH_THRESHOLD:
+        return best
+
+    for carrera_id, name in sorted(rows):
+        if carrera_key in normalize_text(name):
+            return carrera_id
+    return False
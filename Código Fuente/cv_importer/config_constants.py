@@ -10,3 +10,26 @@ CV_IMPORT_HEADERS = {
     "User-Agent": "cv-importer/1.0",
     "Accept": "application/json",
 }
+
+# Descarga masiva: documentos en vuelo simultáneamente por lote (batch_token)
+CV_BATCH_WINDOW = 5
+
+# Watchdog de documentos sin callback de N8N
+CV_WATCHDOG_TIMEOUT_MINUTES = 30  # plazo base; se duplica en cada reintento
+CV_WATCHDOG_MAX_RETRIES = 3
+
+# Cola asíncrona de callbacks (cv.callback.queue)
+CV_CALLBACK_QUEUE_MAX_ATTEMPTS = 5
+
+# Rate limit de /cv/callback (cv.rate.limit, compartido entre workers)
+CV_CALLBACK_RATE_MAX_REQUESTS = 10  # solicitudes permitidas por ventana
+CV_CALLBACK_RATE_WINDOW = 60        # segundos
+CV_CALLBACK_RATE_BLOCK_TIME = 300   # 5 minutos de bloqueo
+
+# Alta masiva de usuarios docentes (cron_create_docente_users): usuarios por create
+CV_USER_PROVISIONING_BATCH_SIZE = 100
+
+# Catálogo de typos (cv.typo.catalog)
+CV_TYPO_CATALOG_MIN_TOTAL = 3   # apariciones para que un typo del catálogo se use como patrón
+CV_TYPO_PATTERN_MIN_LENGTH = 6  # evita patrones cortos que coincidirían con palabras válidas
+CV_TYPO_MAX_DISTANCE = 0        # 0 = sin comprobación de distancia contra el vocabulario
@@ -1,5 +1,8 @@
 from odoo import http
-from odoo.http import request
+from odoo.http import request, Response
+from werkzeug.http import http_date
+import hashlib
+from odoo.tools import lazy
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -32,124 +35,161 @@ class WebsiteEmployeeCV(http.Controller):
             resp = request.make_response("Página no disponible", status=404)
         return self._apply_security_headers(resp)
 
-    @http.route(['/docente/<string:cedula>'], type='http', auth="public", website=True)
-    def empleado_perfil_cv(self, cedula, **kw):
-       
-        empleado = request.env['hr.employee'].sudo().search([
-            ('identification_id', '=', cedula)
-        ], limit=1)
-
-        if not empleado:
-            return self._render_404()
-
-        cv_publicado = request.env['cv.document'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('state', '=', 'published'),
-            ('x_website_published', '=', True),
-        ], limit=1)
-
-        if not cv_publicado:
-            return self._render_404()
+    DEGREE_ORDER = {
+        'cuarto nivel': 4,
+        'tercer nivel': 3,
+        'tecnico': 2,
+        'secundaria': 1,
+        'primaria': 0,
+        'no especificado': -1,
+    }
+
+    PUBLICATION_TYPES = ('article', 'conference', 'book', 'thesis', 'other')
+
+    # Claves del qcontext que dependen de los datos CV (se cargan solo si no hay caché)
+    PROFILE_DATA_KEYS = (
+        'cv_download_href',
+        'titulos_academicos', 'materias', 'materias_por_carrera',
+        'experiencia_laboral', 'experience_years',
+        'certificaciones', 'certificaciones_por_institucion',
+        'proyectos', 'publicaciones', 'publicaciones_por_tipo',
+        'logros', 'logros_por_tipo', 'idiomas',
+        'total_publicaciones', 'total_proyectos', 'total_certificaciones', 'total_logros',
+        'presentacion_generada',
+    )
+
+    def _get_published_snapshot(self, cv_publicado):
+        return request.env['cv.document.history'].sudo().search([
+            ('document_id', '=', cv_publicado.id),
+            ('is_published', '=', True),
+        ], order='version desc', limit=1)
+
+    def _get_profile_freshness(self, empleado):
+        """Estado de las colecciones cv.* del empleado: (count, max(write_date)) por modelo.
+
+        Las filas cambian sin nuevo snapshot (importación de CV, ediciones desde el
+        formulario, archivado), así que la clave del caché debe reflejarlas. Una sola
+        consulta UNION ALL sobre employee_id (indexado en todos los modelos).
+        """
+        env = request.env
+        tables = []
+        for model_name, _key, _fields in env['cv.document']._NORMALIZED_MODELS:
+            Model = env[model_name].sudo()
+            Model.flush_model(['employee_id', 'active', 'is_published'])
+            tables.append(Model._table)
+        query = " UNION ALL ".join(
+            f'SELECT %(tag{i})s, count(*), max(write_date) FROM "{table}" WHERE employee_id = %(emp)s'
+            for i, table in enumerate(tables)
+        )
+        params = {f'tag{i}': table for i, table in enumerate(tables)}
+        params['emp'] = empleado.id
+        env.cr.execute(query, params)
+        return tuple(sorted(env.cr.fetchall()))
+
+    def _get_profile_cache_key(self, empleado, cv_publicado, snapshot, freshness):
+        """Clave del HTML cacheado: cambia con cada versión publicada en el historial
+        y con cualquier alta, edición o baja en las colecciones cv.* del empleado."""
+        version = (snapshot.id, snapshot.version) if snapshot else (0, str(cv_publicado.x_publication_date))
+        colecciones = tuple((tag, total, str(last)) for tag, total, last in freshness)
+        return ('docente_profile', empleado.id, version, str(empleado.write_date), colecciones)
+
+    def _get_profile_validators(self, empleado, cv_publicado, snapshot, freshness):
+        """ETag y Last-Modified del perfil a partir del snapshot publicado vigente y del
+        estado de las colecciones cv.* (los mismos datos que la clave del caché).
+
+        El ETag incluye usuario e idioma porque la cabecera del sitio cambia con ellos, y
+        los conteos por modelo, de modo que también cambia cuando se elimina una fila
+        (algo que Last-Modified, basado en fechas, no puede reflejar).
+        """
+        version = (snapshot.id, snapshot.version) if snapshot else (0, str(cv_publicado.x_publication_date))
+        raw = repr((
+            empleado.id, version, str(empleado.write_date),
+            tuple((tag, total, str(last)) for tag, total, last in freshness),
+            request.env.uid, request.env.lang,
+        )).encode('utf-8')
+        etag = hashlib.sha256(raw).hexdigest()[:32]
+        dates = [
+            d for d in (
+                snapshot.write_date if snapshot else cv_publicado.x_publication_date,
+                empleado.write_date,
+                *(last for _tag, _total, last in freshness),
+            ) if d
+        ]
+        return etag, (max(dates) if dates else None)
+
+    def _is_not_modified(self, etag, last_modified):
+        httprequest = request.httprequest
+        if httprequest.if_none_match:
+            return httprequest.if_none_match.contains(etag)
+        if last_modified and httprequest.if_modified_since:
+            return last_modified.replace(microsecond=0) <= httprequest.if_modified_since.replace(tzinfo=None)
+        return False
+
+    def _apply_validator_headers(self, response, etag, last_modified):
+        response.headers['ETag'] = '"%s"' % etag
+        if last_modified:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        # El navegador/bot puede guardar la página pero debe revalidar en cada visita
+        response.headers['Cache-Control'] = 'public, no-cache' if request.env.user._is_public() else 'private, no-cache'
+        return response
 
-        titulos = request.env['cv.academic.degree'].sudo().search([
+    def _load_profile_values(self, empleado):
+        """Carga todos los datos públicos del perfil en una sola pasada (una búsqueda por modelo)."""
+        env = request.env
+        domain = [
             ('employee_id', '=', empleado.id),
             ('active', '=', True),
             ('is_published', '=', True),
-        ], order='degree_type desc, degree_title')
-
-        degree_order = {
-            'cuarto nivel': 4,
-            'tercer nivel': 3,
-            'tecnico': 2,
-            'secundaria': 1,
-            'primaria': 0,
-            'no especificado': -1,
-        }
+        ]
 
+        titulos = env['cv.academic.degree'].sudo().search(domain, order='degree_type desc, degree_title')
         titulos_sorted = sorted(
             titulos,
-            key=lambda t: degree_order.get(t.degree_type, -1),
+            key=lambda t: self.DEGREE_ORDER.get(t.degree_type, -1),
             reverse=True
         )
 
-        experiencia = request.env['cv.work.experience'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ], order='start_date desc')
-
+        experiencia = env['cv.work.experience'].sudo().search(domain, order='start_date desc')
         total_months = sum(exp.duration_months or 0 for exp in experiencia)
         experience_years = total_months // 12
 
-        materias = request.env['cv.materias'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ], order='asignatura')
-
+        materias = env['cv.materias'].sudo().search(domain, order='asignatura')
+        carreras_existentes = materias.carrera_id.exists()
         materias_por_carrera = {}
         for m in materias:
-            nombre = (
-                m.carrera_id.name
-                if m.carrera_id and m.carrera_id.exists()
-                else "General"
-            )
+            nombre = m.carrera_id.name if m.carrera_id in carreras_existentes else "General"
             materias_por_carrera.setdefault(nombre, []).append(m)
 
-        certificaciones = request.env['cv.certification'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ], order='institution, certification_name')
-
+        certificaciones = env['cv.certification'].sudo().search(domain, order='institution, certification_name')
         certificaciones_por_institucion = {}
         for c in certificaciones:
             inst = c.institution or "Institución no especificada"
             certificaciones_por_institucion.setdefault(inst, []).append(c)
 
-        publicaciones = request.env['cv.publication'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ], order="publication_year desc, title")
-
+        publicaciones = env['cv.publication'].sudo().search(domain, order="publication_year desc, title")
+        ids_por_tipo = {tipo: [] for tipo in self.PUBLICATION_TYPES}
+        for p in publicaciones:
+            if p.publication_type in ids_por_tipo:
+                ids_por_tipo[p.publication_type].append(p.id)
         publicaciones_por_tipo = {
-            'article': publicaciones.filtered(lambda p: p.publication_type == 'article'),
-            'conference': publicaciones.filtered(lambda p: p.publication_type == 'conference'),
-            'book': publicaciones.filtered(lambda p: p.publication_type == 'book'),
-            'thesis': publicaciones.filtered(lambda p: p.publication_type == 'thesis'),
-            'other': publicaciones.filtered(lambda p: p.publication_type == 'other'),
+            tipo: publicaciones.browse(ids) for tipo, ids in ids_por_tipo.items()
         }
 
-        logros = request.env['cv.logros'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ])
-
+        logros = env['cv.logros'].sudo().search(domain)
         logros_por_tipo = {}
         for l in logros:
             logros_por_tipo.setdefault(l.tipo or "other", []).append(l)
 
-        idiomas = request.env['cv.language'].sudo().search([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ])
+        idiomas = env['cv.language'].sudo().search(domain)
+        proyectos = env['cv.project'].sudo().search(domain)
 
-        cv_document = request.env['cv.document'].sudo().search([
+        cv_document = env['cv.document'].sudo().search([
             ('employee_id', '=', empleado.id),
             ('state', '=', 'processed')
         ], limit=1)
 
-        cv_download_href = cv_document.cv_download_url if cv_document else None
-
         total_publicaciones = len(publicaciones)
-        total_proyectos = request.env['cv.project'].sudo().search_count([
-            ('employee_id', '=', empleado.id),
-            ('active', '=', True),
-            ('is_published', '=', True),
-        ])
+        total_proyectos = len(proyectos)
 
         presentacion = self._generar_presentacion_docente(
             empleado=empleado,
@@ -159,14 +199,8 @@ class WebsiteEmployeeCV(http.Controller):
             total_proyectos=total_proyectos,
         )
 
-        template = 'cv_importer.employee_profile_base'
-        alt = request.env.ref('cv_importer.perfil_docente_template', raise_if_not_found=False)
-        if alt:
-            template = 'cv_importer.perfil_docente_template'
-
-        resp = request.render(template, {
-            'empleado': empleado,
-            'cv_download_href': cv_download_href,
+        return {
+            'cv_download_href': cv_document.cv_download_url if cv_document else None,
 
             'titulos_academicos': titulos_sorted,
             'materias': materias,
@@ -177,11 +211,7 @@ class WebsiteEmployeeCV(http.Controller):
             'certificaciones': certificaciones,
             'certificaciones_por_institucion': certificaciones_por_institucion,
 
-            'proyectos': request.env['cv.project'].sudo().search([
-                ('employee_id', '=', empleado.id),
-                ('active', '=', True),
-                ('is_published', '=', True),
-            ]),
+            'proyectos': proyectos,
 
             'publicaciones': publicaciones,
             'publicaciones_por_tipo': publicaciones_por_tipo,
@@ -197,8 +227,57 @@ class WebsiteEmployeeCV(http.Controller):
             'total_logros': len(logros),
 
             'presentacion_generada': presentacion,
+        }
+
+    @http.route(['/docente/<string:cedula>'], type='http', auth="public", website=True)
+    def empleado_perfil_cv(self, cedula, **kw):
+       
+        empleado = request.env['hr.employee'].sudo().search([
+            ('identification_id', '=', cedula)
+        ], limit=1)
+
+        if not empleado:
+            return self._render_404()
+
+        cv_publicado = request.env['cv.document'].sudo().search([
+            ('employee_id', '=', empleado.id),
+            ('state', '=', 'published'),
+            ('x_website_published', '=', True),
+        ], limit=1)
+
+        if not cv_publicado:
+            return self._render_404()
+
+        snapshot = self._get_published_snapshot(cv_publicado)
+        freshness = self._get_profile_freshness(empleado)
+        cache_key = self._get_profile_cache_key(empleado, cv_publicado, snapshot, freshness)
+        etag, last_modified = self._get_profile_validators(empleado, cv_publicado, snapshot, freshness)
+
+        # Revalidación (If-None-Match / If-Modified-Since): sin cambios no se renderiza nada
+        if self._is_not_modified(etag, last_modified):
+            resp = Response(status=304)
+            return self._apply_security_headers(self._apply_validator_headers(resp, etag, last_modified))
+
+        # El contenedor del perfil se cachea con t-cache (ver employee_profile_base).
+        # Los datos se cargan de forma perezosa: si el HTML ya está en caché no se consulta nada.
+        profile_data = lazy(lambda: self._load_profile_values(empleado))
+        values = {
+            key: lazy(lambda key=key: profile_data[key])
+            for key in self.PROFILE_DATA_KEYS
+        }
+        values.update({
+            'empleado': empleado,
+            'profile_cache_key': cache_key,
         })
 
+        template = 'cv_importer.employee_profile_base'
+        alt = request.env.ref('cv_importer.perfil_docente_template', raise_if_not_found=False)
+        if alt:
+            template = 'cv_importer.perfil_docente_template'
+
+        resp = request.render(template, values)
+        self._apply_validator_headers(resp, etag, last_modified)
+
         return self._apply_security_headers(resp)
 
     def _generar_presentacion_docente(
@@ -227,6 +306,8 @@ class WebsiteEmployeeCV(http.Controller):
             if experiencia_anios > 0:
                 partes.append(f"Con {experiencia_anios} años de experiencia profesional")
 
+            # Cualquier proyecto activo del empleado, publicado o no (la clave del caché
+            # cubre todas sus filas, ver _get_profile_freshness)
             esp = set()
             for p in request.env['cv.project'].sudo().search([
                 ('employee_id', '=', empleado.id)
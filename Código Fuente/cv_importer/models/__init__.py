@@ -2,8 +2,11 @@ from . import cv_config
 from . import cv_document
 from . import cv_metrics
 from . import cv_bulk_downloader
+from . import cv_callback_queue
+from . import cv_rate_limit
 from . import hr_employee_extend
 
+from . import cv_importable_mixin
 from . import cv_academic_degree
 from . import cv_work_experience
 from . import cv_publication
@@ -14,4 +17,5 @@ from . import cv_logros
 from . import cv_materias
 from . import cv_yearly_metrics
 
-from . import cv_typo_catalog
\ No newline at end of file
+from . import cv_typo_catalog
+from . import carrera
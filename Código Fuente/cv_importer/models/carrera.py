@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+import logging
+
+from ..carrera_resolver import CarreraResolver
+
+_logger = logging.getLogger(__name__)
+
+# {dbname: (firma, CarreraResolver)}; compartido por todas las peticiones del worker
+_RESOLVER_CACHE = {}
+
+
+class Carrera(models.Model):
+    _inherit = 'carrera'
+
+    @api.model
+    def _get_carrera_resolver(self):
+        """
+        Índice de carreras para mapear las etiquetas de los CV. Se construye una vez por
+        base de datos y se invalida al escribir carreras: en este worker al instante
+        (create/write/unlink) y en el resto por la firma, que cuesta una consulta.
+        """
+        self.env.cr.execute("""
+            SELECT count(*), coalesce(max(id), 0), coalesce(max(write_date)::text, '')
+              FROM carrera
+        """)
+        signature = self.env.cr.fetchone()
+
+        cached = _RESOLVER_CACHE.get(self.env.cr.dbname)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        self.flush_model(['name_normalized'])
+        self.env.cr.execute("SELECT id, name_normalized FROM carrera ORDER BY id")
+        resolver = CarreraResolver(self.env.cr.fetchall())
+        _RESOLVER_CACHE[self.env.cr.dbname] = (signature, resolver)
+        _logger.info("Índice de carreras reconstruido: %s nombres", len(resolver))
+        return resolver
+
+    def _invalidate_carrera_resolver(self):
+        _RESOLVER_CACHE.pop(self.env.cr.dbname, None)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self._invalidate_carrera_resolver()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._invalidate_carrera_resolver()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self._invalidate_carrera_resolver()
+        return res
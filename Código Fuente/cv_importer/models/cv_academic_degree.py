@@ -4,7 +4,10 @@ from odoo.exceptions import ValidationError
 
 class CvAcademicDegree(models.Model):
     _name = "cv.academic.degree"
+    _inherit = "cv.importable.mixin"
     _description = "Academic Degree"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['degree_title', 'institution']
 
     employee_id = fields.Many2one(
         "hr.employee",
@@ -84,10 +87,10 @@ class CvAcademicDegree(models.Model):
 
         return sanitized
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_manual_dummies(vals)
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_manual_dummies(vals) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_manual_dummies(vals)
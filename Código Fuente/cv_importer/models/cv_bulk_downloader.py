@@ -27,9 +27,9 @@ class CvBulkDownloader(models.TransientModel):
             self.employee_ids = [(5, 0, 0)]
 
     def action_download_cvs(self):
-        """Prepara un lote secuencial y lanza SOLO el primero.
-        Los siguientes se enviarán cuando N8N devuelva 'processed' al callback (/cv/callback),
-        que a su vez llama a _dispatch_next_in_batch() en cv.document.
+        """Prepara un lote y encola el envío de los primeros N documentos (ventana cv_importer.batch_window).
+        Cada callback de N8N (/cv/callback) libera un hueco y rellena la ventana
+        vía _dispatch_next_in_batch() en cv.document.
         """
         if not self.employee_ids:
             raise UserError(_('Debe seleccionar al menos un empleado'))
@@ -41,7 +41,6 @@ class CvBulkDownloader(models.TransientModel):
         import uuid
         batch_token = f"batch-{uuid.uuid4().hex}"
         order = 1
-        first_doc_to_run = None
 
         for employee in employees:
             try:
@@ -57,10 +56,10 @@ class CvBulkDownloader(models.TransientModel):
                             'batch_token': batch_token,
                             'batch_order': order,
                             'state': 'draft',
-                            'error_message': False,
+                            'status_message': False,
+                            'dispatch_attempts': 0,
+                            'dispatch_queued': False,
                         })
-                        if not first_doc_to_run:
-                            first_doc_to_run = existing_cv
                         updated_count += 1
                         _logger.info(f"CV preparado (batch) para {employee.name} (orden {order})")
                     else:
@@ -74,8 +73,6 @@ class CvBulkDownloader(models.TransientModel):
                         'batch_order': order,
                         'state': 'draft',
                     })
-                    if not first_doc_to_run:
-                        first_doc_to_run = cv_document
                     created_count += 1
                     _logger.info(f"CV creado (batch) para {employee.name} (orden {order})")
 
@@ -85,13 +82,16 @@ class CvBulkDownloader(models.TransientModel):
                 error_count += 1
                 _logger.error(f"Error preparando CV para {getattr(employee, 'name', 'desconocido')}: {str(e)}")
 
-        if first_doc_to_run:
+        CvDocument = self.env['cv.document']
+        window = CvDocument._get_batch_window()
+        dispatched = CvDocument.browse()
+        if created_count or updated_count:
             try:
-                first_doc_to_run.action_upload_to_n8n()
-                _logger.info(f"▶️ Lanzado primer documento del lote {batch_token}: id={first_doc_to_run.id}")
+                dispatched = CvDocument._fill_batch_window(batch_token, window=window)
+                _logger.info(f"▶️ En cola de envío {len(dispatched)} documentos del lote {batch_token} (ventana={window})")
             except Exception as e:
                 error_count += 1
-                _logger.error(f"No se pudo lanzar el primer documento del lote {batch_token}: {e}")
+                _logger.error(f"No se pudo lanzar la ventana inicial del lote {batch_token}: {e}")
 
         parts = []
         if created_count > 0: parts.append(f"{created_count} CVs nuevos creados")
@@ -104,9 +104,10 @@ class CvBulkDownloader(models.TransientModel):
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': 'Descarga masiva (modo secuencial)',
+                'title': 'Descarga masiva (ventana de %s)' % window,
                 'message': "Procesamiento preparado:\n" + "\n".join(parts) +
-                           "\n\nSe inició el primero y los siguientes se encadenarán por callback.",
+                           "\n\nSe encolaron %s documentos para envío y los siguientes se despacharán "
+                           "a medida que lleguen los callbacks." % len(dispatched),
                 'type': 'success' if error_count == 0 else 'warning',
                 'sticky': True,
             }
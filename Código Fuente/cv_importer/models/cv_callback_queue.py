@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api, _
+from datetime import timedelta
+import json
+import logging
+import traceback
+
+from ..config_constants import CV_CALLBACK_QUEUE_MAX_ATTEMPTS
+
+_logger = logging.getLogger(__name__)
+
+
+class CvCallbackQueue(models.Model):
+    _name = 'cv.callback.queue'
+    _description = 'Cola de callbacks de N8N'
+    _order = 'id asc'
+    _rec_name = 'cedula'
+
+    cedula = fields.Char(string='Cédula', index=True)
+    payload = fields.Text(string='Payload (JSON)', required=True)
+    headers_json = fields.Text(string='Cabeceras (JSON)')
+    remote_ip = fields.Char(string='IP de origen')
+    state = fields.Selection([
+        ('pending', 'Pendiente'),
+        ('done', 'Procesado'),
+        ('failed', 'Fallido'),
+    ], string='Estado', default='pending', required=True, index=True)
+    attempts = fields.Integer(string='Intentos', default=0)
+    next_attempt_at = fields.Datetime(string='Próximo intento')
+    last_error = fields.Text(string='Último error')
+    response_json = fields.Text(string='Respuesta (JSON)')
+    http_status = fields.Integer(string='Estado HTTP')
+    processed_at = fields.Datetime(string='Procesado el')
+
+    @api.model
+    def enqueue(self, data, headers=None, remote_ip=None):
+        """Persiste el callback y despierta al worker. Confirma la transacción
+        para que el registro sea durable antes de responder 202 a N8N."""
+        item = self.sudo().create({
+            'cedula': str(data.get('cedula') or ''),
+            'payload': json.dumps(data, ensure_ascii=False),
+            'headers_json': json.dumps(headers or {}),
+            'remote_ip': remote_ip,
+        })
+        self.env.cr.commit()
+        try:
+            self.env.ref('cv_importer.cron_cv_callback_queue')._trigger()
+        except Exception as e:
+            _logger.warning("No se pudo disparar el worker de la cola de callbacks: %s", e)
+        _logger.info("Callback encolado id=%s cedula=%s", item.id, item.cedula)
+        return item
+
+    @api.model
+    def _get_max_attempts(self):
+        raw = self.env['ir.config_parameter'].sudo().get_param('cv_importer.callback_queue_max_attempts')
+        try:
+            return max(int(raw or CV_CALLBACK_QUEUE_MAX_ATTEMPTS), 1)
+        except (TypeError, ValueError):
+            return CV_CALLBACK_QUEUE_MAX_ATTEMPTS
+
+    @api.model
+    def cron_process_callback_queue(self, limit=100):
+        """Drena la cola en orden de llegada.
+
+        Si un callback falla se reintenta con backoff exponencial (1, 2, 4... minutos) y
+        los callbacks posteriores de la misma cédula esperan, para no aplicar datos fuera de orden.
+        """
+        now = fields.Datetime.now()
+        max_attempts = self._get_max_attempts()
+        items = self.sudo().search([('state', '=', 'pending')], order='id asc', limit=limit)
+
+        blocked = set()
+        processed = failed = 0
+        for item in items:
+            if item.cedula in blocked:
+                continue
+            if item.next_attempt_at and item.next_attempt_at > now:
+                blocked.add(item.cedula)
+                continue
+
+            try:
+                data = json.loads(item.payload or '{}')
+                headers = json.loads(item.headers_json or '{}')
+                with self.env.cr.savepoint():
+                    result, status = self.env['cv.document'].sudo()._process_n8n_callback(data, headers)
+            except Exception as e:
+                result, status = {'status': 'error', 'message': str(e)}, 500
+                _logger.error("Error procesando callback encolado id=%s: %s\n%s", item.id, e, traceback.format_exc())
+
+            vals = {
+                'attempts': item.attempts + 1,
+                'http_status': status,
+                'response_json': json.dumps(result, ensure_ascii=False, default=str),
+            }
+            if status < 400:
+                vals.update({'state': 'done', 'processed_at': fields.Datetime.now(), 'last_error': False})
+                processed += 1
+            elif status < 500 or vals['attempts'] >= max_attempts:
+                # 4xx no se arregla reintentando (p. ej. documento inexistente)
+                vals.update({'state': 'failed', 'last_error': result.get('message')})
+                failed += 1
+            else:
+                vals.update({
+                    'last_error': result.get('message'),
+                    'next_attempt_at': fields.Datetime.now() + timedelta(minutes=2 ** item.attempts),
+                })
+                blocked.add(item.cedula)
+            item.write(vals)
+            self.env.cr.commit()
+
+        if processed or failed:
+            _logger.info("Cola de callbacks: %s procesados, %s fallidos", processed, failed)
+        return True
+
+    def action_retry(self):
+        self.write({'state': 'pending', 'next_attempt_at': False, 'last_error': False})
+        return True
@@ -6,7 +6,10 @@ from odoo.exceptions import ValidationError
 
 class CvCertification(models.Model):
     _name = "cv.certification"
+    _inherit = "cv.importable.mixin"
     _description = "Certification"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['certification_name', 'institution']
     _order = "certification_name"
     _rec_name = "certification_name"
 
@@ -123,10 +126,10 @@ class CvCertification(models.Model):
                 vals[field_name] = -1
         return vals
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_nulls_to_dummy(dict(vals))
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_nulls_to_dummy(dict(vals)) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_nulls_to_dummy(dict(vals))
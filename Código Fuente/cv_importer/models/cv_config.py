@@ -6,6 +6,7 @@ import json
 
 from ..config_constants import (
     CV_IMPORT_TIMEOUT,
+    CV_BATCH_WINDOW,
 )
 
 _logger = logging.getLogger(__name__)
@@ -36,6 +37,27 @@ class CvImporterConfig(models.TransientModel):
             'cv_importer.timeout', str(CV_IMPORT_TIMEOUT)
         )),
     )
+    callback_async = fields.Boolean(
+        string='Callbacks asíncronos',
+        default=lambda self: self.env['ir.config_parameter'].sudo().get_param(
+            'cv_importer.callback_async', 'False'
+        ) == 'True',
+        help='El endpoint /cv/callback encola el payload y responde 202; un cron lo procesa.'
+    )
+    incremental_apply = fields.Boolean(
+        string='Aplicación incremental',
+        default=lambda self: self.env['ir.config_parameter'].sudo().get_param(
+            'cv_importer.incremental_apply', 'True'
+        ) == 'True',
+        help='Al reimportar un CV solo inserta, actualiza o archiva las filas que cambiaron.'
+    )
+    batch_window = fields.Integer(
+        string='Documentos simultáneos por lote',
+        default=lambda self: int(self.env['ir.config_parameter'].sudo().get_param(
+            'cv_importer.batch_window', str(CV_BATCH_WINDOW)
+        )),
+        help='Cantidad máxima de CVs enviados a N8N a la vez en la descarga masiva.'
+    )
     
     def _build_n8n_test_url(self, base_url):
         ICP = self.env['ir.config_parameter'].sudo()
@@ -57,7 +79,10 @@ class CvImporterConfig(models.TransientModel):
             ICP = self.env['ir.config_parameter'].sudo()
             ICP.set_param('cv_importer.n8n_webhook_url', record.n8n_webhook_url)
             ICP.set_param('cv_importer.auto_apply_data', str(record.auto_apply_data))
+            ICP.set_param('cv_importer.incremental_apply', str(record.incremental_apply))
+            ICP.set_param('cv_importer.callback_async', str(record.callback_async))
             ICP.set_param('cv_importer.timeout', str(record.timeout))
+            ICP.set_param('cv_importer.batch_window', str(max(record.batch_window, 1)))
             _logger.info(f"Configuración de CV Importer actualizada: URL={record.n8n_webhook_url}")
             return {
                 'type': 'ir.actions.client',
@@ -4,9 +4,16 @@ from odoo.exceptions import UserError, ValidationError
 import logging
 import requests
 import json
+import hashlib
 import traceback
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta, date, timezone
 
+from ..carrera_resolver import clean_carrera_label, normalize_text
+from ..config_constants import (
+    CV_BATCH_WINDOW,
+    CV_WATCHDOG_TIMEOUT_MINUTES,
+    CV_WATCHDOG_MAX_RETRIES,
+)
 
 _logger = logging.getLogger(__name__)
 
@@ -91,7 +98,10 @@ class CvDocument(models.Model):
                 'x_coord_validation_notes': False,
             })
             # Guardar versión aprobada en historial y marcar anteriores como no publicadas
-            self._create_history_snapshot(is_published=True, state='published', coord_comment=False, mark_previous_unpublished=True)
+            # (el snapshot y la publicación parten de las mismas filas cargadas una sola vez)
+            rows = self._load_normalized_rows()
+            self._create_history_snapshot(is_published=True, state='published', coord_comment=False,
+                                          mark_previous_unpublished=True, rows=rows)
             # Promover registros staging a publicados y despublicar los anteriores
             self._publish_staging_records()
             # Notificar al docente la aprobación
@@ -135,6 +145,11 @@ class CvDocument(models.Model):
                 'x_website_published': False,
                 'state': 'draft',
             })
+            # Sin versión publicada la clave de caché del perfil público deja de existir
+            self.env['cv.document.history'].sudo().search([
+                ('document_id', '=', self.id),
+                ('is_published', '=', True),
+            ]).write({'is_published': False})
 
     def action_open_webpage(self):
         """Botón para ver página pública"""
@@ -187,6 +202,12 @@ class CvDocument(models.Model):
         help="Timestamp when parsed data was applied to normalized tables"
     )
 
+    applied_fingerprint = fields.Char(
+        string="Applied Fingerprint",
+        copy=False,
+        help="SHA-256 of the normalized raw_extracted_data last applied to normalized tables"
+    )
+
     # Seguimiento N8N
     n8n_job_id = fields.Char(string='Job ID N8N')
     n8n_status = fields.Char(string='Estado N8N', help='Último estado reportado por n8n')
@@ -195,6 +216,18 @@ class CvDocument(models.Model):
     # Info de lote
     batch_token = fields.Char(string='Token de Lote', index=True, help='Identificador de lote (opcional)')
     batch_order = fields.Integer(string='Orden en Lote', default=0, index=True, help='Orden relativo en el lote (opcional)')
+    dispatch_queued = fields.Boolean(
+        string='Envío en cola',
+        default=False,
+        copy=False,
+        index=True,
+        help='Reservado en la ventana del lote; el cron de despacho lo enviará a N8N'
+    )
+    dispatch_attempts = fields.Integer(
+        string='Reintentos de envío',
+        default=0,
+        help='Veces que el watchdog reenvió el CV a N8N por no recibir callback a tiempo'
+    )
 
     n8n_webhook_url = fields.Char(
         string='URL Webhook N8N',
@@ -318,26 +351,7 @@ class CvDocument(models.Model):
 
 
     def _normalize_text(self, texto):
-        texto = str(texto or '')
-
-        texto = texto.replace('\xa0', ' ').replace('\u200b', '')
-
-        reemplazos = (
-            ("á", "a"), ("é", "e"), ("í", "i"),
-            ("ó", "o"), ("ú", "u"),
-            ("Á", "A"), ("É", "E"), ("Í", "I"),
-            ("Ó", "O"), ("Ú", "U"),
-            ("ñ", "n"), ("Ñ", "N"),
-        )
-        for a, b in reemplazos:
-            texto = texto.replace(a, b)
-
-        texto = ''.join(ch for ch in texto if ch.isalnum() or ch.isspace())
-
-        texto = ' '.join(texto.strip().split())
-        return texto.lower()
-
-
+        return normalize_text(texto)
 
     def _clean_carrera_label(self, raw):
         """
@@ -345,107 +359,8 @@ class CvDocument(models.Model):
         'Carrera de', 'Carrera en', 'Carrera '
         pero mantiene tildes/ñ para que luego _normalize_text se encargue.
         """
-        txt = str(raw or '').strip()
-        txt_lower = txt.lower()
-
-        prefixes = [
-            'carrera de ',
-            'carrera en ',
-            'carrera ',
-        ]
-
-        for p in prefixes:
-            if txt_lower.startswith(p):
-                # recortar usando la longitud del prefijo original
-                txt = txt[len(p):].strip()
-                break
-
-        return txt
-
-    def _find_best_carrera(self, carrera_index, carrera_key):
-        if not carrera_key:
-            return False
-
-        if carrera_key in carrera_index:
-            return carrera_index[carrera_key]
-
-        key_tokens = set(carrera_key.split())
-        if not key_tokens:
-            return False
-
-        best = None
-        best_score = 0.0
-
-        for k, carrera in carrera_index.items():
-            tokens = set(k.split())
-            if not tokens:
-                continue
-            inter = key_tokens & tokens
-            union = key_tokens | tokens
-            score = len(inter) / float(len(union)) if union else 0.0
-
-            if score > best_score:
-                best_score = score
-                best = carrera
-
-        # Umbral: puedes ajustarlo. 0.6 suele ser razonable
-        if best and best_score >= 0.6:
-            _logger.info(
-                "MATCH DIFUSO carrera_key=%r -> '%s' (id=%s) score=%.2f",
-                carrera_key, best.name, best.id, best_score
-            )
-            return best
-
-        return False
-
-
-    @api.depends('employee_id')
-    def _compute_employee_collections(self):
-        """
-        No crea nada nuevo, solo refleja lo que ya está
-        en hr.employee.* para este empleado.
-        """
-        for rec in self:
-            emp = rec.employee_id
-            if not emp:
-                rec.cv_academic_degree_ids = False
-                rec.cv_work_experience_ids = False
-                rec.cv_materias_ids = False
-                rec.cv_certification_ids = False
-                rec.cv_logros_ids = False
-                rec.cv_language_ids = False
-                rec.cv_project_ids = False
-                rec.cv_publication_ids = False
-                rec.cv_yearly_metrics_ids = False
-                continue
+        return clean_carrera_label(raw)
 
-            rec.cv_academic_degree_ids = self.env['cv.academic.degree'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_work_experience_ids = self.env['cv.work.experience'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_materias_ids = self.env['cv.materias'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_certification_ids = self.env['cv.certification'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_logros_ids = self.env['cv.logros'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_language_ids = self.env['cv.language'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_project_ids = self.env['cv.project'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_publication_ids = self.env['cv.publication'].search([
-                ('employee_id', '=', emp.id)
-            ])
-            rec.cv_yearly_metrics_ids = self.env['cv.yearly.metrics'].search([
-                ('employee_id', '=', emp.id)
-            ])
 
     @api.depends_context('company')
     def _compute_n8n_webhook_url(self):
@@ -478,32 +393,263 @@ class CvDocument(models.Model):
     # LÓGICA DE LOTES Y N8N
     # ==========================
 
-    def _dispatch_next_in_batch(self):
-        for rec in self.sudo():
-            if not rec.batch_token:
-                continue
-            dom = [
-                ('batch_token', '=', rec.batch_token),
-                ('state', 'in', ['draft', 'uploaded']),
-                ('id', '!=', rec.id),
-            ]
-            order = 'id'
-            if rec.batch_order:
-                dom.append(('batch_order', '>', rec.batch_order))
-                order = 'batch_order,id'
-            nxt = self.search(dom, order=order, limit=1)
-            if not nxt:
-                _logger.info(f"🧵 Lote {rec.batch_token}: no hay siguiente pendiente.")
-                continue
+    # Estados que ocupan un hueco en la ventana del lote (enviados y sin callback final)
+    BATCH_IN_FLIGHT_STATES = ('uploaded', 'processing')
+    BATCH_DONE_STATES = ('processed', 'error', 'coord_review', 'published', 'rejected')
+
+    @api.model
+    def _get_batch_window(self):
+        """Número máximo de documentos en vuelo por lote (cv_importer.batch_window)."""
+        raw = self.env['ir.config_parameter'].sudo().get_param('cv_importer.batch_window')
+        try:
+            window = int(raw or CV_BATCH_WINDOW)
+        except (TypeError, ValueError):
+            window = CV_BATCH_WINDOW
+        return max(window, 1)
+
+    @api.model
+    def _get_batch_stats(self, batch_token):
+        """Resumen del lote: conteos por estado, tiempo transcurrido y throughput (docs/min)."""
+        stats = {
+            'batch_token': batch_token,
+            'total': 0,
+            'pending': 0,
+            'in_flight': 0,
+            'done': 0,
+            'errors': 0,
+            'elapsed_seconds': 0.0,
+            'throughput_per_minute': 0.0,
+        }
+        if not batch_token:
+            return stats
+
+        Doc = self.sudo()
+        groups = Doc.read_group([('batch_token', '=', batch_token)], ['state'], ['state'])
+        for g in groups:
+            count = g.get('state_count', 0)
+            state = g.get('state')
+            stats['total'] += count
+            if state == 'draft':
+                stats['pending'] += count
+            elif state in self.BATCH_IN_FLIGHT_STATES:
+                stats['in_flight'] += count
+            elif state in self.BATCH_DONE_STATES:
+                stats['done'] += count
+                if state == 'error':
+                    stats['errors'] += count
+
+        first = Doc.search(
+            [('batch_token', '=', batch_token), ('start_time_espoch', '>', 0)],
+            order='start_time_espoch asc', limit=1,
+        )
+        if first:
+            import time as _time
+            elapsed = max(_time.time() - first.start_time_espoch, 0.0)
+            stats['elapsed_seconds'] = elapsed
+            if elapsed > 0:
+                stats['throughput_per_minute'] = round(stats['done'] * 60.0 / elapsed, 2)
+        return stats
+
+    @api.model
+    def _fill_batch_window(self, batch_token, window=None):
+        """Reserva documentos 'draft' del lote hasta tener `window` documentos en vuelo.
+
+        Se llama al lanzar el lote y desde cada callback (cuando se libera un hueco).
+        Bajo el bloqueo solo se marcan los documentos (dispatch_queued); el envío HTTP a
+        N8N lo hace cron_dispatch_batch_documents después del commit, para no retener el
+        bloqueo ni el worker HTTP mientras N8N responde.
+        Devuelve el recordset de documentos reservados.
+        """
+        claimed = self.browse()
+        if not batch_token:
+            return claimed
+        window = window or self._get_batch_window()
+
+        # Serializa el llenado entre callbacks concurrentes del mismo lote
+        self.env.cr.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (batch_token,))
+
+        Doc = self.sudo()
+        in_flight = Doc.search_count([
+            ('batch_token', '=', batch_token),
+            '|',
+            ('state', 'in', list(self.BATCH_IN_FLIGHT_STATES)),
+            '&', ('state', '=', 'draft'), ('dispatch_queued', '=', True),
+        ])
+        free = window - in_flight
+
+        if free > 0:
+            claimed = Doc.search([
+                ('batch_token', '=', batch_token),
+                ('state', '=', 'draft'),
+                ('dispatch_queued', '=', False),
+            ], order='batch_order,id', limit=free)
+            if claimed:
+                claimed.write({'dispatch_queued': True})
+                _logger.info(
+                    f"🧵 Lote {batch_token}: {len(claimed)} documentos en cola de envío "
+                    f"(en vuelo={in_flight}/{window}) ids={claimed.ids}"
+                )
+                try:
+                    self.env.ref('cv_importer.cron_cv_batch_dispatch')._trigger()
+                except Exception as e:
+                    _logger.warning("No se pudo disparar el cron de despacho de lotes: %s", e)
+
+        if not claimed and not in_flight:
+            self._record_batch_throughput(batch_token)
+        return claimed
+
+    @api.model
+    def cron_dispatch_batch_documents(self, limit=50):
+        """Envía a N8N los documentos reservados por _fill_batch_window, uno por transacción.
+
+        Si un envío falla el documento pasa a 'error' y se vuelve a llenar la ventana
+        de su lote, que reserva el siguiente pendiente.
+        """
+        docs = self.sudo().search([
+            ('dispatch_queued', '=', True),
+            ('state', '=', 'draft'),
+        ], order='batch_order,id', limit=limit)
+
+        for doc in docs:
             _logger.info(
-                f"🧵 Lote {rec.batch_token}: despachando siguiente id={nxt.id} "
-                f"emp={nxt.employee_id.name} (state={nxt.state})"
+                f"🧵 Lote {doc.batch_token}: despachando id={doc.id} emp={doc.employee_id.name}"
             )
             try:
-                nxt.action_upload_to_n8n()
+                doc.action_upload_to_n8n()
+                doc.dispatch_queued = False
+                self.env.cr.commit()
             except Exception as e:
-                nxt.write({'state': 'error', 'status_message': f'Error al despachar siguiente del lote: {e}'})
-                _logger.warning(f"⚠️ Error despachando siguiente del lote {rec.batch_token}: {e}")
+                self.env.cr.rollback()
+                # action_upload_to_n8n ya deja el documento en 'error'; no vuelve a elegirse
+                doc.write({
+                    'state': 'error',
+                    'dispatch_queued': False,
+                    'status_message': f'Error al despachar documento del lote: {e}',
+                })
+                _logger.warning(f"⚠️ Error despachando documento del lote {doc.batch_token}: {e}")
+                if doc.batch_token:
+                    self._fill_batch_window(doc.batch_token)
+                self.env.cr.commit()
+
+        # Limpia reservas de documentos que ya salieron de 'draft' por otra vía (envío manual)
+        self.sudo().search([('dispatch_queued', '=', True), ('state', '!=', 'draft')]).write({'dispatch_queued': False})
+
+        if self.sudo().search_count([('dispatch_queued', '=', True), ('state', '=', 'draft')]):
+            self.env.ref('cv_importer.cron_cv_batch_dispatch')._trigger()
+        return True
+
+    @api.model
+    def _record_batch_throughput(self, batch_token):
+        """Registra en cv.metrics el throughput del lote cuando ya no quedan documentos pendientes."""
+        stats = self._get_batch_stats(batch_token)
+        if stats['pending'] or stats['in_flight'] or not stats['total']:
+            return False
+        Metrics = self.env['cv.metrics'].sudo()
+        if Metrics.search_count([('operation_type', '=', 'batch'), ('batch_token', '=', batch_token)]):
+            return False
+        _logger.info(
+            f"🧵 Lote {batch_token} completado: {stats['done']} docs en "
+            f"{stats['elapsed_seconds']:.0f}s ({stats['throughput_per_minute']} docs/min)"
+        )
+        return Metrics.record_import_metric(
+            operation_type='batch',
+            success=not stats['errors'],
+            duration_seconds=stats['elapsed_seconds'],
+            error_count=stats['errors'],
+            batch_token=batch_token,
+            batch_size=stats['total'],
+            throughput_per_minute=stats['throughput_per_minute'],
+        )
+
+    @api.model
+    def _get_watchdog_params(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        try:
+            timeout_minutes = int(ICP.get_param('cv_importer.watchdog_timeout_minutes') or CV_WATCHDOG_TIMEOUT_MINUTES)
+        except (TypeError, ValueError):
+            timeout_minutes = CV_WATCHDOG_TIMEOUT_MINUTES
+        try:
+            max_retries = int(ICP.get_param('cv_importer.watchdog_max_retries') or CV_WATCHDOG_MAX_RETRIES)
+        except (TypeError, ValueError):
+            max_retries = CV_WATCHDOG_MAX_RETRIES
+        return max(timeout_minutes, 1) * 60, max(max_retries, 0)
+
+    @api.model
+    def cron_watchdog_stalled_documents(self):
+        """Reenvía a N8N los documentos 'uploaded'/'processing' que superaron su plazo.
+
+        El plazo se cuenta desde la última actividad (envío o último callback) y se
+        duplica en cada reintento. Agotados los reintentos el documento pasa a 'error'
+        y se rellena la ventana de su lote para que no quede detenido.
+        """
+        import time as _time
+        timeout_seconds, max_retries = self._get_watchdog_params()
+        now_ts = _time.time()
+
+        stalled = self.sudo().search([
+            ('state', 'in', list(self.BATCH_IN_FLIGHT_STATES)),
+            ('start_time_espoch', '>', 0),
+            ('start_time_espoch', '<', now_ts - timeout_seconds),
+        ], order='start_time_espoch asc')
+
+        retried = failed = 0
+        batch_tokens = set()
+        for doc in stalled:
+            last_activity = doc.start_time_espoch
+            if doc.n8n_last_callback:
+                last_activity = max(last_activity, doc.n8n_last_callback.replace(tzinfo=timezone.utc).timestamp())
+            deadline = timeout_seconds * (2 ** (doc.dispatch_attempts or 0))
+            if now_ts - last_activity < deadline:
+                continue
+
+            if doc.dispatch_attempts >= max_retries:
+                doc.write({
+                    'state': 'error',
+                    'status_message': _("N8N no respondió tras %s reintentos.") % doc.dispatch_attempts,
+                })
+                failed += 1
+                _logger.warning(f"⏱️ Watchdog: CV {doc.id} ({doc.employee_id.name}) marcado en error sin callback")
+            else:
+                doc.dispatch_attempts += 1
+                _logger.info(
+                    f"⏱️ Watchdog: reenviando CV {doc.id} ({doc.employee_id.name}), "
+                    f"intento {doc.dispatch_attempts}/{max_retries}"
+                )
+                try:
+                    doc.action_upload_to_n8n()
+                    retried += 1
+                except Exception as e:
+                    # action_upload_to_n8n deja el documento en 'error'
+                    failed += 1
+                    _logger.warning(f"⏱️ Watchdog: fallo reenviando CV {doc.id}: {e}")
+
+            if doc.batch_token and doc.state == 'error':
+                batch_tokens.add(doc.batch_token)
+            self.env.cr.commit()
+
+        for batch_token in batch_tokens:
+            try:
+                self._fill_batch_window(batch_token)
+                self.env.cr.commit()
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.warning(f"⏱️ Watchdog: no se pudo avanzar el lote {batch_token}: {e}")
+
+        if retried or failed:
+            _logger.info(f"⏱️ Watchdog CV: {retried} reenviados, {failed} marcados en error, lotes avanzados={len(batch_tokens)}")
+        return True
+
+    def _dispatch_next_in_batch(self):
+        """Rellena la ventana de los lotes de estos documentos tras recibir su callback."""
+        dispatched = self.browse()
+        for batch_token in set(self.sudo().mapped('batch_token')):
+            if not batch_token:
+                continue
+            nxt = self._fill_batch_window(batch_token)
+            if not nxt:
+                _logger.info(f"🧵 Lote {batch_token}: no hay siguiente pendiente.")
+            dispatched |= nxt
+        return dispatched
 
     def action_upload_to_n8n(self):
         """Envía el CV a n8n con un reintento si no responde en 30s."""
@@ -578,6 +724,344 @@ class CvDocument(models.Model):
                 record.status_message = _("n8n no pudo procesar tu CV en este momento. Intenta más tarde. Detalle: %s") % (last_error or 'Error desconocido')
                 raise UserError(_("n8n no pudo procesar tu CV en este momento. Intenta más tarde."))
 
+    # ==========================
+    # CALLBACK N8N
+    # ==========================
+
+    # Cabeceras de /cv/callback que usa el procesamiento (se guardan también en la cola)
+    CALLBACK_HEADERS = ('X-Job-Status', 'X-Job-Batch', 'X-Job-Order', 'X-Job-Id')
+
+    @api.model
+    def _process_n8n_callback(self, data, headers=None, commit=False):
+        """Procesa un payload de /cv/callback, ya autenticado.
+
+        Se usa desde el endpoint (modo sincrónico) y desde el worker de cv.callback.queue.
+        Devuelve (respuesta_dict, http_status). Con commit=True confirma la transacción
+        en los mismos puntos que el endpoint original.
+        """
+        headers = headers or {}
+
+        # Estado/headers
+        status_raw = (str((data or {}).get('status') or '') or
+                      str(headers.get('X-Job-Status') or '')).strip().lower()
+
+        batch_token_hdr = (headers.get('X-Job-Batch') or '').strip()
+        try:
+            batch_order_hdr = int(headers.get('X-Job-Order', '0'))
+        except Exception:
+            batch_order_hdr = 0
+
+        n8n_job_id = (str(data.get('job_id') or '') or
+                      str(headers.get('X-Job-Id') or '')).strip()
+
+        # Si viene {result: true/false} sin 'status'
+        result_bool = data.get('result')
+        if isinstance(result_bool, bool) and not status_raw:
+            status_raw = 'success' if result_bool else 'failed'
+
+        # Conjuntos de mapeo
+        success_statuses = {'ok', 'done', 'success', 'processed'}
+        error_statuses   = {'fail', 'failed', 'error'}
+
+        # 1) Inicializar siempre
+        mapped_state = 'processing'
+        # 2) Ajustar por status_raw
+        if status_raw in success_statuses:
+            mapped_state = 'processed'
+        elif status_raw in error_statuses:
+            mapped_state = 'error'
+
+        # Extraer información básica
+        cedula = data.get('cedula')
+        employee_name = data.get('employee_name')
+
+        if not cedula:
+            _logger.error("Falta cédula en el callback")
+            return {'status': 'error', 'message': 'Missing cedula'}, 400
+
+        _logger.info(f"Procesando callback para: {employee_name} (Cédula: {cedula})")
+
+        cv_document = self.env['cv.document'].sudo().search(
+            [('cedula', '=', cedula)],
+            order='create_date desc', limit=1
+        )
+        if not cv_document:
+            _logger.error(f"No se encontró documento CV para cédula: {cedula}")
+            return {'status': 'error', 'message': f'No se encontró documento CV para cédula: {cedula}'}, 404
+
+
+        previous_state = cv_document.state or 'draft'
+
+
+        import_user = cv_document.write_uid or cv_document.create_uid
+
+        # Idempotencia: ya estaba processed y llega processed de nuevo
+        if previous_state == 'processed' and mapped_state == 'processed':
+            _logger.info(f"Callback duplicado ignorado (ya fue procesado). Doc {cv_document.id}")
+            return {
+                'status': 'success',
+                'message': 'Callback duplicado proceso ignorado',
+                'cedula': cedula,
+                'employee_name': employee_name,
+                'odoo_state': previous_state,
+                'next_dispatched': False,
+                'duplicate': True,
+            }, 200
+
+        raw_data = cv_document._get_raw_extracted_data(data)
+        fingerprint = cv_document._compute_extraction_fingerprint(raw_data)
+        unchanged = bool(
+            mapped_state == 'processed'
+            and fingerprint
+            and fingerprint == cv_document.applied_fingerprint
+        )
+
+        write_vals = {
+            'state': mapped_state,
+            'n8n_status': status_raw or mapped_state,
+            'n8n_last_callback': fields.Datetime.now(),
+            'batch_token': cv_document.batch_token or (data.get('batch_token') or batch_token_hdr or False),
+            'batch_order': cv_document.batch_order or int(data.get('batch_order') or batch_order_hdr or 0),
+        }
+        if n8n_job_id:
+            write_vals['n8n_job_id'] = n8n_job_id
+
+        if not unchanged:
+            full_response_json = json.dumps(data, ensure_ascii=False, indent=2)
+            write_vals['extraction_response'] = full_response_json
+
+        cv_document.write(write_vals)
+        if commit:
+            self.env.cr.commit()
+
+        # Extracción idéntica a la última aplicada: no se parsea ni se escribe nada
+        if unchanged:
+            _logger.info(
+                "Extracción sin cambios (fingerprint=%s) para doc %s: se omite parseo y aplicación",
+                fingerprint[:12], cv_document.id
+            )
+        else:
+            try:
+                typo_model = self.env["cv.typo.catalog"].sudo()
+
+                # Extraer candidatos a typo desde campos manuales
+                candidates = typo_model.extract_candidates(raw_data)
+
+                # Una sola sentencia para todos los candidatos
+                with self.env.cr.savepoint():
+                    typo_model.upsert_typos(candidates, cedula=cedula)
+
+                _logger.info(
+                    "Typos staging actualizado | cedula=%s | candidatos=%s",
+                    cedula, len(candidates)
+                )
+
+            except Exception as e:
+                _logger.warning(
+                    "No se pudo actualizar catálogo de typos (staging): %s", str(e)
+                )
+
+        normalized_applied = False
+        normalized_error = None
+
+        if unchanged:
+            self.env['cv.metrics'].sudo().record_import_metric(
+                operation_type='skipped_unchanged',
+                success=True,
+                duration_seconds=0.0,
+                employee_id=cv_document.employee_id.id,
+                user_id=cv_document.create_uid.id,
+            )
+        elif mapped_state == 'processed' and cv_document.extraction_response:
+            try:
+                cv_document._invalidate_cache(['extraction_response'])
+                cv_document.action_apply_parsed_data()
+                normalized_applied = True
+            except Exception as e:
+                normalized_error = str(e)
+                # Si falló al aplicar datos normalizados, marcar el documento como error.
+                mapped_state = 'error'
+                cv_document.write({
+                    'state': mapped_state,
+                    'status_message': normalized_error,
+                })
+
+        # Métricas de tiempo y tamaño (cv.metrics)
+        try:
+            import time as _time
+            metrics = self.env['cv.metrics'].sudo()
+
+            start_ts = getattr(cv_document, 'start_time_espoch', 0.0) or 0.0
+            if not start_ts and data.get('start_time_espoch'):
+                try:
+                    start_ts = float(data.get('start_time_espoch'))
+                except Exception:
+                    start_ts = 0.0
+            if not start_ts:
+                start_ts = _time.time()
+
+            duration_seconds = max(_time.time() - start_ts, 0.0)
+            success_flag = (mapped_state == 'processed')
+
+            employee_id = cv_document.employee_id.id if cv_document.employee_id else None
+            user_id = cv_document.create_uid.id
+
+            # PERFILADO (pre/post) desde N8N
+            profiling_pre = data.get('profiling_pre') or {}
+            profiling_post = data.get('profiling_post') or {}
+
+            # Valores útiles (si quieres guardarlos como campos directos)
+            pdf_pages = None
+            pdf_text_length = None
+            completeness_ratio = None
+
+            if isinstance(profiling_pre, dict):
+                pdf_pages = profiling_pre.get('pdf_pages')
+                pdf_text_length = profiling_pre.get('pdf_text_length')
+                completeness_ratio = profiling_pre.get('completeness_ratio')
+
+            try:
+                completeness_ratio = round(float(completeness_ratio), 2) if completeness_ratio is not None else None
+            except Exception:
+                completeness_ratio = None
+
+            created = None
+            if hasattr(metrics, 'record_import_metric'):
+                created = metrics.record_import_metric(
+                    duration_seconds=duration_seconds,
+                    success=success_flag,
+                    error_msg=None,
+                    employee_id=employee_id,
+                    user_id=user_id,
+                    operation_type='import',
+                
+                    profiling_pre=profiling_pre,
+                    profiling_post=profiling_post,
+                    pdf_pages=pdf_pages,
+                    pdf_text_length=pdf_text_length,
+                    completeness_ratio=completeness_ratio,
+                )
+
+            if created:
+                _logger.info(f"cv.metrics creado id={created.id} para cedula={cedula}")
+            else:
+                _logger.warning(f"cv.metrics no se pudo crear para cedula={cedula}")
+
+        except Exception:
+            _logger.exception("No se pudo grabar métrica de importación desde callback (detallado)")
+
+        fields_updated = 0
+        fields_applied = 0  
+
+        next_dispatched = False
+        batch_stats = None
+        try:
+            # Un callback final (processed/error) libera un hueco en la ventana del lote
+            if (mapped_state in ('processed', 'error')
+                    and previous_state != mapped_state
+                    and cv_document.batch_token):
+                if commit:
+                    self.env.cr.commit()
+                dispatched = cv_document._dispatch_next_in_batch()
+                next_dispatched = bool(dispatched)
+                batch_stats = cv_document._get_batch_stats(cv_document.batch_token)
+        except Exception as e:
+            _logger.warning(f"No se pudo despachar el siguiente del lote: {e}")
+
+        processing_method = data.get('processing_method', 'unknown')
+
+        # 🔔 Notificación al usuario en el frontend
+        try:
+            user = import_user.sudo()
+            if user and user.exists() and user.partner_id:
+
+                # Mensaje base según estado
+                if mapped_state == 'processed':
+                    base_msg = "El CV de %s ha sido procesado correctamente." % (
+                        employee_name or (cv_document.employee_id.name or '')
+                    )
+                elif mapped_state == 'error':
+                    base_msg = "Se produjo un error al procesar el CV de %s." % (
+                        employee_name or (cv_document.employee_id.name or '')
+                    )
+                else:
+                    base_msg = "El CV de %s cambió de estado a: %s" % (
+                        employee_name or (cv_document.employee_id.name or ''),
+                        mapped_state,
+                    )
+
+                mode = 'single'
+                if cv_document.batch_token:
+                    others_count = self.env['cv.document'].sudo().search_count([
+                        ('batch_token', '=', cv_document.batch_token),
+                        ('id', '!=', cv_document.id),
+                    ])
+                    if others_count > 0:
+                        mode = 'batch'
+
+                is_last = True
+                if mode == 'batch':
+                    if batch_stats:
+                        is_last = not (batch_stats['pending'] or batch_stats['in_flight'])
+                    else:
+                        is_last = not next_dispatched
+
+                payload = {
+                    'type': 'cv_importer_done',
+                    'title': 'Importación de CV',
+                    'message': base_msg if mode == 'single' else
+                        ("Lote completado: %s" % (cv_document.batch_token,)
+                         if is_last else base_msg),
+                    'state': mapped_state,
+                    'cv_document_id': cv_document.id,
+                    'mode': mode,                     # 'single' o 'batch'
+                    'batch_token': cv_document.batch_token,
+                    'is_last': is_last,               # True si es el último del lote
+                    'next_dispatched': next_dispatched,
+                }
+                if batch_stats:
+                    payload['batch_stats'] = batch_stats
+
+                self.env['bus.bus']._sendone(
+                    user.partner_id,
+                    'cv_importer_done',
+                    payload
+                )
+                if commit:
+                    self.env.cr.commit()
+                _logger.info(
+                    "🛎 Notificación cv_importer_done enviada a user=%s partner=%s "
+                    "(mode=%s is_last=%s)",
+                    user.id, user.partner_id.id, mode, is_last
+                )
+        except Exception as e:
+            _logger.warning(f"No se pudo enviar notificación por bus.bus: {e}")
+
+        _logger.info(
+            f"🎉 Callback procesado para {employee_name} | "
+            f"estado={mapped_state} (antes={previous_state}) | "
+            f"batch={cv_document.batch_token or '-'} | next={next_dispatched}"
+        )
+
+
+        return {
+            'status': 'success',
+            'message': 'CV processed successfully',
+            'cedula': cedula,
+            'employee_name': employee_name,
+            'fields_updated': fields_updated,
+            'fields_applied_to_employee': fields_applied,
+            'processing_method': processing_method,
+            'auto_apply_enabled': False,
+            'extracted_fields': [],
+            'odoo_state': mapped_state,
+            'next_dispatched': next_dispatched,
+            'job_id': n8n_job_id,
+            'normalized_applied': normalized_applied,
+            'normalized_error': normalized_error,
+            'skipped_unchanged': unchanged,
+        }, 200
+
     def action_reset_to_draft(self):
         count = len(self)
         ICP = self.env['ir.config_parameter'].sudo()
@@ -593,9 +1077,10 @@ class CvDocument(models.Model):
                 'n8n_job_id': False,
                 'n8n_status': False,
                 'n8n_last_callback': False,
+                'applied_fingerprint': False,
                 'batch_token': False,
                 'batch_order': 0,
-
+                'dispatch_attempts': 0,
             })
             key = f'cv_importer.n8n_meta.{record.id}'
             ICP.set_param(key, '')
@@ -620,10 +1105,36 @@ class CvDocument(models.Model):
     # HISTORIAL / VERSIONADO
     # ==========================
 
-    def _serialize_normalized_data(self):
-        """Recolecta datos normalizados en un diccionario simple para historial."""
+    # (modelo, clave en el historial, campos serializados); mismos modelos que se publican
+    _NORMALIZED_MODELS = [
+        ('cv.academic.degree', 'academic_degrees', ['degree_title', 'degree_type', 'institution']),
+        ('cv.work.experience', 'work_experience',
+         ['position', 'company', 'department', 'start_date', 'end_date', 'duration_months', 'responsibilities']),
+        ('cv.project', 'projects', ['project_title', 'project_code', 'project_type', 'institution', 'start_date', 'end_date']),
+        ('cv.publication', 'publications', ['title', 'publication_type', 'publication_year', 'indexing_database']),
+        ('cv.certification', 'certifications', ['certification_name', 'institution', 'duration_hours']),
+        ('cv.logros', 'logros', ['name', 'tipo', 'award_year']),
+        ('cv.language', 'idiomas', ['language_name', 'proficiency_level', 'writing_level', 'speaking_level']),
+        ('cv.materias', 'materias', ['asignatura', 'carrera_id']),
+    ]
+
+    def _load_normalized_rows(self):
+        """Registros activos del empleado por modelo normalizado (una consulta por modelo)."""
+        self.ensure_one()
+        emp_id = self.employee_id.id
+        return {
+            model_name: self.env[model_name].sudo().search_fetch(
+                [('employee_id', '=', emp_id), ('active', '=', True)], fields_list
+            )
+            for model_name, _key, fields_list in self._NORMALIZED_MODELS
+        }
+
+    def _serialize_normalized_data(self, rows=None):
+        """Recolecta datos normalizados en un diccionario simple para historial.
+        `rows` permite reutilizar lo ya cargado con _load_normalized_rows."""
         self.ensure_one()
         emp = self.employee_id
+        rows = rows if rows is not None else self._load_normalized_rows()
         data = {
             'employee_id': emp.id,
             'employee_name': emp.name,
@@ -647,47 +1158,18 @@ class CvDocument(models.Model):
                 res.append(item)
             return res
 
-        data['academic_degrees'] = simple_list(
-            self.env['cv.academic.degree'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['degree_title', 'degree_type', 'institution']
-        )
-        data['work_experience'] = simple_list(
-            self.env['cv.work.experience'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['position', 'company', 'department', 'start_date', 'end_date', 'duration_months', 'responsibilities']
-        )
-        data['projects'] = simple_list(
-            self.env['cv.project'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['project_title', 'project_code', 'project_type', 'institution', 'start_date', 'end_date']
-        )
-        data['publications'] = simple_list(
-            self.env['cv.publication'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['title', 'publication_type', 'publication_year', 'indexing_database']
-        )
-        data['certifications'] = simple_list(
-            self.env['cv.certification'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['certification_name', 'institution', 'duration_hours']
-        )
-        data['logros'] = simple_list(
-            self.env['cv.logros'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['name', 'tipo', 'award_year']
-        )
-        data['idiomas'] = simple_list(
-            self.env['cv.language'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['language_name', 'proficiency_level', 'writing_level', 'speaking_level']
-        )
-        data['materias'] = simple_list(
-            self.env['cv.materias'].sudo().search([('employee_id', '=', emp.id), ('active', '=', True)]),
-            ['asignatura', 'carrera_id']
-        )
+        for model_name, key, fields_list in self._NORMALIZED_MODELS:
+            data[key] = simple_list(rows[model_name], fields_list)
         return data
 
-    def _create_history_snapshot(self, is_published=False, state='draft', coord_comment=False, mark_previous_unpublished=False):
+    def _create_history_snapshot(self, is_published=False, state='draft', coord_comment=False,
+                                 mark_previous_unpublished=False, rows=None):
         """Crea un snapshot en historial sin alterar la lógica existente."""
         self.ensure_one()
         Hist = self.env['cv.document.history'].sudo()
 
         version = 1 + (Hist.search_count([('document_id', '=', self.id)]) or 0)
-        data_json = json.dumps(self._serialize_normalized_data(), ensure_ascii=False)
+        data_json = json.dumps(self._serialize_normalized_data(rows), ensure_ascii=False)
 
         if mark_previous_unpublished:
             Hist.search([('document_id', '=', self.id), ('is_published', '=', True)]).write({'is_published': False})
@@ -706,23 +1188,25 @@ class CvDocument(models.Model):
         })
 
     def _publish_staging_records(self):
-        """Promueve todos los registros is_published=False a True y despublica los actuales."""
+        """Publica los registros staging (is_published=False) del empleado.
+
+        Antes eran dos search+write por modelo (despublicar y volver a publicar) cuyo
+        resultado neto es que todos los registros activos del empleado quedan publicados;
+        ahora es un único UPDATE por modelo sobre (employee_id, is_published) que solo
+        toca los registros staging.
+        """
         self.ensure_one()
         emp_id = self.employee_id.id
-        model_names = [
-            'cv.academic.degree',
-            'cv.work.experience',
-            'cv.project',
-            'cv.publication',
-            'cv.certification',
-            'cv.logros',
-            'cv.language',
-            'cv.materias',
-        ]
-        for model_name in model_names:
+        for model_name, _key, _fields_list in self._NORMALIZED_MODELS:
             Model = self.env[model_name].sudo()
-            Model.search([('employee_id', '=', emp_id), ('is_published', '=', True)]).write({'is_published': False})
-            Model.search([('employee_id', '=', emp_id), ('is_published', '=', False)]).write({'is_published': True})
+            Model.flush_model(['employee_id', 'is_published', 'active'])
+            self.env.cr.execute(
+                f'UPDATE "{Model._table}" '
+                "SET is_published = true, write_uid = %s, write_date = (now() at time zone 'UTC') "
+                "WHERE employee_id = %s AND is_published IS NOT TRUE AND active",
+                (self.env.uid, emp_id),
+            )
+            Model.invalidate_model(['is_published', 'write_uid', 'write_date'])
 
     def write(self, vals):
         # Marcar fecha de cambio de estado si el estado cambia
@@ -820,6 +1304,25 @@ class CvDocument(models.Model):
     # LIMPIEZA Y MAPEO DE DATOS
     # ==========================
 
+    @api.model
+    def _get_raw_extracted_data(self, payload):
+        """raw_extracted_data del payload de N8N (en la raíz o dentro de 'output')."""
+        payload = payload or {}
+        output = payload.get("output")
+        return (
+            payload.get("raw_extracted_data")
+            or (output.get("raw_extracted_data") if isinstance(output, dict) else None)
+            or {}
+        )
+
+    @api.model
+    def _compute_extraction_fingerprint(self, raw_data):
+        """SHA-256 del raw_extracted_data normalizado (claves ordenadas, sin espacios)."""
+        if not raw_data:
+            return False
+        normalized = json.dumps(raw_data, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
     def _clean_raw_data(self, raw_data):
         """Normaliza claves del JSON de N8N a nombres internos en español."""
 
@@ -973,13 +1476,386 @@ class CvDocument(models.Model):
 
         return clean
 
+    # Modelos cv.* que la importación reemplaza (solo filas source='import')
+    IMPORT_MODELS = (
+        'cv.academic.degree',
+        'cv.work.experience',
+        'cv.materias',
+        'cv.certification',
+        'cv.logros',
+        'cv.language',
+        'cv.project',
+        'cv.publication',
+    )
+
+    def _prepare_import_vals(self, cleaned_data, employee, import_user):
+        """
+        Construye en memoria los vals a crear por modelo, sin tocar la BD
+        (salvo lecturas de carrera). Devuelve ({model_name: [vals, ...]}, log_lines).
+        """
+        plan = {model_name: [] for model_name in self.IMPORT_MODELS}
+        log_lines = []
+
+        def _env(model_name):
+            return self.env[model_name].with_user(import_user).sudo()
+
+        # === ACADEMIC DEGREES ===
+        Degree = _env("cv.academic.degree")
+        for d in cleaned_data.get("educacion") or []:
+            degree_title = d.get("degree_title") or d.get("titulo") or ""
+            if not degree_title:
+                continue
+            institution = d.get("institution") or d.get("institucion") or "N/A"
+            degree_type_raw = d.get("degree_type") or d.get("nivel") or ""
+            vals = {
+                "employee_id": employee.id,
+                "degree_type": self._map_degree_type(degree_type_raw),
+                "degree_title": degree_title,
+                "institution": institution,
+                "source": "import",
+            }
+            plan["cv.academic.degree"].append(self._sanitize_nulls_for_model(Degree, vals))
+
+        # === WORK EXPERIENCE ===
+        WorkExp = _env("cv.work.experience")
+        for w in cleaned_data.get("experiencia") or []:
+            position = w.get("position") or w.get("cargo") or ""
+            if not position:
+                continue
+            vals = {
+                "employee_id": employee.id,
+                "position": position,
+                "company": w.get("company") or w.get("institucion") or w.get("empresa") or "N/A",
+                "department": w.get("department") or False,
+                "start_date": self._json_to_date(w.get("start_date") or w.get("fecha_inicio")),
+                "end_date": self._json_to_date(w.get("end_date") or w.get("fecha_fin")),
+                "responsibilities": w.get("responsibilities") or w.get("descripcion") or None,
+                "source": "import",
+            }
+            plan["cv.work.experience"].append(self._sanitize_nulls_for_model(WorkExp, vals))
+
+        # === MATERIAS ===
+        Materias = _env("cv.materias")
+        CarreraModel = _env("carrera")
+
+        carrera_resolver = CarreraModel._get_carrera_resolver()
+
+        # Claves (asignatura, carrera_id) ya ocupadas por filas manuales: UNIQUE(employee_id, asignatura, carrera_id)
+        # (las archivadas también ocupan la clave)
+        taken_keys = {
+            (r["asignatura"], r["carrera_id"] and r["carrera_id"][0])
+            for r in Materias.with_context(active_test=False).search_read(
+                [("employee_id", "=", employee.id), ("source", "!=", "import")],
+                ["asignatura", "carrera_id"],
+            )
+        }
+
+        skipped = 0
+        for m in cleaned_data.get("materias") or []:
+            asignatura = m.get("materia") or m.get("asignatura") or m.get("subject")
+            if not asignatura:
+                continue
+
+            carrera_nombre_raw = (m.get("carrera") or m.get("career") or "").strip()
+            if not carrera_nombre_raw:
+                _logger.warning(f"⚠️ Materia '{asignatura}' sin carrera especificada. Omitida.")
+                skipped += 1
+                continue
+
+            carrera_id, carrera_key, score = carrera_resolver.resolve(carrera_nombre_raw)
+            carrera = CarreraModel.browse(carrera_id) if carrera_id else CarreraModel
+            if carrera and 0.0 < score < 1.0:
+                _logger.info(
+                    "MATCH DIFUSO carrera_key=%r -> id=%s score=%.2f",
+                    carrera_key, carrera.id, score
+                )
+            if not carrera:
+                _logger.warning(
+                    f"⚠️ Carrera '{carrera_nombre_raw}' (normalizada='{carrera_key}') "
+                    f"no encontrada en BD. Materia '{asignatura}' omitida."
+                )
+                skipped += 1
+                continue
+
+            facultad_id = False
+            try:
+                if hasattr(carrera, 'facultad_id') and carrera.facultad_id:
+                    facultad_id = carrera.facultad_id.id
+            except Exception as e:
+                _logger.warning(f"⚠️ Error obteniendo facultad de carrera '{carrera_nombre_raw}': {e}")
+
+            vals = {
+                "employee_id": employee.id,
+                "asignatura": asignatura,
+                "carrera_id": carrera.id,
+                "facultad_id": facultad_id,
+                "course_code": m.get("codigo_materia") or m.get("course_code") or "",
+                "source": "import",
+            }
+            vals = self._sanitize_nulls_for_model(Materias, vals)
+
+            key = (vals["asignatura"], vals["carrera_id"])
+            if key in taken_keys:
+                _logger.info(f"Materia '{asignatura}' duplicada para carrera_id={carrera.id}. Omitida.")
+                skipped += 1
+                continue
+            taken_keys.add(key)
+            plan["cv.materias"].append(vals)
+
+        log_lines.append(f"Materias: {len(plan['cv.materias'])} prepared, {skipped} skipped (no matching career or duplicated)")
+
+        # === CERTIFICATIONS ===
+        Certif = _env("cv.certification")
+        for c in cleaned_data.get("certificaciones") or []:
+            name = c.get("certification_name") or c.get("descripcion") or ""
+            if not name:
+                continue
+            ctype_raw = c.get("certification_type") or c.get("tipo") or ""
+            vals = {
+                "employee_id": employee.id,
+                "certification_type": self._map_certification_type(ctype_raw),
+                "certification_name": name,
+                "institution": c.get("institution") or c.get("institucion") or "N/A",
+                "duration_hours": self._safe_int(c.get("duration_hours"), default=None),
+                "duration_days": self._safe_int(c.get("duration_days"), default=None),
+                "source": "import",
+            }
+            plan["cv.certification"].append(self._sanitize_nulls_for_model(Certif, vals))
+
+        # === LOGROS ===
+        Logro = _env("cv.logros")
+        for lg in cleaned_data.get("logros") or []:
+            desc = lg.get("descripcion") or lg.get("name") or ""
+            if not desc:
+                continue
+            year_raw = lg.get("award_year") or lg.get("year") or ""
+            try:
+                year_int = int(year_raw) if year_raw else None
+            except Exception:
+                year_int = None
+            vals = {
+                "employee_id": employee.id,
+                "tipo": self._map_logro_tipo(lg.get("tipo") or ""),
+                "name": desc,
+                "awarding_institution": lg.get("institucion") or "N/A",
+                "award_year": year_int,
+                "source": "import",
+            }
+            plan["cv.logros"].append(self._sanitize_nulls_for_model(Logro, vals))
+
+        # === LANGUAGES ===
+        Lang = _env("cv.language")
+        # _check_unique_language impide dos filas con el mismo idioma por empleado
+        taken_langs = {
+            (r["language_name"] or "").lower()
+            for r in Lang.search_read(
+                [("employee_id", "=", employee.id), ("source", "!=", "import")],
+                ["language_name"],
+            )
+        }
+        for lng in cleaned_data.get("idiomas") or []:
+            lang_name = lng.get("language_name") or lng.get("idioma") or ""
+            if not lang_name or lang_name.lower() in taken_langs:
+                continue
+            taken_langs.add(lang_name.lower())
+            vals = {
+                "employee_id": employee.id,
+                "language_name": lang_name,
+                "writing_level": self._safe_int(lng.get("writing_level"), default=None),
+                "speaking_level": self._safe_int(lng.get("speaking_level"), default=None),
+                "source": "import",
+            }
+            plan["cv.language"].append(self._sanitize_nulls_for_model(Lang, vals))
+
+        # === PROJECTS ===
+        Project = _env("cv.project")
+        project_types = dict(self.env["cv.project"]._fields["project_type"].selection)
+        for p in cleaned_data.get("proyectos") or []:
+            title = p.get("project_title") or p.get("titulo") or ""
+            if not title:
+                continue
+            p_type = p.get("project_type") or "otro"
+            if p_type not in project_types:
+                p_type = "otro"
+            vals = {
+                "employee_id": employee.id,
+                "project_title": title,
+                "project_code": p.get("project_code") or "",
+                "project_type": p_type,
+                "institution": p.get("institution") or "ESPOCH",
+                "start_date": self._json_to_date(p.get("start_date")),
+                "end_date": self._json_to_date(p.get("end_date")),
+                "source": "import",
+            }
+            plan["cv.project"].append(self._sanitize_nulls_for_model(Project, vals))
+
+        # === PUBLICATIONS ===
+        Pub = _env("cv.publication")
+        for pub in cleaned_data.get("publicaciones") or []:
+            title = pub.get("title") or pub.get("titulo") or ""
+            if not title:
+                continue
+            vals = {
+                "employee_id": employee.id,
+                "publication_type": self._map_publication_type(pub.get("publication_type")),
+                "title": title,
+                "publication_year": self._safe_int(pub.get("publication_year"), default=None),
+                "publication_date": self._json_to_date(pub.get("publication_date")),
+                "is_indexed": bool(pub.get("is_indexed")),
+                "indexing_database": pub.get("indexing_database") or "",
+                "language": self._map_publication_language(pub.get("language")),
+                "source": "import",
+            }
+            plan["cv.publication"].append(self._sanitize_nulls_for_model(Pub, vals))
+
+        return plan, log_lines
+
+    def _is_incremental_apply(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+        return (ICP.get_param('cv_importer.incremental_apply', 'True') or '') == 'True'
+
+    def _import_row_identity(self, Model, vals):
+        """Devuelve (import_key, import_hash) para unos vals de importación.
+
+        import_key: hash de los campos naturales de la fila (Model._import_key_fields),
+        estable aunque cambien el resto de valores. import_hash: hash de todo el contenido.
+        """
+        def _norm(value):
+            if isinstance(value, str):
+                return ' '.join(value.split()).lower()
+            if isinstance(value, (datetime, date)):
+                return value.isoformat()
+            return value
+
+        key_fields = Model._import_key_fields or sorted(vals)
+        key_src = json.dumps([_norm(vals.get(f)) for f in key_fields], ensure_ascii=False, default=str)
+        content_src = json.dumps(
+            {k: v for k, v in vals.items() if k not in ('import_key', 'import_hash')},
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return (
+            hashlib.sha256(key_src.encode('utf-8')).hexdigest(),
+            hashlib.sha256(content_src.encode('utf-8')).hexdigest(),
+        )
+
+    def _apply_import_plan(self, plan, employee, import_user):
+        """Aplica el plan sobre las filas source='import' del empleado.
+
+        Modo incremental (cv_importer.incremental_apply): inserta filas nuevas, actualiza
+        las que cambiaron, archiva las que ya no vienen (o las elimina si el modelo tiene
+        una restricción UNIQUE, ver cv.importable.mixin) y no toca las que son iguales.
+        Modo reemplazo: un unlink y un create([...]) por modelo.
+        """
+        incremental = self._is_incremental_apply()
+        log_lines = []
+        for model_name in self.IMPORT_MODELS:
+            Model = self.env[model_name].with_user(import_user).sudo()
+            vals_list = plan.get(model_name) or []
+            domain = [("employee_id", "=", employee.id), ("source", "=", "import")]
+
+            if not incremental:
+                Model.with_context(active_test=False).search(domain).unlink()
+                if vals_list:
+                    Model.create(vals_list)
+                log_lines.append(f"{Model._description}: {len(vals_list)} records created")
+                continue
+
+            existing = Model.with_context(active_test=False).search(domain)
+            # Filas importadas antes de existir import_key: se reemplazan una única vez
+            legacy = existing.filtered(lambda r: not r.import_key)
+            if legacy:
+                legacy.unlink()
+                existing -= legacy
+
+            by_key = {}
+            for rec in existing:
+                by_key.setdefault(rec.import_key, []).append(rec)
+
+            to_create = []
+            updated = unchanged = 0
+            for vals in vals_list:
+                key, content_hash = self._import_row_identity(Model, vals)
+                vals = dict(vals, import_key=key, import_hash=content_hash)
+                matches = by_key.get(key)
+                if not matches:
+                    to_create.append(vals)
+                    continue
+                rec = matches.pop(0)
+                if rec.import_hash != content_hash or not rec.active:
+                    vals['active'] = True
+                    rec.write(vals)
+                    updated += 1
+                else:
+                    unchanged += 1
+
+            leftovers = Model.browse([rec.id for recs in by_key.values() for rec in recs])
+            if Model._import_unlinks_removed():
+                removed = leftovers
+                removed.unlink()
+                removed_label = "deleted"
+            else:
+                removed = leftovers.filtered('active')
+                removed.write({'active': False})
+                removed_label = "archived"
+            if to_create:
+                Model.create(to_create)
+
+            log_lines.append(
+                f"{Model._description}: {len(to_create)} created, {updated} updated, "
+                f"{len(removed)} {removed_label}, {unchanged} unchanged"
+            )
+        return log_lines
+
+    def _update_yearly_metrics_from_import(self, cleaned_data, employee, import_user):
+        YearMetrics = self.env["cv.yearly.metrics"].with_user(import_user).sudo()
+        current_year = date.today().year
+
+        def _year_of(item, *keys):
+            for key in keys:
+                year_raw = item.get(key)
+                if year_raw:
+                    try:
+                        return int(year_raw)
+                    except Exception:
+                        return None
+            return None
+
+        pubs_year = sum(
+            1 for pub in cleaned_data.get("publicaciones") or []
+            if _year_of(pub, "publication_year") == current_year
+        )
+        logros_year = sum(
+            1 for lg in cleaned_data.get("logros") or []
+            if _year_of(lg, "year", "award_year") == current_year
+        )
+
+        vals_metrics = {
+            "employee_id": employee.id,
+            "year": current_year,
+            "publications_count": pubs_year,
+            "logros_count": logros_year,
+            "computation_method": "semi_automatic",
+        }
+        existing = YearMetrics.search([
+            ("employee_id", "=", employee.id),
+            ("year", "=", current_year),
+        ], limit=1)
+        if existing:
+            existing.write(vals_metrics)
+        else:
+            YearMetrics.create(vals_metrics)
+        return f"Yearly Metrics: updated for {current_year}"
+
     def action_apply_parsed_data(self):
         self.ensure_one()
         if not self.employee_id:
             raise UserError(_('No hay empleado asociado al documento'))
 
+        import time as _time
         employee = self.employee_id
         log_lines = []
+        timings = {}
+        t_start = _time.perf_counter()
 
         try:
             self.parsing_status = "parsing"
@@ -993,6 +1869,7 @@ class CvDocument(models.Model):
                 self.parsing_error = msg
                 return
 
+            t0 = _time.perf_counter()
             try:
                 payload = json.loads(self.extraction_response)
             except Exception as e:
@@ -1002,12 +1879,7 @@ class CvDocument(models.Model):
                 self.parsing_error = msg
                 return
 
-            raw = (
-                payload.get("raw_extracted_data")
-                or payload.get("output", {}).get("raw_extracted_data")
-                or {}
-            )
-            additional = payload.get("additional_fields") or {}
+            raw = self._get_raw_extracted_data(payload)
 
             if not raw:
                 _logger.warning("raw_extracted_data vacío en document %s", self.id)
@@ -1016,400 +1888,42 @@ class CvDocument(models.Model):
                 return
 
             cleaned_data = self._clean_raw_data(raw)
+            timings['parse'] = _time.perf_counter() - t0
 
             import_user = self.create_uid or self.env.user
 
-            Degree       = self.env["cv.academic.degree"].with_user(import_user).sudo()
-            WorkExp      = self.env["cv.work.experience"].with_user(import_user).sudo()
-            Materias     = self.env["cv.materias"].with_user(import_user).sudo()
-            Certif       = self.env["cv.certification"].with_user(import_user).sudo()
-            Logro        = self.env["cv.logros"].with_user(import_user).sudo()
-            Lang         = self.env["cv.language"].with_user(import_user).sudo()
-            Project      = self.env["cv.project"].with_user(import_user).sudo()
-            Pub          = self.env["cv.publication"].with_user(import_user).sudo()
-            YearMetrics  = self.env["cv.yearly.metrics"].with_user(import_user).sudo()
-            CarreraModel = self.env["carrera"].with_user(import_user).sudo()
-
-            # Borrar registros previos SOLO de import
-            Degree.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            WorkExp.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Materias.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Certif.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Logro.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Lang.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Project.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-            Pub.search([("employee_id", "=", employee.id), ("source", "=", "import")]).unlink()
-
-            # === ACADEMIC DEGREES ===
-            edu_list = cleaned_data.get("educacion") or []
-            created = 0
-            for d in edu_list:
-                degree_title = d.get("degree_title") or d.get("titulo") or ""
-                if not degree_title:
-                    continue
-                institution = d.get("institution") or d.get("institucion") or "N/A"
-                degree_type_raw = d.get("degree_type") or d.get("nivel") or ""
-                mapped_type = self._map_degree_type(degree_type_raw)
-                vals = {
-                    "employee_id": employee.id,
-                    "degree_type": mapped_type,
-                    "degree_title": degree_title,
-                    "institution": institution,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Degree, vals)
-                Degree.create(vals)
-                created += 1
-            log_lines.append(f"Academic Degrees: {created} records created")
-
-            # === WORK EXPERIENCE ===
-            work_list = cleaned_data.get("experiencia") or []
-            created = 0
-            for w in work_list:
-                position = w.get("position") or w.get("cargo") or ""
-                if not position:
-                    continue
-                company = w.get("company") or w.get("institucion") or w.get("empresa") or "N/A"
-                department = w.get("department")
-                start_date = self._json_to_date(w.get("start_date") or w.get("fecha_inicio"))
-                end_date = self._json_to_date(w.get("end_date") or w.get("fecha_fin"))
-                responsibilities = w.get("responsibilities") or w.get("descripcion") or None
-                vals = {
-                    "employee_id": employee.id,
-                    "position": position,
-                    "company": company,
-                    "department": department or False,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "responsibilities": responsibilities,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(WorkExp, vals)
-                WorkExp.create(vals)
-                created += 1
-            log_lines.append(f"Work Experience: {created} records created")
-
-            # === MATERIAS ===
-            materias_list = cleaned_data.get("materias") or []
-
-            created = 0
-            skipped = 0
-            Materias = self.env["cv.materias"].with_user(import_user).sudo()
-            CarreraModel = self.env["carrera"].with_user(import_user).sudo()
-
-            carrera_index = {}
-            all_carreras = CarreraModel.search([])
-            for c in all_carreras:
-                key = self._normalize_text(c.name)
-                carrera_index[key] = c
-            
-
-            for m in materias_list:
-                asignatura = m.get("materia") or m.get("asignatura") or m.get("subject")
-                if not asignatura:
-                    continue
-
-                carrera_id = False
-                facultad_id = False
-                carrera_nombre_raw = (m.get("carrera") or m.get("career") or "").strip()
-
-                if carrera_nombre_raw:
-                    carrera_clean = self._clean_carrera_label(carrera_nombre_raw)
-                    carrera_key = self._normalize_text(carrera_clean)
-
-                    carrera = self._find_best_carrera(carrera_index, carrera_key)
-
-                    if not carrera:
-                        carrera = CarreraModel.search(
-                            [("name", "ilike", carrera_key)],
-                            limit=1
-                        )
-
-                    if carrera and carrera.exists():
-                        carrera_id = carrera.id
-
-                        # Obtener facultad desde la carrera (si existe el campo)
-                        try:
-                            if (
-                                hasattr(carrera, 'facultad_id')
-                                and carrera.facultad_id
-                                and carrera.facultad_id.exists()):
-                                facultad_id = carrera.facultad_id.id
-                        except Exception as e:
-                            _logger.warning(
-                                f"⚠️ Error obteniendo facultad de carrera '{carrera_nombre_raw}': {e}"
-                            )
-
-                    else:
-                        _logger.warning(
-                            f"⚠️ Carrera '{carrera_nombre_raw}' (normalizada='{carrera_key}') "
-                            f"no encontrada en BD. Materia '{asignatura}' omitida."
-                        )
-                        skipped += 1
-                        continue
-                else:
-                    _logger.warning(
-                        f"⚠️ Materia '{asignatura}' sin carrera especificada. Omitida."
-                    )
-                    skipped += 1
-                    continue
-                
-                # ✅ VALIDAR QUE TENGAMOS CARRERA VÁLIDA ANTES DE CREAR
-                if not carrera_id or not isinstance(carrera_id, int):
-                    _logger.warning(
-                        f"⚠️ No se pudo vincular materia '{asignatura}' a carrera existente. Omitida."
-                    )
-                    skipped += 1
-                    continue
-                
-                # ✅ CREAR MATERIA CON VALIDACIONES ROBUSTAS
-                vals = {
-                    "employee_id": employee.id,
-                    "asignatura": asignatura,
-                    "carrera_id": carrera_id,  # ✅ SIEMPRE UN ID VÁLIDO
-                    "facultad_id": facultad_id or False,
-                    "course_code": m.get("codigo_materia") or m.get("course_code") or "",
-                    "source": "import",
-                }
-                
-                # Sanitizar valores
-                vals = self._sanitize_nulls_for_model(Materias, vals)
-                
-                # ✅ VALIDACIÓN FINAL DE TIPOS
-                if not vals.get('carrera_id'):
-                    _logger.warning(
-                        f"⚠️ Sin carrera_id válido - Omitiendo materia '{asignatura}'"
-                    )
-                    skipped += 1
-                    continue
-                    
-                try:
-                    carrera_check = CarreraModel.browse(vals['carrera_id'])
-                    if not carrera_check.exists():
-                        _logger.error(
-                            f"⛔ Carrera ID {vals['carrera_id']} NO EXISTE en BD - "
-                            f"Omitiendo materia '{asignatura}'"
-                        )
-                        skipped += 1
-                        continue
-                except Exception as e:
-                    _logger.error(f"Error verificando carrera_id={vals['carrera_id']}: {e}")
-                    skipped += 1
-                    continue
-
-                try:
-                    Materias.create(vals)
-                    created += 1
-                    _logger.info(f"Materia '{asignatura}' creada con carrera_id={vals['carrera_id']}")
-                except Exception as e:
-                    _logger.error(f"Error creando materia '{asignatura}': {e}")
-                    skipped += 1
-                    continue
-                    
-            log_lines.append(f"Materias: {created} created, {skipped} skipped (no matching career)")
+            t0 = _time.perf_counter()
+            plan, prepare_lines = self._prepare_import_vals(cleaned_data, employee, import_user)
+            log_lines += prepare_lines
+            timings['prepare'] = _time.perf_counter() - t0
 
-
-            # === CERTIFICATIONS ===
-            cert_list = cleaned_data.get("certificaciones") or []
-            created = 0
-            for c in cert_list:
-                name = c.get("certification_name") or c.get("descripcion") or ""
-                if not name:
-                    continue
-                inst = c.get("institution") or c.get("institucion") or "N/A"
-                ctype_raw = c.get("certification_type") or c.get("tipo") or ""
-                mapped_type = self._map_certification_type(ctype_raw)
-                hours = self._safe_int(c.get("duration_hours"), default=None)
-                days = self._safe_int(c.get("duration_days"), default=None)
-                vals = {
-                    "employee_id": employee.id,
-                    "certification_type": mapped_type,
-                    "certification_name": name,
-                    "institution": inst,
-                    "duration_hours": hours,
-                    "duration_days": days,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Certif, vals)
-                Certif.create(vals)
-                created += 1
-            log_lines.append(f"Certifications: {created} records created")
-
-            # === LOGROS ===
-            logros_list = cleaned_data.get("logros") or []
-            created = 0
-            for lg in logros_list:
-                desc = lg.get("descripcion") or lg.get("name") or ""
-                if not desc:
-                    continue
-                tipo_raw = lg.get("tipo") or ""
-                mapped_tipo = self._map_logro_tipo(tipo_raw)
-                year_raw = lg.get("award_year") or lg.get("year") or ""
-                year_int = None
-                try:
-                    year_int = int(year_raw) if year_raw else None
-                except Exception:
-                    year_int = None
-                vals = {
-                    "employee_id": employee.id,
-                    "tipo": mapped_tipo,
-                    "name": desc,
-                    "awarding_institution": lg.get("institucion") or "N/A",
-                    "award_year": year_int,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Logro, vals)
-                Logro.create(vals)
-                created += 1
-            log_lines.append(f"Logros: {created} records created")
-
-            # === LANGUAGES ===
-            lang_list = cleaned_data.get("idiomas") or []
-            created = 0
-            for lng in lang_list:
-                lang_name = lng.get("language_name") or lng.get("idioma") or ""
-                if not lang_name:
-                    continue
-                w = self._safe_int(lng.get("writing_level"), default=None)
-                s = self._safe_int(lng.get("speaking_level"), default=None)
-                vals = {
-                    "employee_id": employee.id,
-                    "language_name": lang_name,
-                    "writing_level": w,
-                    "speaking_level": s,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Lang, vals)
-                Lang.create(vals)
-                created += 1
-            log_lines.append(f"Languages: {created} records created")
-
-            # === PROJECTS ===
-            proj_list = cleaned_data.get("proyectos") or []
-            created = 0
-            for p in proj_list:
-                title = p.get("project_title") or p.get("titulo") or ""
-                if not title:
-                    continue
-                p_type = p.get("project_type") or "otro"
-                selection_dict = dict(self.env["cv.project"]._fields["project_type"].selection)
-                if p_type not in selection_dict:
-                    p_type = "otro"
-                vals = {
-                    "employee_id": employee.id,
-                    "project_title": title,
-                    "project_code": p.get("project_code") or "",
-                    "project_type": p_type,
-                    "institution": p.get("institution") or "ESPOCH",
-                    "start_date": self._json_to_date(p.get("start_date")),
-                    "end_date": self._json_to_date(p.get("end_date")),
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Project, vals)
-                Project.create(vals)
-                created += 1
-            log_lines.append(f"Projects: {created} records created")
-
-            # === PUBLICATIONS ===
-            pubs_list = cleaned_data.get("publicaciones") or []
-            created = 0
-            for pub in pubs_list:
-                title = pub.get("title") or pub.get("titulo") or ""
-                if not title:
-                    continue
-                ptype = self._map_publication_type(pub.get("publication_type"))
-                year_int = self._safe_int(pub.get("publication_year"), default=None)
-                pub_date = self._json_to_date(pub.get("publication_date"))
-                is_indexed = bool(pub.get("is_indexed"))
-                index_db = pub.get("indexing_database") or ""
-                lang_sel = self._map_publication_language(pub.get("language"))
-                vals = {
-                    "employee_id": employee.id,
-                    "publication_type": ptype,
-                    "title": title,
-                    "publication_year": year_int,
-                    "publication_date": pub_date,
-                    "is_indexed": is_indexed,
-                    "indexing_database": index_db,
-                    "language": lang_sel,
-                    "source": "import",
-                }
-                vals = self._sanitize_nulls_for_model(Pub, vals)
-                Pub.create(vals)
-                created += 1
-            log_lines.append(f"Publications: {created} records created")
+            # Reemplazo atómico: si falla un modelo no quedan filas a medio importar
+            t0 = _time.perf_counter()
+            with self.env.cr.savepoint():
+                log_lines += self._apply_import_plan(plan, employee, import_user)
+            timings['write'] = _time.perf_counter() - t0
 
             # === YEARLY METRICS ===
+            t0 = _time.perf_counter()
             try:
-                current_year = date.today().year
-
-                # --- PUBLICACIONES DEL AÑO ---
-                pubs_year = 0
-                for pub in pubs_list:
-                    year_raw = pub.get("publication_year")
-                    try:
-                        year_int = int(year_raw) if year_raw else None
-                    except:
-                        year_int = None
-
-                    if year_int == current_year:
-                        pubs_year += 1
-
-                # --- LOGROS DEL AÑO ---
-                logros_year = 0
-                for lg in logros_list:
-                    year_raw = lg.get("year") or lg.get("award_year")
-                    try:
-                        year_int = int(year_raw) if year_raw else None
-                    except:
-                        year_int = None
-
-                    if year_int == current_year:
-                        logros_year += 1
-
-                # --- HORAS DE CERTIFICACIONES DEL AÑO (OPCIONAL) ---
-                cert_hours_year = 0
-                for c in cert_list:
-                    year_raw = c.get("year") or c.get("cert_year")
-                    try:
-                        year_int = int(year_raw) if year_raw else None
-                    except:
-                        year_int = None
-
-                    if year_int == current_year:
-                        cert_hours_year += self._safe_int(c.get("duration_hours"), default=0)
-
-                existing = YearMetrics.search([
-                    ("employee_id", "=", employee.id),
-                    ("year", "=", current_year),
-                ], limit=1)
-
-                vals_metrics = {
-                    "employee_id": employee.id,
-                    "year": current_year,
-                    "publications_count": pubs_year,
-                    "logros_count": logros_year,
-                    "computation_method": "semi_automatic",
-                }
-
-                if existing:
-                    existing.write(vals_metrics)
-                else:
-                    YearMetrics.create(vals_metrics)
-
-                log_lines.append(f"Yearly Metrics: updated for {current_year}")
-
+                with self.env.cr.savepoint():
+                    log_lines.append(self._update_yearly_metrics_from_import(cleaned_data, employee, import_user))
             except Exception as e:
                 _logger.warning(
                     "No se pudieron calcular Yearly Metrics para empleado %s: %s",
                     employee.id, e
                 )
+            timings['yearly_metrics'] = _time.perf_counter() - t0
 
             # Finalizar status
-            self.parsing_status = "applied"
-            self.parsing_error = False
-            self.applied_date = fields.Datetime.now()
-            self.normalized_processing_date = fields.Datetime.now()
+            now = fields.Datetime.now()
+            self.write({
+                'parsing_status': "applied",
+                'parsing_error': False,
+                'applied_date': now,
+                'normalized_processing_date': now,
+                'applied_fingerprint': self._compute_extraction_fingerprint(raw),
+            })
 
             _logger.info(
                 "FASE 8 completada para CvDocument %s / empleado %s",
@@ -1424,11 +1938,23 @@ class CvDocument(models.Model):
             _logger.error(f"Traceback: {traceback.format_exc()}")
             return
 
-        # Al final del try principal, justo antes del _logger.info("FASE 8 completada ...")
+        total = _time.perf_counter() - t_start
+        self.env['cv.metrics'].sudo().record_import_metric(
+            operation_type='parse',
+            success=True,
+            duration_seconds=total,
+            employee_id=employee.id,
+            user_id=import_user.id,
+            phase_timings={k: round(v, 4) for k, v in timings.items()},
+            records_count=sum(len(v) for v in plan.values()),
+        )
+
         for line in log_lines:
             _logger.info("FASE 8 SUMMARY - %s", line)
-
-
+        _logger.info(
+            "FASE 8 TIMINGS - total=%.3fs %s",
+            total, " ".join(f"{k}={v:.3f}s" for k, v in timings.items())
+        )
 
 
     # ==========================
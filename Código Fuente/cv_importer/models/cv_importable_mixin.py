@@ -0,0 +1,39 @@
+from odoo import models, fields, tools
+
+
+class CvImportableMixin(models.AbstractModel):
+    """Campos y utilidades comunes de las colecciones cv.* que se importan desde el CV.
+
+    Cada modelo solo declara `_import_key_fields`: los campos naturales que identifican
+    una fila importada entre reimportaciones (ver cv.document._apply_import_plan).
+    """
+    _name = "cv.importable.mixin"
+    _description = "Colección CV importable"
+
+    _import_key_fields = []
+
+    import_key = fields.Char(
+        string="Import Key",
+        index=True,
+        copy=False,
+        help="Stable identity of an imported row (hash of its natural key fields)"
+    )
+
+    import_hash = fields.Char(
+        string="Import Hash",
+        copy=False,
+        help="Content hash of the imported values, used to skip unchanged rows on re-import"
+    )
+
+    def _import_unlinks_removed(self):
+        """Las filas importadas que desaparecen se eliminan en vez de archivarse si el
+        modelo tiene una restricción UNIQUE: archivadas seguirían ocupando la clave."""
+        return any('unique' in definition.lower() for _name, definition, _msg in self._sql_constraints)
+
+    def init(self):
+        # Cambio staging -> publicado por empleado (cv.document._publish_staging_records)
+        if self._abstract:
+            return
+        tools.create_index(
+            self._cr, f'{self._table}_employee_published_idx', self._table, ['employee_id', 'is_published']
+        )
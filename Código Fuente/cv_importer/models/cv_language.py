@@ -4,7 +4,10 @@ from odoo.exceptions import ValidationError
 
 class CvLanguage(models.Model):
     _name = "cv.language"
+    _inherit = "cv.importable.mixin"
     _description = "Language Proficiency"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['language_name']
     _order = "proficiency_level desc, language_name"
     _rec_name = "language_name"
 
@@ -125,19 +128,22 @@ class CvLanguage(models.Model):
     # =========================
     # Overrides create / write
     # =========================
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_nulls_to_dummy(dict(vals))
+    @api.model_create_multi
+    def create(self, vals_list):
+        normalized = []
+        for vals in vals_list:
+            vals = self._normalize_nulls_to_dummy(dict(vals))
 
-        # Si no viene proficiency_level, lo calculamos a partir de los % (útil para import)
-        if not vals.get("proficiency_level"):
-            w = vals.get("writing_level")
-            s = vals.get("speaking_level")
-            guessed = self._guess_proficiency_from_percentages(w, s)
-            if guessed:
-                vals["proficiency_level"] = guessed
+            # Si no viene proficiency_level, lo calculamos a partir de los % (útil para import)
+            if not vals.get("proficiency_level"):
+                w = vals.get("writing_level")
+                s = vals.get("speaking_level")
+                guessed = self._guess_proficiency_from_percentages(w, s)
+                if guessed:
+                    vals["proficiency_level"] = guessed
+            normalized.append(vals)
 
-        return super().create(vals)
+        return super().create(normalized)
 
     def write(self, vals):
         vals = self._normalize_nulls_to_dummy(dict(vals))
@@ -5,7 +5,10 @@ from datetime import date
 
 class CvLogros(models.Model):
     _name = "cv.logros"
+    _inherit = "cv.importable.mixin"
     _description = "Distinction / Award / Recognition"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['name', 'award_year']
     _order = "name desc"
     _rec_name = "name"
 
@@ -99,10 +102,10 @@ class CvLogros(models.Model):
 
         return vals
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_nulls_to_dummy(dict(vals))
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_nulls_to_dummy(dict(vals)) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_nulls_to_dummy(dict(vals))
@@ -7,7 +7,10 @@ _logger = logging.getLogger(__name__)
 
 class CvMaterias(models.Model):
     _name = "cv.materias"
+    _inherit = "cv.importable.mixin"
     _description = "Materias"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['asignatura', 'carrera_id']
     _order = "carrera_id, asignatura"
 
     active = fields.Boolean(
@@ -111,10 +114,10 @@ class CvMaterias(models.Model):
 
         return vals
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_nulls_for_manual(dict(vals))
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_nulls_for_manual(dict(vals)) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_nulls_for_manual(dict(vals))
@@ -15,6 +15,8 @@ class CvMetrics(models.Model):
         ('import', 'Import CV'),
         ('parse', 'Parse CV'),
         ('validate', 'Validate CV'),
+        ('batch', 'Batch CV'),
+        ('skipped_unchanged', 'Skipped (unchanged)'),
         ('error', 'Error')
     ], required=True)
     
@@ -36,6 +38,15 @@ class CvMetrics(models.Model):
     
     completeness_ratio = fields.Float('Radio de Completitud', digits=(4, 2))
 
+    # Descarga masiva (operation_type='batch')
+    batch_token = fields.Char('Token de Lote', index=True)
+    batch_size = fields.Integer('Documentos en Lote')
+    throughput_per_minute = fields.Float('Throughput (docs/min)', digits=(10, 2))
+
+    # Aplicación de datos parseados (operation_type='parse')
+    phase_timings_json = fields.Text('Tiempos por Fase (JSON)')
+    records_count = fields.Integer('Registros Aplicados')
+
     @api.model
     def record_import_metric(
         self,
@@ -51,7 +62,12 @@ class CvMetrics(models.Model):
         pdf_pages=None,
         pdf_text_length=None,
         completeness_ratio=None,
-
+        error_count=None,
+        batch_token=None,
+        batch_size=None,
+        throughput_per_minute=None,
+        phase_timings=None,
+        records_count=None,
     ):
         """
         Helper para crear un registro de métricas desde el callback/subida.
@@ -85,6 +101,23 @@ class CvMetrics(models.Model):
             if 'completeness_ratio' in self._fields and completeness_ratio is not None:
                 vals['completeness_ratio'] = float(completeness_ratio)
 
+            if 'error_count' in self._fields and error_count is not None:
+                vals['error_count'] = int(error_count)
+
+            if 'batch_token' in self._fields and batch_token:
+                vals['batch_token'] = batch_token
+
+            if 'batch_size' in self._fields and batch_size is not None:
+                vals['batch_size'] = int(batch_size)
+
+            if 'throughput_per_minute' in self._fields and throughput_per_minute is not None:
+                vals['throughput_per_minute'] = float(throughput_per_minute)
+
+            if 'phase_timings_json' in self._fields and phase_timings:
+                vals['phase_timings_json'] = pyjson.dumps(phase_timings, ensure_ascii=False)
+
+            if 'records_count' in self._fields and records_count is not None:
+                vals['records_count'] = int(records_count)
 
 
             computed_duration = None
@@ -164,11 +197,15 @@ class CvMetrics(models.Model):
         # Métricas de errores
         error_metrics = metrics.filtered(lambda m: m.operation_type == 'error')
         error_rate = (len(error_metrics) / len(metrics)) * 100 if metrics else 0
+
+        # Callbacks cuya extracción era idéntica a la ya aplicada
+        skipped_metrics = metrics.filtered(lambda m: m.operation_type == 'skipped_unchanged')
         
         return {
             'total_operations': len(metrics),
             'avg_import_time': round(avg_import_time, 2),
             'error_rate': round(error_rate, 2),
             'total_errors': len(error_metrics),
+            'skipped_unchanged': len(skipped_metrics),
             'period_days': days
         }
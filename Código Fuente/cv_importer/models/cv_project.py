@@ -6,7 +6,10 @@ from dateutil.relativedelta import relativedelta
 
 class CvProject(models.Model):
     _name = "cv.project"
+    _inherit = "cv.importable.mixin"
     _description = "Research / Development Project"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['project_title', 'project_code']
     _order = "project_title"
     _rec_name = "project_title"
 
@@ -131,10 +134,10 @@ class CvProject(models.Model):
 
         return vals
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_dates_for_source(dict(vals))
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_dates_for_source(dict(vals)) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_dates_for_source(dict(vals))
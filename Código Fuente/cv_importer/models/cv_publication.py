@@ -5,7 +5,10 @@ from datetime import date
 
 class CvPublication(models.Model):
     _name = "cv.publication"
+    _inherit = "cv.importable.mixin"
     _description = "Scientific Publication"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['title', 'publication_year']
     _order = "publication_year desc, title"
     _rec_name = "title"
 
@@ -130,10 +133,10 @@ class CvPublication(models.Model):
 
         return vals
 
-    @api.model
-    def create(self, vals):
-        vals = self._normalize_nulls_to_dummy(dict(vals))
-        return super().create(vals)
+    @api.model_create_multi
+    def create(self, vals_list):
+        vals_list = [self._normalize_nulls_to_dummy(dict(vals)) for vals in vals_list]
+        return super().create(vals_list)
 
     def write(self, vals):
         vals = self._normalize_nulls_to_dummy(dict(vals))
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+import logging
+import time
+
+from ..config_constants import (
+    CV_CALLBACK_RATE_MAX_REQUESTS,
+    CV_CALLBACK_RATE_WINDOW,
+    CV_CALLBACK_RATE_BLOCK_TIME,
+)
+
+_logger = logging.getLogger(__name__)
+
+
+class CvRateLimit(models.Model):
+    """Token bucket por clave (IP) compartido entre todos los workers de Odoo."""
+    _name = 'cv.rate.limit'
+    _description = 'Rate limit de callbacks CV'
+    _log_access = False
+
+    key = fields.Char(string='Clave', required=True)
+    tokens = fields.Float(string='Tokens disponibles', default=0.0)
+    last_refill = fields.Float(string='Última recarga (epoch)', default=0.0)
+    blocked_until = fields.Float(string='Bloqueado hasta (epoch)', default=0.0, index=True)
+
+    _sql_constraints = [
+        ('key_unique', 'unique(key)', 'La clave de rate limit debe ser única.'),
+    ]
+
+    @api.model
+    def _get_limits(self):
+        ICP = self.env['ir.config_parameter'].sudo()
+
+        def _int_param(name, default):
+            try:
+                return max(int(ICP.get_param(name) or default), 1)
+            except (TypeError, ValueError):
+                return default
+
+        return (
+            _int_param('cv_importer.callback_rate_max_requests', CV_CALLBACK_RATE_MAX_REQUESTS),
+            _int_param('cv_importer.callback_rate_window', CV_CALLBACK_RATE_WINDOW),
+            _int_param('cv_importer.callback_rate_block_time', CV_CALLBACK_RATE_BLOCK_TIME),
+        )
+
+    @api.model
+    def check_rate_limit(self, key):
+        """Consume un token para `key`.
+
+        Devuelve 'ok', 'limited' (se acaba de exceder el límite y se bloquea la clave)
+        o 'blocked' (la clave sigue bloqueada). Se ejecuta en un cursor propio y corto
+        para que el bloqueo de la fila no dure lo que dura el callback.
+        """
+        if not key:
+            return 'ok'
+        capacity, window, block_time = self._get_limits()
+        rate = float(capacity) / float(window)
+        now = time.time()
+
+        with self.env.registry.cursor() as cr:
+            cr.execute("""
+                INSERT INTO cv_rate_limit (key, tokens, last_refill, blocked_until)
+                VALUES (%(key)s, %(capacity)s - 1, %(now)s, 0)
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = CASE
+                        WHEN cv_rate_limit.blocked_until > %(now)s THEN cv_rate_limit.tokens
+                        ELSE LEAST(
+                            %(capacity)s,
+                            cv_rate_limit.tokens + (%(now)s - cv_rate_limit.last_refill) * %(rate)s
+                        ) - 1
+                    END,
+                    last_refill = %(now)s
+                RETURNING tokens, blocked_until
+            """, {'key': key, 'capacity': capacity, 'now': now, 'rate': rate})
+            tokens, blocked_until = cr.fetchone()
+
+            if blocked_until and blocked_until > now:
+                return 'blocked'
+            if tokens < 0:
+                cr.execute(
+                    "UPDATE cv_rate_limit SET blocked_until = %s, tokens = 0 WHERE key = %s",
+                    (now + block_time, key),
+                )
+                return 'limited'
+        return 'ok'
+
+    @api.model
+    def cron_evict_rate_limits(self):
+        """Elimina claves sin actividad y sin bloqueo vigente."""
+        _capacity, window, block_time = self._get_limits()
+        now = time.time()
+        self.env.cr.execute(
+            "DELETE FROM cv_rate_limit WHERE last_refill < %s AND blocked_until < %s",
+            (now - max(window, block_time), now),
+        )
+        if self.env.cr.rowcount:
+            _logger.info("cv.rate.limit: %s claves expiradas eliminadas", self.env.cr.rowcount)
+        return True
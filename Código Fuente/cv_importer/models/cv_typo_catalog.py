@@ -1,6 +1,24 @@
 from odoo import models, fields, api
 from datetime import datetime
-import re
+import logging
+
+from ..config_constants import (
+    CV_TYPO_CATALOG_MIN_TOTAL,
+    CV_TYPO_PATTERN_MIN_LENGTH,
+    CV_TYPO_MAX_DISTANCE,
+)
+from ..typo_matcher import (
+    SEED_TYPO_PATTERNS,
+    SEED_VOCABULARY,
+    TypoMatcher,
+    collect_texts,
+    vocabulary_from_texts,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Matcher compilado por base de datos: {dbname: (firma, TypoMatcher)}
+_MATCHER_CACHE = {}
 
 class CvTypoCatalog(models.Model):
     _name = "cv.typo.catalog"
@@ -20,77 +38,107 @@ class CvTypoCatalog(models.Model):
 
     @api.model
     def upsert_typo(self, typo, cedula=None, sample=None):
-        typo = (typo or "").strip().lower()
-        if not typo:
-            return False
-        rec = self.search([("typo", "=", typo)], limit=1)
-        now = fields.Datetime.now()
-        if rec:
-            rec.write({
-                "total": rec.total + 1,
-                "last_seen": now,
-                "last_cedula": cedula or rec.last_cedula,
-                "sample": sample or rec.sample,
-            })
-        else:
-            self.create({
-                "typo": typo,
-                "total": 1,
-                "last_seen": now,
-                "last_cedula": cedula,
-                "sample": sample,
-            })
-        return True
+        return bool(self.upsert_typos([typo], cedula=cedula, samples={typo: sample} if sample else None))
 
     @api.model
-    def extract_candidates(self, raw_extracted_data):
+    def upsert_typos(self, words, cedula=None, samples=None):
         """
-        Heurística ligera (NO IA) para detectar candidatos a typo en campos manuales.
+        Suma las apariciones de `words` al catálogo en una sola sentencia
+        (INSERT ... ON CONFLICT DO UPDATE), atómica frente a callbacks concurrentes.
+        `samples` es opcional: {palabra: ejemplo}; por defecto la propia palabra.
+        Devuelve el número de typos distintos afectados.
         """
-        x = raw_extracted_data or {}
-        texts = []
-
-        # Campos manuales típicos
-        for c in x.get("certifications", []):
-            texts += [c.get("certification_name"), c.get("institution")]
-        for l in x.get("logros", []):
-            texts += [l.get("descripcion")]
-        for m in x.get("materias", []):
-            texts += [m.get("asignatura"), m.get("carrera")]
-        for d in x.get("academic_degrees", []):
-            texts += [d.get("degree_title"), d.get("institution")]
-
-        blob = " ".join([t for t in texts if t])
-        tokens = re.findall(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{3,}", blob)
-
-        # patrones comunes (puedes ir ampliando con tu evidencia)
-        patterns = [
-            r"confrence", r"hardenning", r"avanado", r"aprobacion",
-            r"tecnologias", r"investigacion", r"pequenas"
-        ]
-
-        candidates = []
-        for tok in tokens:
-            t = tok.lower()
-            if len(t) >= 24:
-                candidates.append(tok)
-                continue
-            if re.search(r"([a-záéíóúñ])\1\1", t):
-                candidates.append(tok)
-                continue
-            if any(re.search(p, t) for p in patterns):
-                candidates.append(tok)
+        samples = samples or {}
+        counts = {}
+        sample_by_typo = {}
+        for word in words or []:
+            typo = (word or "").strip().lower()
+            if not typo:
                 continue
+            counts[typo] = counts.get(typo, 0) + 1
+            sample_by_typo.setdefault(typo, samples.get(word) or word)
+        if not counts:
+            return 0
 
-        # devuelve únicos (máx 30 para no cargar)
-        uniq = []
-        seen = set()
-        for c in candidates:
-            k = c.lower()
-            if k in seen:
-                continue
-            seen.add(k)
-            uniq.append(c)
-            if len(uniq) >= 30:
-                break
-        return uniq
\ No newline at end of file
+        # Orden estable: dos callbacks con typos en común bloquean las filas en el mismo orden
+        typos = sorted(counts)
+        self.env.cr.execute("""
+            INSERT INTO cv_typo_catalog
+                (typo, total, last_seen, last_cedula, sample, create_uid, create_date, write_uid, write_date)
+            SELECT t.typo, t.n, %(now)s, %(cedula)s, t.sample, %(uid)s, %(now)s, %(uid)s, %(now)s
+              FROM unnest(%(typos)s::varchar[], %(counts)s::int[], %(samples)s::varchar[]) AS t(typo, n, sample)
+            ON CONFLICT (typo) DO UPDATE SET
+                total = cv_typo_catalog.total + EXCLUDED.total,
+                last_seen = EXCLUDED.last_seen,
+                last_cedula = COALESCE(EXCLUDED.last_cedula, cv_typo_catalog.last_cedula),
+                sample = COALESCE(EXCLUDED.sample, cv_typo_catalog.sample),
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, {
+            "now": fields.Datetime.now(),
+            "cedula": cedula or None,
+            "uid": self.env.uid,
+            "typos": typos,
+            "counts": [counts[t] for t in typos],
+            "samples": [sample_by_typo[t] for t in typos],
+        })
+        self.invalidate_model(["total", "last_seen", "last_cedula", "sample"])
+        return len(typos)
+
+    @api.model
+    def _get_typo_matcher(self):
+        """
+        Matcher precompilado con los patrones semilla y los typos frecuentes del catálogo.
+        Se reconstruye solo cuando cambia el conjunto de typos (o el vocabulario, si la
+        comprobación de distancia está activa); la firma cuesta una consulta.
+        """
+        ICP = self.env["ir.config_parameter"].sudo()
+        try:
+            max_distance = max(int(ICP.get_param("cv_importer.typo_max_distance") or CV_TYPO_MAX_DISTANCE), 0)
+        except (TypeError, ValueError):
+            max_distance = CV_TYPO_MAX_DISTANCE
+
+        params = {"min_total": CV_TYPO_CATALOG_MIN_TOTAL, "min_len": CV_TYPO_PATTERN_MIN_LENGTH}
+        vocab_sql = ", NULL, NULL"
+        if max_distance:
+            vocab_sql = """,
+                   (SELECT count(*) || ':' || coalesce(max(write_date)::text, '') FROM carrera),
+                   (SELECT count(*) || ':' || coalesce(max(write_date)::text, '') FROM facultad)"""
+        self.env.cr.execute("""
+            SELECT count(*), coalesce(sum(id), 0)""" + vocab_sql + """
+              FROM cv_typo_catalog
+             WHERE total >= %(min_total)s AND length(typo) >= %(min_len)s
+        """, params)
+        signature = (self.env.cr.fetchone(), max_distance)
+
+        cached = _MATCHER_CACHE.get(self.env.cr.dbname)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        self.env.cr.execute("""
+            SELECT typo FROM cv_typo_catalog
+             WHERE total >= %(min_total)s AND length(typo) >= %(min_len)s
+        """, params)
+        patterns = list(SEED_TYPO_PATTERNS) + [row[0] for row in self.env.cr.fetchall()]
+
+        vocabulary = None
+        if max_distance:
+            names = self.env["carrera"].sudo().search([]).mapped("name")
+            names += self.env["facultad"].sudo().search([]).mapped("name")
+            vocabulary = vocabulary_from_texts(list(SEED_VOCABULARY) + names)
+
+        matcher = TypoMatcher(patterns, vocabulary=vocabulary, max_distance=max_distance)
+        _MATCHER_CACHE[self.env.cr.dbname] = (signature, matcher)
+        _logger.info(
+            "Matcher de typos reconstruido: %s patrones, vocabulario=%s, distancia=%s",
+            matcher.pattern_count, len(vocabulary or ()), max_distance
+        )
+        return matcher
+
+    @api.model
+    def extract_candidates(self, raw_extracted_data):
+        """
+        Heurística ligera (NO IA) para detectar candidatos a typo en campos manuales.
+        Devuelve hasta 30 candidatos únicos en orden de aparición.
+        """
+        return self._get_typo_matcher().candidates(collect_texts(raw_extracted_data))
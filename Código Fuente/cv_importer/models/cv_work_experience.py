@@ -6,7 +6,10 @@ from dateutil.relativedelta import relativedelta
 
 class CvWorkExperience(models.Model):
     _name = "cv.work.experience"
+    _inherit = "cv.importable.mixin"
     _description = "Work Experience"
+    # Campos que identifican una fila importada entre reimportaciones
+    _import_key_fields = ['position', 'company', 'start_date']
     _order = "start_date desc, end_date desc"
     _rec_name = "position"
 
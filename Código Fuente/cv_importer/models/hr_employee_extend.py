@@ -3,12 +3,21 @@
 from odoo import models, fields, api
 import logging
 
+from ..config_constants import CV_USER_PROVISIONING_BATCH_SIZE
+
 _logger = logging.getLogger(__name__)
 
 
 class HrEmployeeExtend(models.Model):
     _inherit = 'hr.employee'
 
+    # Grupo → cargo, en orden de prioridad (ver _update_job_title_from_user)
+    _JOB_TITLE_GROUPS = [
+        ('google_sheets_import.group_admin_institucional', 'Administrador Institucional'),
+        ('google_sheets_import.group_coord_academico', 'Coordinador Académico'),
+        ('google_sheets_import.group_docente', 'Docente'),
+    ]
+
     # Permitir que docentes/admin institucionales consulten la cédula sin requerir grupo RRHH
     identification_id = fields.Char(
         groups="hr.group_hr_user,google_sheets_import.group_admin_institucional,google_sheets_import.group_docente"
@@ -1057,8 +1066,10 @@ class HrEmployeeExtend(models.Model):
             _logger.warning("⚠️ Grupo docente o base.group_user no encontrado; cron omitido.")
             return False
 
-        Users = self.env['res.users'].sudo()
-        
+        Users = self.env['res.users'].sudo().with_context(active_test=False)
+        Employee = self.sudo().with_context(skip_job_title_sync=True)
+        batch_size = self._get_user_provisioning_batch_size()
+
         # CONTADORES
         created_users = 0
         updated_groups = 0
@@ -1067,72 +1078,76 @@ class HrEmployeeExtend(models.Model):
         removed_from_group = 0
         errors = []
 
+        # Grupos que determinan el cargo, en orden de prioridad
+        title_groups = [
+            (self.env.ref(xmlid, raise_if_not_found=False), title)
+            for xmlid, title in self._JOB_TITLE_GROUPS
+        ]
+        title_groups = [(group.id, title) for group, title in title_groups if group]
+        membership = self._get_group_membership(
+            {docente_group.id, group_user.id} | {gid for gid, _title in title_groups}
+        )
+
+        def _title_for(user_id):
+            gids = membership.get(user_id, set())
+            return next((title for gid, title in title_groups if gid in gids), None)
+
+        def _apply_membership(group, user_ids, command):
+            """Un write por grupo en lugar de uno por usuario."""
+            if not user_ids:
+                return 0
+            try:
+                group.sudo().write({'users': [(command, uid) for uid in user_ids]})
+            except Exception as e:
+                error_msg = f"Error actualizando grupo '{group.name}' para {len(user_ids)} usuarios: {str(e)}"
+                _logger.error(error_msg)
+                errors.append(error_msg)
+                return 0
+            for uid in user_ids:
+                if command == 4:
+                    membership.setdefault(uid, set()).add(group.id)
+                else:
+                    membership.get(uid, set()).discard(group.id)
+            return len(user_ids)
+
         # =================================================================
         # PARTE 1: Empleados que YA TIENEN usuario vinculado
         # =================================================================
         _logger.info("=" * 60)
         _logger.info("🔄 PARTE 1: Actualizando empleados con usuario existente")
         _logger.info("=" * 60)
-        
+
         employees_with_user = self.search([
             ('user_id', '!=', False),
             ('active', '=', True),
         ])
-        
+
         _logger.info(f"📊 Empleados con usuario encontrados: {len(employees_with_user)}")
-        
+
+        add_base, add_docente, remove_docente = set(), set(), set()
         for emp in employees_with_user:
-            user = emp.user_id
-            
-            # VALIDACIÓN CLAVE: ¿Tiene facultad?
-            tiene_facultad = bool(emp.facultad)
-            esta_en_grupo_docente = docente_group.id in user.groups_id.ids
-            
-            if tiene_facultad:
-                # 1.1) Asegurar que tenga Internal User
-                if group_user.id not in user.groups_id.ids:
-                    try:
-                        user.write({'groups_id': [(4, group_user.id)]})
-                        _logger.info(f" Grupo Internal User agregado: {user.login}")
-                        updated_groups += 1
-                    except Exception as e:
-                        error_msg = f"Error agregando grupo base a {user.login}: {str(e)}"
-                        _logger.error(f"{error_msg}")
-                        errors.append(error_msg)
-                
-                # 1.2) Asegurar que tenga grupo Docente (solo si tiene facultad)
-                if not esta_en_grupo_docente:
-                    try:
-                        user.write({'groups_id': [(4, docente_group.id)]})
-                        _logger.info(f"Grupo Docente agregado: {user.login} (Facultad: {emp.facultad.name})")
-                        updated_groups += 1
-                    except Exception as e:
-                        error_msg = f"Error agregando grupo docente a {user.login}: {str(e)}"
-                        _logger.error(f"{error_msg}")
-                        errors.append(error_msg)
-            
-            else:
-                # NO tiene facultad → remover del grupo docente si está
-                if esta_en_grupo_docente:
-                    try:
-                        user.write({'groups_id': [(3, docente_group.id)]})  # (3, id) = remover
-                        _logger.warning(f"Grupo Docente removido: {user.login} (SIN FACULTAD)")
-                        removed_from_group += 1
-                    except Exception as e:
-                        error_msg = f"Error removiendo grupo docente de {user.login}: {str(e)}"
-                        _logger.error(f"{error_msg}")
-                        errors.append(error_msg)
-            
-            # 1.3) Actualizar cargo si no es Docente/Coordinador/Admin
-            if emp.job_title not in ['Docente', 'Coordinador Académico', 'Administrador Institucional']:
-                try:
-                    emp._update_job_title_from_user()
-                    _logger.info(f"Cargo actualizado: {emp.name} → {emp.job_title}")
-                    updated_jobs += 1
-                except Exception as e:
-                    error_msg = f"Error actualizando cargo de {emp.name}: {str(e)}"
-                    _logger.error(f"{error_msg}")
-                    errors.append(error_msg)
+            uid = emp.user_id.id
+            gids = membership.get(uid, set())
+            if emp.facultad:
+                if group_user.id not in gids:
+                    add_base.add(uid)
+                if docente_group.id not in gids:
+                    add_docente.add(uid)
+            elif docente_group.id in gids:
+                # NO tiene facultad → remover del grupo docente
+                remove_docente.add(uid)
+
+        updated_groups += _apply_membership(group_user, add_base, 4)
+        updated_groups += _apply_membership(docente_group, add_docente, 4)
+        removed_from_group += _apply_membership(docente_group, remove_docente, 3)
+        if remove_docente:
+            _logger.warning(f"Grupo Docente removido a {len(remove_docente)} usuarios SIN FACULTAD")
+
+        # Cargos a recalcular: (empleado, user_id)
+        title_candidates = [
+            (emp, emp.user_id.id) for emp in employees_with_user
+            if emp.job_title not in ['Docente', 'Coordinador Académico', 'Administrador Institucional']
+        ]
 
         # =================================================================
         # PARTE 2: Empleados SIN usuario (crear nuevos)
@@ -1141,101 +1156,136 @@ class HrEmployeeExtend(models.Model):
         _logger.info("=" * 60)
         _logger.info("PARTE 2: Creando usuarios para empleados sin user_id")
         _logger.info("=" * 60)
-        
+
         employees_without_user = self.search([
             ('user_id', '=', False),
             ('active', '=', True),
             ('employee_type', '=', 'employee'),
         ])
-        
+
         _logger.info(f"Empleados sin usuario encontrados: {len(employees_without_user)}")
 
+        login_by_emp = {}
         for emp in employees_without_user:
             # Determinar login (email o cédula)
             login_base = (emp.work_email or emp.identification_id or '').strip().lower()
-            
             if not login_base:
                 _logger.warning(f"Empleado {emp.name} sin email ni cédula; saltado")
                 skipped += 1
                 continue
+            login_by_emp[emp] = login_base
 
-            # 2.1) Verificar si ya existe usuario con ese login
-            existing_user = Users.search([('login', '=', login_base)], limit=1)
-            
+        # 2.1) Logins ocupados (incluye sufijos numéricos) y usuarios activos reutilizables: una consulta cada uno
+        taken_logins = self._get_taken_logins(set(login_by_emp.values()))
+        existing_by_login = {
+            u.login: u for u in Users.search([('login', 'in', list(set(login_by_emp.values()))), ('active', '=', True)])
+        }
+        linked_user_ids = set(self.with_context(active_test=False).search(
+            [('user_id', 'in', [u.id for u in existing_by_login.values()])]
+        ).mapped('user_id').ids) if existing_by_login else set()
+
+        to_link = []      # (empleado, usuario existente)
+        to_create = []    # (empleado, login)
+        for emp, login_base in login_by_emp.items():
+            existing_user = existing_by_login.get(login_base)
+            if existing_user and existing_user.id not in linked_user_ids:
+                to_link.append((emp, existing_user))
+                linked_user_ids.add(existing_user.id)
+                continue
             if existing_user:
-                # Usuario ya existe, solo vincular
-                _logger.info(f"Usuario existente encontrado para {emp.name}: {login_base}")
-                
-                try:
-                    # Vincular empleado al usuario existente
-                    emp.sudo().write({'user_id': existing_user.id})
-                    
-                    # Asegurar grupos
-                    groups_to_add = []
-                    if group_user.id not in existing_user.groups_id.ids:
-                        groups_to_add.append(group_user.id)
-                    if docente_group.id not in existing_user.groups_id.ids:
-                        groups_to_add.append(docente_group.id)
-                    
-                    if groups_to_add:
-                        existing_user.write({'groups_id': [(4, gid) for gid in groups_to_add]})
-                        _logger.info(f"Grupos actualizados para usuario existente: {login_base}")
-                    
-                    # Actualizar cargo
-                    emp._update_job_title_from_user()
-                    
-                    _logger.info(f"Empleado vinculado y cargo actualizado: {emp.name}")
-                    updated_jobs += 1
-                    
-                except Exception as e:
-                    error_msg = f"Error vinculando empleado {emp.name} a usuario existente: {str(e)}"
-                    _logger.error(f"{error_msg}")
-                    errors.append(error_msg)
-                    
+                error_msg = f"Error vinculando empleado {emp.name}: el usuario {login_base} ya está vinculado a otro empleado"
+                _logger.error(error_msg)
+                errors.append(error_msg)
+                skipped += 1
                 continue
 
-            # 2.2) No existe usuario, crear uno nuevo
-            # Generar login único si es necesario
+            # Generar login único en memoria
             login = login_base
             counter = 1
-            while Users.search_count([('login', '=', login)]) > 0:
+            while login in taken_logins:
                 login = f"{login_base}{counter}"
                 counter += 1
                 if counter > 100:  # Prevenir bucle infinito
-                    _logger.error(f"No se pudo generar login único para {emp.name}")
-                    skipped += 1
                     break
-            
-            if counter > 100:
+            if login in taken_logins:
+                _logger.error(f"No se pudo generar login único para {emp.name}")
+                skipped += 1
                 continue
+            taken_logins.add(login)
+            to_create.append((emp, login))
 
-            # Crear nuevo usuario
+        # 2.2) Vincular usuarios existentes y completar sus grupos con un write por grupo
+        linked = set()
+        for emp, user in to_link:
+            try:
+                with self.env.cr.savepoint():
+                    Employee.browse(emp.id).write({'user_id': user.id})
+                title_candidates.append((emp, user.id))
+                linked.add(user.id)
+                _logger.info(f"Usuario existente vinculado: {user.login} → {emp.name}")
+            except Exception as e:
+                error_msg = f"Error vinculando empleado {emp.name} a usuario existente: {str(e)}"
+                _logger.error(error_msg)
+                errors.append(error_msg)
+        for group in (group_user, docente_group):
+            missing = {uid for uid in linked if group.id not in membership.get(uid, set())}
+            updated_groups += _apply_membership(group, missing, 4)
+
+        # 2.3) Crear usuarios nuevos por lotes; el empleado se vincula en el mismo create
+        UsersNoReset = Users.with_context(no_reset_password=True, skip_job_title_sync=True)
+        for start in range(0, len(to_create), batch_size):
+            chunk = to_create[start:start + batch_size]
+            vals_list = [{
+                'name': emp.name or emp.display_name,
+                'login': login,
+                'email': emp.work_email or False,
+                'company_id': self.env.company.id,
+                'company_ids': [(6, 0, [self.env.company.id])],
+                'groups_id': [(6, 0, [docente_group.id, group_user.id])],
+                'employee_ids': [(4, emp.id)],
+            } for emp, login in chunk]
             try:
-                user_vals = {
-                    'name': emp.name or emp.display_name,
-                    'login': login,
-                    'email': emp.work_email or False,
-                    'company_id': self.env.company.id,
-                    'company_ids': [(6, 0, [self.env.company.id])],
-                    'groups_id': [(6, 0, [docente_group.id, group_user.id])],
-                }
-                
-                new_user = Users.with_context(no_reset_password=True).create(user_vals)
-                
-                # Vincular al empleado
-                emp.sudo().write({'user_id': new_user.id})
-                
-                # Actualizar cargo
-                emp._update_job_title_from_user()
-                
-                _logger.info(f"Nuevo usuario creado y vinculado: {login} → {emp.name}")
+                with self.env.cr.savepoint():
+                    new_users = UsersNoReset.create(vals_list)
+                created = list(zip(chunk, new_users))
+            except Exception as e:
+                # Un registro inválido no debe tumbar el lote: se reintenta uno a uno
+                _logger.warning(f"Lote de {len(chunk)} usuarios falló ({e}); se crea uno a uno")
+                created = []
+                for item, vals in zip(chunk, vals_list):
+                    try:
+                        with self.env.cr.savepoint():
+                            created.append((item, UsersNoReset.create(vals)))
+                    except Exception as e_one:
+                        error_msg = f"Error creando usuario para {item[0].name}: {str(e_one)}"
+                        _logger.error(error_msg)
+                        errors.append(error_msg)
+                        skipped += 1
+
+            for (emp, login), new_user in created:
+                membership[new_user.id] = {docente_group.id, group_user.id}
+                title_candidates.append((emp, new_user.id))
                 created_users += 1
-                
+            _logger.info(f"Lote de usuarios creado: {len(created)}/{len(chunk)}")
+
+        # =================================================================
+        # PARTE 3: Cargos, un write por cargo
+        # =================================================================
+        by_title = {}
+        for emp, uid in title_candidates:
+            title = _title_for(uid)
+            if title and emp.job_title != title:
+                by_title.setdefault(title, self.browse())
+                by_title[title] |= emp
+        for title, employees in by_title.items():
+            try:
+                employees.with_context(skip_job_title_sync=True).write({'job_title': title})
+                _logger.info(f"Cargo '{title}' asignado a {len(employees)} empleados")
+                updated_jobs += len(employees)
             except Exception as e:
-                error_msg = f"Error creando usuario para {emp.name}: {str(e)}"
-                _logger.error(f"{error_msg}")
+                error_msg = f"Error actualizando cargo '{title}' de {len(employees)} empleados: {str(e)}"
+                _logger.error(error_msg)
                 errors.append(error_msg)
-                skipped += 1
 
         # =================================================================
         # REPORTE FINAL
@@ -1243,6 +1293,7 @@ class HrEmployeeExtend(models.Model):
         _logger.info("RESUMEN DEL CRON")
         _logger.info(f"Usuarios creados: {created_users}")
         _logger.info(f"Grupos actualizados: {updated_groups}")
+        _logger.info(f"Removidos del grupo Docente: {removed_from_group}")
         _logger.info(f"Cargos actualizados: {updated_jobs}")
         _logger.info(f"Saltados: {skipped}")
         _logger.info(f"Errores: {len(errors)}")
@@ -1256,6 +1307,42 @@ class HrEmployeeExtend(models.Model):
         _logger.info("=" * 60)
         
         return True
+
+    @api.model
+    def _get_user_provisioning_batch_size(self):
+        raw = self.env['ir.config_parameter'].sudo().get_param('cv_importer.user_provisioning_batch_size')
+        try:
+            return max(int(raw or CV_USER_PROVISIONING_BATCH_SIZE), 1)
+        except (TypeError, ValueError):
+            return CV_USER_PROVISIONING_BATCH_SIZE
+
+    @api.model
+    def _get_group_membership(self, group_ids):
+        """{user_id: {group_id}} para los grupos dados, en una sola consulta (incluye grupos implícitos)."""
+        membership = {}
+        if not group_ids:
+            return membership
+        self.env['res.users'].flush_model(['groups_id'])
+        self.env.cr.execute(
+            "SELECT uid, gid FROM res_groups_users_rel WHERE gid = ANY(%s)",
+            [list(group_ids)],
+        )
+        for uid, gid in self.env.cr.fetchall():
+            membership.setdefault(uid, set()).add(gid)
+        return membership
+
+    @api.model
+    def _get_taken_logins(self, login_bases):
+        """Logins existentes (activos o no) que coinciden con cada base o con base + sufijo numérico."""
+        if not login_bases:
+            return set()
+        patterns = [
+            base.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            for base in login_bases
+        ]
+        self.env['res.users'].flush_model(['login'])
+        self.env.cr.execute("SELECT login FROM res_users WHERE login LIKE ANY(%s)", [patterns])
+        return {row[0] for row in self.env.cr.fetchall()}
     # ============================================================
     # 13) Salvaguarda de acceso: docentes solo ven su registro
     # ============================================================
@@ -1295,7 +1382,7 @@ class HrEmployeeExtend(models.Model):
     def write(self, vals):
         """Al actualizar empleado, revisar si cambió el usuario"""
         result = super(HrEmployeeExtend, self).write(vals)
-        if 'user_id' in vals:
+        if 'user_id' in vals and not self.env.context.get('skip_job_title_sync'):
             for employee in self:
                 if employee.user_id:
                     employee._update_job_title_from_user()
@@ -1311,13 +1398,8 @@ class HrEmployeeExtend(models.Model):
         user = self.user_id
         
         # Determinar cargo según grupos (orden de prioridad)
-        if user.has_group('google_sheets_import.group_admin_institucional'):
-            new_title = 'Administrador Institucional'
-        elif user.has_group('google_sheets_import.group_coord_academico'):
-            new_title = 'Coordinador Académico'
-        elif user.has_group('google_sheets_import.group_docente'):
-            new_title = 'Docente'
-        else:
+        new_title = next((title for xmlid, title in self._JOB_TITLE_GROUPS if user.has_group(xmlid)), None)
+        if not new_title:
             return  # No actualizar si no tiene ninguno de estos grupos
         
         # Solo actualizar si cambió o está vacío
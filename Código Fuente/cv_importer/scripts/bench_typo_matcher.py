@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Micro-benchmark del extractor de candidatos a typo.
+
+Uso:
+    python3 scripts/bench_typo_matcher.py <corpus> [--patterns typos.txt] [--vocabulary vocab.txt]
+                                          [--max-distance 1] [--repeat 5]
+
+<corpus> es un archivo .json/.jsonl o una carpeta de .json con payloads de N8N (o directamente
+su raw_extracted_data), p. ej. el campo extraction_response exportado de cv.document.
+Compara el extractor anterior (regex por patrón y por token) con typo_matcher.TypoMatcher
+y verifica que, sin comprobación de distancia, devuelvan los mismos candidatos.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location(
+    'typo_matcher', os.path.join(HERE, os.pardir, 'typo_matcher.py')
+)
+typo_matcher = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(typo_matcher)
+
+
+def _raw_data(payload):
+    """Misma lógica que cv.document._get_raw_extracted_data."""
+    if not isinstance(payload, dict):
+        return {}
+    output = payload.get('output')
+    return (
+        payload.get('raw_extracted_data')
+        or (output.get('raw_extracted_data') if isinstance(output, dict) else None)
+        or payload
+    )
+
+
+def _load_file(path):
+    with open(path, encoding='utf-8') as fh:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in fh if line.strip()]
+        data = json.load(fh)
+    return data if isinstance(data, list) else [data]
+
+
+def load_corpus(path):
+    if os.path.isdir(path):
+        payloads = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(('.json', '.jsonl')):
+                payloads += _load_file(os.path.join(path, name))
+    else:
+        payloads = _load_file(path)
+    return [_raw_data(p) for p in payloads]
+
+
+def _read_words(path):
+    if not path:
+        return []
+    with open(path, encoding='utf-8') as fh:
+        return [line.strip() for line in fh if line.strip()]
+
+
+def _measure(func, corpus, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = [func(raw) for raw in corpus]
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('corpus')
+    parser.add_argument('--patterns', help='typos adicionales del catálogo, uno por línea')
+    parser.add_argument('--vocabulary', help='textos válidos para el vocabulario, uno por línea')
+    parser.add_argument('--max-distance', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='repeticiones sobre el corpus (se toma la mejor)')
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print("Corpus vacío: %s" % args.corpus)
+        return 1
+
+    extra = _read_words(args.patterns)
+    t0 = time.perf_counter()
+    plain = typo_matcher.TypoMatcher(list(typo_matcher.SEED_TYPO_PATTERNS) + extra)
+    build_ms = (time.perf_counter() - t0) * 1000.0
+
+    legacy, legacy_s = _measure(typo_matcher.legacy_extract_candidates, corpus, args.repeat)
+    nuevo, nuevo_s = _measure(lambda raw: plain.candidates(typo_matcher.collect_texts(raw)), corpus, args.repeat)
+
+    n = len(corpus)
+    print("payloads: %d | patrones: %d | construcción del matcher: %.2f ms" % (n, plain.pattern_count, build_ms))
+    print("%-28s %12s %14s" % ('extractor', 'total ms', 'µs/payload'))
+    print("%-28s %12.2f %14.1f" % ('anterior', legacy_s * 1000.0, legacy_s * 1e6 / n))
+    print("%-28s %12.2f %14.1f" % ('TypoMatcher', nuevo_s * 1000.0, nuevo_s * 1e6 / n))
+
+    if not extra:
+        diferentes = sum(1 for a, b in zip(legacy, nuevo) if a != b)
+        print("payloads con candidatos distintos: %d" % diferentes)
+
+    if args.max_distance:
+        vocabulary = typo_matcher.vocabulary_from_texts(
+            list(typo_matcher.SEED_VOCABULARY) + _read_words(args.vocabulary)
+        )
+        fuzzy = typo_matcher.TypoMatcher(
+            list(typo_matcher.SEED_TYPO_PATTERNS) + extra, vocabulary=vocabulary, max_distance=args.max_distance
+        )
+        con_distancia, fuzzy_s = _measure(
+            lambda raw: fuzzy.candidates(typo_matcher.collect_texts(raw)), corpus, args.repeat
+        )
+        extra_hits = sum(len(set(b) - set(a)) for a, b in zip(nuevo, con_distancia))
+        print("%-28s %12.2f %14.1f" % (
+            'TypoMatcher + distancia %d' % args.max_distance, fuzzy_s * 1000.0, fuzzy_s * 1e6 / n))
+        print("vocabulario: %d palabras | candidatos extra por distancia: %d" % (len(vocabulary), extra_hits))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,3 @@
+from . import test_carrera_resolver
+from . import test_cv_apply
+from . import test_typo_matcher
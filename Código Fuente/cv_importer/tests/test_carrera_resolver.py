@@ -0,0 +1,83 @@
+from odoo.tests.common import BaseCase
+
+from ..carrera_resolver import CarreraResolver, legacy_resolve_carrera
+
+CARRERAS = [
+    (1, 'Software'),
+    (2, 'Tecnologías de la Información'),
+    (3, 'Redes y Telecomunicaciones'),
+    (4, 'Electrónica y Automatización'),
+    (5, 'Electrónica y Telecomunicaciones'),
+    (6, 'SOFTWARE'),  # misma clave normalizada que id=1
+    (7, 'Diseño Gráfico'),
+]
+
+
+class TestCarreraResolver(BaseCase):
+    """carrera_resolver es Python puro: BaseCase no abre cursor ni necesita datos."""
+
+    def setUp(self):
+        super().setUp()
+        self.resolver = CarreraResolver(CARRERAS)
+
+    def _resolve(self, label):
+        carrera_id, _key, _score = self.resolver.resolve(label)
+        self.assertEqual(carrera_id, legacy_resolve_carrera(CARRERAS, label), label)
+        return carrera_id
+
+    def test_exact_match_ignores_accents_case_and_prefix(self):
+        self.assertEqual(self._resolve('Carrera de Tecnologias de la informacion'), 2)
+        self.assertEqual(self._resolve('  diseño   GRÁFICO '), 7)
+        self.assertEqual(self.resolver.resolve('Diseño Gráfico')[2], 1.0)
+
+    def test_duplicate_normalized_names_last_id_wins(self):
+        self.assertEqual(self._resolve('Software'), 6)
+        self.assertEqual(self._resolve('software.'), 6)
+
+    def test_jaccard_match_above_threshold(self):
+        carrera_id, key, score = self.resolver.resolve('Redes Telecomunicaciones')
+        self.assertEqual(carrera_id, 3)
+        self.assertEqual(key, 'redes telecomunicaciones')
+        self.assertAlmostEqual(score, 2 / 3)
+        self.assertEqual(self._resolve('Carrera en Electronica Automatizacion'), 4)
+
+    def test_jaccard_below_threshold_is_not_a_match(self):
+        # 'electronica' comparte 1 de 3 tokens con dos carreras: 0.33 < 0.6 y no es subcadena
+        self.assertEqual(self._resolve('Electronica Industrial'), False)
+
+    def test_substring_fallback_first_id(self):
+        # 2 de 4 tokens con ids 4 y 5 (0.5 < 0.6): decide la subcadena, primer id
+        carrera_id, _key, score = self.resolver.resolve('Electronica y Auto')
+        self.assertEqual(carrera_id, 4)
+        self.assertEqual(score, 0.0)
+        self.assertEqual(self._resolve('Electronica y Auto'), 4)
+        self.assertEqual(self._resolve('telecom'), 3)
+
+    def test_substring_fallback_uses_first_id_of_duplicates(self):
+        self.assertEqual(self._resolve('soft'), 1)
+
+    def test_substring_fallback_only_checks_indexed_candidates(self):
+        # Sin tokens en común: solo se comprueban las carreras con todos los fragmentos de la etiqueta
+        self.assertEqual(
+            set(self.resolver._substring_candidates('telecom')),
+            {'redes y telecomunicaciones', 'electronica y telecomunicaciones'},
+        )
+        self.assertEqual(set(self.resolver._substring_candidates('xyz')), set())
+        self.assertEqual(set(self.resolver._substring_candidates('fi')), {'diseno grafico'})
+
+    def test_matches_legacy_on_every_substring(self):
+        for _carrera_id, name in CARRERAS:
+            key = ' '.join(name.lower().split())
+            for start in range(len(key)):
+                for end in range(start + 1, len(key) + 1):
+                    self._resolve(key[start:end])
+
+    def test_unknown_and_empty_labels(self):
+        self.assertEqual(self._resolve('Medicina Veterinaria'), False)
+        self.assertEqual(self.resolver.resolve('')[0], False)
+        self.assertEqual(self._resolve('   '), False)
+        self.assertEqual(self._resolve('Carrera de ¿?'), False)
+
+    def test_results_are_memoized(self):
+        first = self.resolver.resolve('Redes Telecomunicaciones')
+        self.assertIs(self.resolver.resolve('Redes Telecomunicaciones'), first)
@@ -0,0 +1,159 @@
+import json
+
+from odoo.tests.common import TransactionCase
+
+
+class TestCvApply(TransactionCase):
+    """Aplicación de los datos parseados del CV (cv.document.action_apply_parsed_data)."""
+
+    def setUp(self):
+        super().setUp()
+        self.cv_metrics = self.env['cv.metrics']
+        self.employee = self.env['hr.employee'].create({
+            'name': 'Docente Prueba',
+            'identification_id': '0601234567',
+        })
+
+    def _make_document(self, raw_extracted_data):
+        return self.env['cv.document'].create({
+            'employee_id': self.employee.id,
+            'extraction_response': json.dumps({'raw_extracted_data': raw_extracted_data}),
+        })
+
+    def _imported(self, model_name, active_test=True):
+        return self.env[model_name].with_context(active_test=active_test).search([
+            ('employee_id', '=', self.employee.id), ('source', '=', 'import'),
+        ])
+
+    def test_apply_parsed_data_bulk_create(self):
+        """Test aplicación de datos parseados: un create por modelo y métrica por fase"""
+        doc = self._make_document({
+            'academic_degrees': [
+                {'degree_title': 'Ingeniero en Sistemas', 'institution': 'ESPOCH', 'degree_type': 'Tercer nivel'},
+                {'degree_title': 'Magíster en Software', 'institution': 'ESPOCH', 'degree_type': 'Cuarto nivel'},
+            ],
+            'languages': [
+                {'language_name': 'Inglés', 'writing_level': 80, 'speaking_level': 70},
+                {'language_name': 'inglés', 'writing_level': 50, 'speaking_level': 50},
+            ],
+        })
+
+        doc.action_apply_parsed_data()
+
+        self.assertEqual(doc.parsing_status, 'applied')
+        self.assertEqual(len(self._imported('cv.academic.degree')), 2)
+        self.assertEqual(len(self._imported('cv.language')), 1)
+        metric = self.cv_metrics.search([
+            ('operation_type', '=', 'parse'),
+            ('employee_id', '=', self.employee.id),
+        ], limit=1)
+        self.assertTrue(metric)
+        self.assertIn('write', json.loads(metric.phase_timings_json))
+
+    def test_apply_parsed_data_replace_mode(self):
+        """Test modo reemplazo: cada aplicación borra y recrea las filas importadas"""
+        self.env['ir.config_parameter'].sudo().set_param('cv_importer.incremental_apply', 'False')
+        doc = self._make_document({'academic_degrees': [
+            {'degree_title': 'Ingeniero Civil', 'institution': 'ESPOCH', 'degree_type': 'Tercer nivel'},
+        ]})
+
+        doc.action_apply_parsed_data()
+        first = self._imported('cv.academic.degree')
+        self.assertEqual(len(first), 1)
+
+        doc.action_apply_parsed_data()
+        second = self._imported('cv.academic.degree', active_test=False)
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(second.id, first.id)
+        self.assertFalse(first.exists())
+
+    def test_apply_parsed_data_incremental(self):
+        """Test reimportación incremental: sin cambios no recrea filas, actualiza en sitio y archiva las eliminadas"""
+        self.env['ir.config_parameter'].sudo().set_param('cv_importer.incremental_apply', 'True')
+        degrees = [
+            {'degree_title': 'Ingeniero Civil', 'institution': 'ESPOCH', 'degree_type': 'Tercer nivel'},
+            {'degree_title': 'Máster en Estructuras', 'institution': 'UPM', 'degree_type': 'Cuarto nivel'},
+        ]
+        doc = self._make_document({'academic_degrees': degrees})
+
+        doc.action_apply_parsed_data()
+        first = self._imported('cv.academic.degree')
+        self.assertEqual(len(first), 2)
+        self.assertTrue(all(first.mapped('import_key')))
+        self.assertTrue(all(first.mapped('import_hash')))
+
+        doc.action_apply_parsed_data()
+        self.assertEqual(self._imported('cv.academic.degree').ids, first.ids)
+
+        # Mismos campos clave con otro contenido: se actualiza la misma fila
+        changed = dict(degrees[1], degree_type='No especificado')
+        doc.extraction_response = json.dumps({'raw_extracted_data': {'academic_degrees': [degrees[0], changed]}})
+        doc.action_apply_parsed_data()
+        current = self._imported('cv.academic.degree')
+        self.assertEqual(sorted(current.ids), sorted(first.ids))
+        self.assertEqual(current.filtered(lambda r: r.institution == 'UPM').degree_type, 'no especificado')
+
+        doc.extraction_response = json.dumps({'raw_extracted_data': {'academic_degrees': degrees[:1]}})
+        doc.action_apply_parsed_data()
+        active = self._imported('cv.academic.degree')
+        self.assertEqual(len(active), 1)
+        self.assertIn(active.id, first.ids)
+        archived = self._imported('cv.academic.degree', active_test=False) - active
+        self.assertEqual(len(archived), 1)
+        self.assertFalse(archived.active)
+
+        # Si la fila vuelve en el CV se reactiva la archivada en vez de crear otra
+        doc.extraction_response = json.dumps({'raw_extracted_data': {'academic_degrees': degrees}})
+        doc.action_apply_parsed_data()
+        self.assertEqual(sorted(self._imported('cv.academic.degree').ids), sorted(first.ids))
+
+    def test_apply_parsed_data_incremental_unlinks_unique_models(self):
+        """Test reimportación incremental: las materias eliminadas se borran (UNIQUE) y pueden volver"""
+        self.env['ir.config_parameter'].sudo().set_param('cv_importer.incremental_apply', 'True')
+        carrera = self.env['carrera'].create({'name': 'Software'})
+        materias = [
+            {'asignatura': 'Programación I', 'carrera': 'Software'},
+            {'asignatura': 'Bases de Datos', 'carrera': 'Carrera de Software'},
+        ]
+        doc = self._make_document({'materias': materias})
+
+        doc.action_apply_parsed_data()
+        first = self._imported('cv.materias')
+        self.assertEqual(len(first), 2)
+        self.assertEqual(first.carrera_id, carrera)
+        self.assertTrue(self.env['cv.materias']._import_unlinks_removed())
+        self.assertFalse(self.env['cv.academic.degree']._import_unlinks_removed())
+
+        doc.extraction_response = json.dumps({'raw_extracted_data': {'materias': materias[:1]}})
+        doc.action_apply_parsed_data()
+        self.assertEqual(len(self._imported('cv.materias', active_test=False)), 1)
+        self.assertEqual(len(first.exists()), 1)
+
+        doc.extraction_response = json.dumps({'raw_extracted_data': {'materias': materias}})
+        doc.action_apply_parsed_data()
+        self.assertEqual(doc.parsing_status, 'applied')
+        self.assertEqual(len(self._imported('cv.materias')), 2)
+
+    def test_apply_parsed_data_incremental_replaces_rows_without_key(self):
+        """Test reimportación incremental: las filas importadas sin import_key se reemplazan una vez"""
+        self.env['ir.config_parameter'].sudo().set_param('cv_importer.incremental_apply', 'True')
+        legacy = self.env['cv.academic.degree'].create({
+            'employee_id': self.employee.id,
+            'degree_title': 'Ingeniero Civil',
+            'institution': 'ESPOCH',
+            'degree_type': 'tercer nivel',
+            'source': 'import',
+        })
+        self.assertFalse(legacy.import_key)
+        doc = self._make_document({'academic_degrees': [
+            {'degree_title': 'Ingeniero Civil', 'institution': 'ESPOCH', 'degree_type': 'Tercer nivel'},
+        ]})
+
+        doc.action_apply_parsed_data()
+        self.assertFalse(legacy.exists())
+        current = self._imported('cv.academic.degree', active_test=False)
+        self.assertEqual(len(current), 1)
+        self.assertTrue(current.import_key)
+
+        doc.action_apply_parsed_data()
+        self.assertEqual(self._imported('cv.academic.degree', active_test=False), current)
@@ -0,0 +1,76 @@
+from odoo.tests.common import BaseCase
+
+from .. import typo_matcher
+
+
+def _raw(certificaciones=(), logros=(), materias=(), titulos=()):
+    return {
+        'certifications': [{'certification_name': c, 'institution': None} for c in certificaciones],
+        'logros': [{'descripcion': l} for l in logros],
+        'materias': [{'asignatura': a, 'carrera': c} for a, c in materias],
+        'academic_degrees': [{'degree_title': t, 'institution': None} for t in titulos],
+    }
+
+
+class TestTypoMatcher(BaseCase):
+    """typo_matcher es Python puro: BaseCase no abre cursor ni necesita datos."""
+
+    def setUp(self):
+        super().setUp()
+        self.matcher = typo_matcher.TypoMatcher(typo_matcher.SEED_TYPO_PATTERNS)
+
+    def _assert_same_as_legacy(self, raw):
+        expected = typo_matcher.legacy_extract_candidates(raw)
+        got = self.matcher.candidates(typo_matcher.collect_texts(raw))
+        self.assertEqual(got, expected)
+        return got
+
+    def test_seed_patterns(self):
+        raw = _raw(
+            certificaciones=['International Confrence on Hardenning', 'Curso Avanado de Redes'],
+            logros=['Aprobacion del proyecto de investigacion en tecnologias pequenas'],
+        )
+        got = self._assert_same_as_legacy(raw)
+        self.assertIn('Confrence', got)
+        self.assertIn('Hardenning', got)
+        self.assertIn('Avanado', got)
+
+    def test_seed_pattern_inside_longer_token(self):
+        got = self._assert_same_as_legacy(_raw(titulos=['Investigaciones aplicadas']))
+        self.assertEqual(got, ['Investigaciones'])
+
+    def test_triple_letter_tokens(self):
+        got = self._assert_same_as_legacy(_raw(materias=[('Programaaacion', 'Softwareee'), ('Redes', 'Sistemas')]))
+        self.assertEqual(got, ['Programaaacion', 'Softwareee'])
+
+    def test_long_tokens(self):
+        largo = 'Electroencefalografistas' + 'x'
+        corto = 'Electroencefalografista'  # 23 letras: no es candidato
+        got = self._assert_same_as_legacy(_raw(logros=[f'{largo} {corto}']))
+        self.assertEqual(got, [largo])
+
+    def test_case_insensitive_dedup_keeps_first_form(self):
+        raw = _raw(certificaciones=['CONFRENCE anual', 'confrence regional', 'Confrence'])
+        self.assertEqual(self._assert_same_as_legacy(raw), ['CONFRENCE'])
+
+    def test_limit(self):
+        palabras = ' '.join(f'palabraaa{chr(97 + i // 26)}{chr(97 + i % 26)}' for i in range(40))
+        got = self._assert_same_as_legacy(_raw(logros=[palabras]))
+        self.assertEqual(len(got), typo_matcher.MAX_CANDIDATES)
+
+    def test_clean_text_has_no_candidates(self):
+        raw = _raw(materias=[('Cálculo Diferencial', 'Ingeniería en Sistemas')], titulos=['Magíster en Redes'])
+        self.assertEqual(self._assert_same_as_legacy(raw), [])
+
+    def test_catalog_patterns_extend_seed(self):
+        matcher = typo_matcher.TypoMatcher(list(typo_matcher.SEED_TYPO_PATTERNS) + ['Sofware'])
+        self.assertEqual(matcher.candidates(['Ingeniería de Sofware y redes']), ['Sofware'])
+        self.assertEqual(self.matcher.candidates(['Ingeniería de Sofware y redes']), [])
+
+    def test_distance_check(self):
+        matcher = typo_matcher.TypoMatcher(
+            typo_matcher.SEED_TYPO_PATTERNS,
+            vocabulary=typo_matcher.vocabulary_from_texts(['Telecomunicaciones', 'Electrónica']),
+            max_distance=1,
+        )
+        self.assertEqual(matcher.candidates(['Telecomunicasiones y Electrónica']), ['Telecomunicasiones'])
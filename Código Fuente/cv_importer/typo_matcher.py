@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Detección de candidatos a typo en los campos manuales del CV.
+
+Sin dependencias de Odoo para poder medirla fuera del servidor
+(ver scripts/bench_typo_matcher.py).
+"""
+import re
+
+# Patrones semilla (se amplían con los typos frecuentes de cv.typo.catalog)
+SEED_TYPO_PATTERNS = (
+    "confrence", "hardenning", "avanado", "aprobacion",
+    "tecnologias", "investigacion", "pequenas",
+)
+
+# Formas correctas de los patrones semilla; base del vocabulario para la comprobación de distancia
+SEED_VOCABULARY = (
+    "conference", "hardening", "avanzado", "aprobación",
+    "tecnologías", "investigación", "pequeñas",
+)
+
+MAX_CANDIDATES = 30
+LONG_TOKEN_LENGTH = 24
+
+TOKEN_RE = re.compile(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{3,}")
+VOCABULARY_TOKEN_RE = re.compile(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{5,}")
+_TRIPLE_LETTER = r"([a-záéíóúñ])\1\1"
+
+
+def collect_texts(raw_extracted_data):
+    """Textos de los campos manuales típicos del raw_extracted_data de N8N."""
+    x = raw_extracted_data or {}
+    texts = []
+    for c in x.get("certifications", []):
+        texts += [c.get("certification_name"), c.get("institution")]
+    for l in x.get("logros", []):
+        texts += [l.get("descripcion")]
+    for m in x.get("materias", []):
+        texts += [m.get("asignatura"), m.get("carrera")]
+    for d in x.get("academic_degrees", []):
+        texts += [d.get("degree_title"), d.get("institution")]
+    return [t for t in texts if t]
+
+
+def vocabulary_from_texts(texts):
+    """Vocabulario de referencia (palabras de 5+ letras en minúsculas) a partir de textos válidos."""
+    vocab = set()
+    for text in texts:
+        vocab.update(tok.lower() for tok in VOCABULARY_TOKEN_RE.findall(text or ""))
+    return vocab
+
+
+def _within_distance(a, b, max_distance):
+    """Levenshtein acotado: True si distancia(a, b) <= max_distance (corta en cuanto se supera)."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+
+class TypoMatcher:
+    """Matcher precompilado: una sola regex con la heurística de letras triples y la
+    alternancia de todos los typos conocidos, más una comprobación opcional de
+    distancia contra un vocabulario.
+
+    Un token es candidato si tiene 24+ letras, si la regex lo encuentra o si, con
+    `max_distance` > 0, no está en el vocabulario pero está a esa distancia de una
+    palabra que sí está (casi igual a una palabra conocida = probablemente mal escrita).
+    """
+
+    def __init__(self, patterns=SEED_TYPO_PATTERNS, vocabulary=None, max_distance=0):
+        literals = sorted({p.strip().lower() for p in patterns if p and p.strip()}, key=len, reverse=True)
+        alternatives = [_TRIPLE_LETTER] + [re.escape(p) for p in literals]
+        self.pattern_count = len(literals)
+        self._regex = re.compile("|".join(alternatives))
+        self.max_distance = max_distance if vocabulary else 0
+        self._vocabulary = set(vocabulary or ())
+        self._vocabulary_by_length = {}
+        for word in self._vocabulary:
+            self._vocabulary_by_length.setdefault(len(word), []).append(word)
+        self._memo = {}
+
+    def _is_near_vocabulary(self, t):
+        if len(t) < 5 or t in self._vocabulary:
+            return False
+        hit = self._memo.get(t)
+        if hit is None:
+            d = self.max_distance
+            hit = any(
+                _within_distance(t, word, d)
+                for length in range(len(t) - d, len(t) + d + 1)
+                for word in self._vocabulary_by_length.get(length, ())
+            )
+            if len(self._memo) < 50000:
+                self._memo[t] = hit
+        return hit
+
+    def is_candidate(self, token):
+        t = token.lower()
+        if len(t) >= LONG_TOKEN_LENGTH:
+            return True
+        if self._regex.search(t):
+            return True
+        return bool(self.max_distance) and self._is_near_vocabulary(t)
+
+    def candidates(self, texts, limit=MAX_CANDIDATES):
+        """Candidatos únicos (sin distinguir mayúsculas) en orden de aparición, máx `limit`."""
+        blob = " ".join(texts)
+        uniq = []
+        seen = set()
+        for tok in TOKEN_RE.findall(blob):
+            k = tok.lower()
+            if k in seen:
+                continue
+            seen.add(k)  # el resultado solo depende de la forma en minúsculas
+            if self.is_candidate(tok):
+                uniq.append(tok)
+                if len(uniq) >= limit:
+                    break
+        return uniq
+
+
+def legacy_extract_candidates(raw_extracted_data):
+    """Implementación anterior (solo para comparar en el benchmark)."""
+    blob = " ".join(collect_texts(raw_extracted_data))
+    tokens = re.findall(r"[A-Za-zÁÉÍÓÚÜÑáéíóúüñ]{3,}", blob)
+    patterns = list(SEED_TYPO_PATTERNS)
+    candidates = []
+    for tok in tokens:
+        t = tok.lower()
+        if len(t) >= 24:
+            candidates.append(tok)
+            continue
+        if re.search(r"([a-záéíóúñ])\1\1", t):
+            candidates.append(tok)
+            continue
+        if any(re.search(p, t) for p in patterns):
+            candidates.append(tok)
+            continue
+    uniq = []
+    seen = set()
+    for c in candidates:
+        k = c.lower()
+        if k in seen:
+            continue
+        seen.add(k)
+        uniq.append(c)
+        if len(uniq) >= 30:
+            break
+    return uniq
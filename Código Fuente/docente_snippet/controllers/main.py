@@ -1,25 +1,21 @@
 from odoo import http
 from odoo.http import request
+from odoo.addons.google_sheets_import.controllers.cache_controller import employee_image_response
 import logging
-import base64
 
 _logger = logging.getLogger(__name__)
 
 class DocenteSnippetController(http.Controller):
 
     @http.route('/docente_snippet/imagen/<int:employee_id>', type='http', auth='public', website=True)
-    def get_employee_image(self, employee_id, **kwargs):
-        """Ruta pública para obtener imágenes de empleados"""
+    def get_employee_image(self, employee_id, size='full', **kwargs):
+        """Ruta pública para obtener imágenes de empleados (size=thumb|full, con ETag)"""
         try:
-            employee = request.env['hr.employee'].sudo().browse(employee_id)
-            if employee.exists() and employee.image_1920:
-                image_data = base64.b64decode(employee.image_1920)
-                headers = [
-                    ('Content-Type', 'image/png'),
-                    ('Content-Length', len(image_data)),
-                    ('Cache-Control', 'public, max-age=604800'),
-                ]
-                return request.make_response(image_data, headers)
+            response = employee_image_response(
+                employee_id, size=size, cache_control='public, max-age=604800'
+            )
+            if response is not None:
+                return response
             else:
                 # Retornar imagen placeholder si no existe
                 return request.redirect('/web/static/img/placeholder.png')
@@ -87,7 +83,7 @@ class DocenteSnippetController(http.Controller):
         else:
             for emp in empleados:
                 # Usar la ruta pública para las imágenes (esta ruta sí usa sudo internamente)
-                img_url = f"/docente_snippet/imagen/{emp.id}"
+                img_url = f"/docente_snippet/imagen/{emp.id}?size=thumb"
                 
                 docente_url = f"/docente/{emp.identification_id}" if emp.identification_id else '#'
                 correo = emp.work_email or emp.private_email or 'Sin correo'
@@ -12,7 +12,7 @@
     'author': 'Carla Lomas',
     'license': 'LGPL-3',
     'category': 'Recursos Humanos',
-    'depends': ['base', 'hr', 'website', 'web'], 
+    'depends': ['base', 'hr', 'website', 'web', 'bus'], 
     'external_dependencies': {
         'python': ['requests', 'Pillow'],
     },
@@ -26,11 +26,19 @@
         'views/employee_cedulas_button.xml',
         'views/facultad_carrera.xml',
         'views/dataset_version_views.xml',
+        'views/import_checkpoint_views.xml',
+        'views/import_job_views.xml',
+        'data/import_job_cron.xml',
         'views/identification_fix_wizard_view.xml',
         'views/coord_facultad_wizard_view.xml',
         'views/import_wizard_view.xml',
     ],
 
+    'assets': {
+        'web.assets_backend': [
+            'google_sheets_import/static/src/js/import_progress_listener.esm.js',
+        ],
+    },
     'installable': True,
     'auto_install': False,
     'application': False,  
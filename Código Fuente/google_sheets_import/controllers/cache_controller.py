@@ -1,24 +1,50 @@
 import base64
-import hashlib
 from odoo import http
 from odoo.http import request, Response
+from odoo.tools.mimetypes import guess_mimetype
+
+# Variantes servidas: image.mixin ya guarda las versiones redimensionadas al escribir image_1920
+IMAGE_VARIANTS = {
+    'thumb': 'image_256',    # listados / directorio de docentes
+    'full': 'image_1920',    # perfil
+}
+
+
+def employee_image_response(employee_id, size='full', cache_control='public, max-age=86400'):
+    """Respuesta HTTP con la imagen del empleado usando la huella precalculada como ETag.
+
+    Devuelve None si el empleado no existe o no tiene imagen. Una revalidación
+    (If-None-Match) se resuelve con 304 leyendo solo image_fingerprint.
+    """
+    if size not in IMAGE_VARIANTS:
+        size = 'full'
+    Employee = request.env['hr.employee'].sudo().with_context(active_test=False, prefetch_fields=False)
+    rows = Employee.search_read([('id', '=', employee_id)], ['image_fingerprint'], limit=1)
+    fingerprint = rows and rows[0]['image_fingerprint']
+    if not fingerprint:
+        return None
+
+    etag = '%s-%s' % (fingerprint[:32], size)
+    headers = [
+        ('Cache-Control', cache_control),
+        ('ETag', '"%s"' % etag),
+    ]
+    if request.httprequest.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    raw = base64.b64decode(Employee.browse(employee_id)[IMAGE_VARIANTS[size]])
+    headers += [
+        ('Content-Type', guess_mimetype(raw, default='image/png')),
+        ('Content-Length', len(raw)),
+    ]
+    return request.make_response(raw, headers)
+
 
 class GoogleSheetsCacheController(http.Controller):
 
     @http.route('/google_sheets_import/profile_image/<int:employee_id>', type='http', auth='public', methods=['GET'])
-    def profile_image(self, employee_id, **kwargs):
-        employee = request.env['hr.employee'].sudo().browse(employee_id)
-        if not employee.exists() or not employee.image_1920:
+    def profile_image(self, employee_id, size='full', **kwargs):
+        response = employee_image_response(employee_id, size=size)
+        if response is None:
             return Response(status=404)
-        binary_b64 = employee.image_1920
-        raw = base64.b64decode(binary_b64)
-        etag = hashlib.sha256(raw).hexdigest()
-        inm = request.httprequest.headers.get('If-None-Match')
-        if inm == etag:
-            return Response(status=304, headers=[('ETag', etag)])
-        headers = [
-            ('Content-Type', 'image/png'),
-            ('Cache-Control', 'public, max-age=86400, immutable'),
-            ('ETag', etag)
-        ]
-        return request.make_response(raw, headers)
+        return response
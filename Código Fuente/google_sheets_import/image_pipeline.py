@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Normalización de fotos de docentes antes de guardarlas en image_1920.
+
+Sin dependencias de Odoo (solo Pillow) para poder medirla fuera del servidor
+(ver scripts/bench_image_pipeline.py).
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+# Valores por defecto (override: google_sheets_import.photo_max_dimension / photo_jpeg_quality)
+PHOTO_MAX_DIMENSION = 1024
+PHOTO_JPEG_QUALITY = 85
+
+# Formatos que se conservan tal cual; el resto se convierte a JPEG (o PNG si tiene transparencia)
+KEEP_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+_EXIF_ORIENTATION = 0x0112
+
+
+def pipeline_signature(max_dimension=PHOTO_MAX_DIMENSION, jpeg_quality=PHOTO_JPEG_QUALITY):
+    """Identifica la configuración usada; si cambia, las fotos en caché se reprocesan."""
+    return 'v2:%s:%s' % (max_dimension, jpeg_quality)
+
+
+def _has_alpha(img):
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def normalize_image(raw, max_dimension=PHOTO_MAX_DIMENSION, jpeg_quality=PHOTO_JPEG_QUALITY):
+    """Devuelve los bytes normalizados de la imagen `raw`.
+
+    - Si ya está en un formato conservable, sin rotación EXIF y dentro de `max_dimension`,
+      se devuelven los bytes originales (se decodifican solo para validarlos).
+    - Si no, se reduce al lado máximo conservando el formato (JPEG/WebP; PNG solo si tiene
+      transparencia, si no pasa a JPEG).
+    Lanza la excepción de Pillow si `raw` no es una imagen.
+    """
+    img = Image.open(BytesIO(raw))
+    fmt = 'JPEG' if img.format == 'MPO' else img.format
+    width, height = img.size
+    orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+
+    if fmt in KEEP_FORMATS and max(width, height) <= max_dimension and orientation in (0, 1):
+        # Decodifica igualmente para rechazar descargas truncadas o corruptas
+        img.load()
+        return raw
+
+    if fmt == 'JPEG':
+        # Decodifica directamente a escala reducida (mucho más barato que decodificar y luego reducir)
+        img.draft('RGB', (max_dimension, max_dimension))
+    img = ImageOps.exif_transpose(img)
+    if max(img.size) > max_dimension:
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    # Una foto opaca que hay que re-codificar pesa mucho menos en JPEG que en PNG
+    if fmt not in KEEP_FORMATS or (fmt == 'PNG' and not _has_alpha(img)):
+        fmt = 'PNG' if _has_alpha(img) else 'JPEG'
+
+    output = BytesIO()
+    if fmt == 'JPEG':
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.save(output, format='JPEG', quality=jpeg_quality, optimize=False, progressive=True)
+    elif fmt == 'WEBP':
+        img.save(output, format='WEBP', quality=jpeg_quality, method=4)
+    else:
+        img.save(output, format='PNG', compress_level=6)
+    return output.getvalue()
+
+
+def legacy_normalize_image(raw):
+    """Pipeline anterior (RGBA -> PNG optimize=True); se conserva para el benchmark."""
+    img = Image.open(BytesIO(raw))
+    img = img.convert("RGBA")
+    output = BytesIO()
+    img.save(output, format="PNG", optimize=True)
+    return output.getvalue()
@@ -2,6 +2,9 @@ from . import employee_import
 from . import http_client
 from . import identification_fix_wizard
 from . import dataset_version
+from . import photo_cache
 from . import res_config_settings
 from . import res_users
-from . import import_wizard
\ No newline at end of file
+from . import import_wizard
+from . import import_checkpoint
+from . import import_job
@@ -20,6 +20,12 @@ class GoogleSheetsDatasetVersion(models.Model):
     json_schema = fields.Text(help="Opcional: estructura inferida / encabezados.")
     meta_json = fields.Text(help="Metadata adicional (JSON).")
     notes = fields.Text()
+    row_fingerprints_json = fields.Text(
+        readonly=True,
+        help="Huella SHA-256 de cada fila indexada por cédula normalizada (JSON).",
+    )
+    import_success = fields.Boolean(readonly=True, index=True, help="La importación de esta versión terminó sin errores.")
+    import_scope = fields.Char(readonly=True, help="Facultad importada con esta versión ('ALL' = todas).")
 
     _sql_constraints = [
         ('uniq_hash', 'unique(hash_sha256)', 'Ya existe un registro con el mismo hash (contenido idéntico).')
@@ -65,6 +71,37 @@ class GoogleSheetsDatasetVersion(models.Model):
         })
         return record
 
+    def get_row_fingerprints(self):
+        self.ensure_one()
+        try:
+            return json.loads(self.row_fingerprints_json or '{}')
+        except ValueError:
+            return {}
+
+    @api.model
+    def _get_last_successful(self, sheet_url, scope='ALL'):
+        """Última versión del mismo sheet aplicada con éxito sobre `scope` (o sobre todas las facultades)."""
+        return self.search([
+            ('sheet_url', '=', sheet_url or ''),
+            ('import_success', '=', True),
+            ('import_scope', 'in', list({'ALL', scope or 'ALL'})),
+            ('row_fingerprints_json', '!=', False),
+        ], order='import_datetime desc', limit=1)
+
+    @api.model
+    def _diff_row_fingerprints(self, previous, current):
+        """Compara dos mapas {cédula: huella} y clasifica las cédulas."""
+        prev_keys = set(previous)
+        curr_keys = set(current)
+        common = prev_keys & curr_keys
+        unchanged = {k for k in common if previous[k] == current[k]}
+        return {
+            'inserted': curr_keys - prev_keys,
+            'changed': common - unchanged,
+            'removed': prev_keys - curr_keys,
+            'unchanged': unchanged,
+        }
+
     def action_view_rows_sample(self):
         self.ensure_one()
         if not self.meta_json:
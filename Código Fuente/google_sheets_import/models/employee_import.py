@@ -1,15 +1,26 @@
 import requests
 import csv
 import base64
+import hashlib
+import io
 import logging
 import subprocess
 import shutil
 import json
-from io import BytesIO, StringIO
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from PIL import Image
 
+from ..image_pipeline import (
+    normalize_image,
+    pipeline_signature,
+    PHOTO_MAX_DIMENSION,
+    PHOTO_JPEG_QUALITY,
+)
+
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
@@ -21,6 +32,55 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
 _logger = logging.getLogger(__name__)
+
+# Columnas del CSV de empleados que usan las pasadas de import_employees (lo demás no se retiene)
+EMPLOYEE_CSV_COLUMNS = (
+    'CEDULA', 'NOMBRES', 'APELLIDOS', 'CORREO INSTITUCIONAL',
+    'FACULTAD', 'CARRERA', 'GENERO', 'CARGO',
+)
+
+
+class _HashingReader(io.RawIOBase):
+    """Envuelve el cuerpo HTTP en streaming y actualiza un SHA-256 con cada bloque leído.
+
+    `prefix` son bytes ya leídos de `raw` (p. ej. para inspeccionar el inicio); se
+    entregan primero, de modo que el hash cubre el cuerpo completo.
+    """
+
+    def __init__(self, raw, hasher, prefix=b''):
+        self._raw = raw
+        self._prefix = prefix
+        self.hasher = hasher
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._prefix:
+            data, self._prefix = self._prefix[:len(buffer)], self._prefix[len(buffer):]
+        else:
+            data = self._raw.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        self.hasher.update(data)
+        return n
+
+
+def _leer_prefijo(raw, size):
+    """Lee hasta `size` bytes de `raw`; una sola lectura puede devolver menos (respuestas chunked)."""
+    prefix = b''
+    while len(prefix) < size:
+        data = raw.read(size - len(prefix))
+        if not data:
+            break
+        prefix += data
+    return prefix
+
+
+# Hilos para la descarga concurrente de fotos (override: google_sheets_import.photo_prefetch_workers)
+PHOTO_PREFETCH_WORKERS = 8
+# Filas por transacción confirmada durante la importación (override: google_sheets_import.import_chunk_size)
+IMPORT_CHUNK_SIZE = 200
 class Facultad(models.Model):
     _name = 'facultad'
     _description = 'Facultad'
@@ -159,6 +219,20 @@ class HREmployee(models.Model):
         ],
         string='Género',
     )
+    # Huella SHA-256 de image_1920: se calcula una vez al escribir la imagen y
+    # sirve de ETag para las rutas públicas de imagen (sin decodificar por petición)
+    image_fingerprint = fields.Char(
+        string='Huella de imagen',
+        compute='_compute_image_fingerprint',
+        store=True,
+        readonly=True,
+    )
+
+    @api.depends('image_1920')
+    def _compute_image_fingerprint(self):
+        for employee in self.with_context(bin_size=False):
+            image = employee.image_1920
+            employee.image_fingerprint = hashlib.sha256(base64.b64decode(image)).hexdigest() if image else False
 
     _sql_constraints = [
         (
@@ -290,6 +364,34 @@ class EmployeeImport(models.Model):
         help='Escriba el nombre EXACTO de la facultad tal como aparece en el CSV (ejemplo: FACULTAD DE ZOOTECNIA)'
     )
 
+    import_mode = fields.Selection(
+        selection=[
+            ('full', 'Completa (todas las filas)'),
+            ('delta', 'Solo cambios desde la última versión importada'),
+        ],
+        string='Modo de importación',
+        default='full',
+        required=True,
+        help='En modo "Solo cambios" se procesan únicamente las filas nuevas o modificadas respecto a la '
+             'última versión del dataset importada con éxito (huella por cédula). Las filas eliminadas '
+             'se siguen archivando al final.'
+    )
+
+    last_checkpoint_id = fields.Many2one(
+        'google.sheets.import.checkpoint',
+        string='Último checkpoint',
+        readonly=True,
+        copy=False,
+    )
+    last_checkpoint_state = fields.Selection(related='last_checkpoint_id.state', string='Estado del checkpoint')
+
+    archive_dry_run = fields.Boolean(
+        string='Simular archivado',
+        default=False,
+        help='Importa normalmente pero no archiva a los empleados ausentes del CSV: '
+             'solo muestra la lista de los que se archivarían.'
+    )
+
     def action_update_job_titles(self):
         """Actualizar cargos de todos los empleados según sus grupos"""
         employees = self.env['hr.employee'].sudo().search([('user_id', '!=', False)])
@@ -780,20 +882,36 @@ class EmployeeImport(models.Model):
 
 
     def _validar_y_leer_csv(self, url, tipo='desconocido', session=None):
+        """Abre el CSV en streaming y devuelve un csv.DictReader que parsea fila a fila.
+
+        El SHA-256 del cuerpo se calcula mientras se lee: `reader.hasher.hexdigest()` es
+        válido una vez consumido el reader.
+        """
         from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 
         s = session or self._get_http_session()
 
         def descargar(url_final):
             try:
-                return s.get(url_final, verify=False, timeout=15)
+                response = s.get(url_final, verify=False, timeout=15, stream=True)
+                response.raw.decode_content = True
+                # Solo se miran los primeros bytes para descartar una página HTML
+                prefix = _leer_prefijo(response.raw, 300)
+                if b'<!doctype html' in prefix.lower():
+                    response.close()
+                    return None
+                hashing = _HashingReader(response.raw, hashlib.sha256(), prefix=prefix)
+                buffered = io.BufferedReader(hashing, buffer_size=64 * 1024)
+                reader = csv.DictReader(io.TextIOWrapper(buffered, encoding='utf-8', newline=''))
+                reader.hasher = hashing.hasher
+                return reader
             except Exception as e:
                 _logger.error("Error al descargar %s desde %s: %s", tipo, url_final, str(e))
                 return None
 
-        response = descargar(url)
-        if response and b'<!DOCTYPE html>' not in response.content[:300]:
-            return csv.DictReader(StringIO(response.content.decode('utf-8')))
+        reader = descargar(url)
+        if reader:
+            return reader
 
         parsed = urlparse(url)
         if 'pubhtml' in parsed.path:
@@ -804,9 +922,9 @@ class EmployeeImport(models.Model):
             csv_url = urlunparse(parsed._replace(path=new_path, query=new_query))
 
             _logger.warning("La URL original de %s devolvió HTML. Intentando con: %s", tipo, csv_url)
-            response = descargar(csv_url)
-            if response and b'<!DOCTYPE html>' not in response.content[:300]:
-                return csv.DictReader(StringIO(response.content.decode('utf-8')))
+            reader = descargar(csv_url)
+            if reader:
+                return reader
 
         raise UserError(_(f'La URL de {tipo} no devuelve un CSV válido. Verifica que tenga output=csv.'))
 
@@ -832,58 +950,189 @@ class EmployeeImport(models.Model):
             return False
 
 
-    def descargar_imagen(self, url_imagen, session=None):
-        if not url_imagen:
-            return False
+    def _url_foto_docente(self, nombres_raw, apellidos_raw, imagenes_dict):
+        """URL de la foto: la del CSV de imágenes o, si no existe, la URL estimada del sitio ESPOCH."""
+        primer_nombre = nombres_raw.split()[0].title()
+        primer_apellido = apellidos_raw.split()[0].title()
+        clave_foto = self.normalizar(f"{primer_nombre} {primer_apellido}", lower=False)
+        url_imagen = imagenes_dict.get(clave_foto)
+        if url_imagen:
+            return url_imagen
 
-        session = session or requests.Session()
+        primer_apellido_mayus = self.normalizar(apellidos_raw.split()[0], lower=False)
+        primer_nombre_mayus = self.normalizar(nombres_raw.split()[0], lower=False)
+        return f"https://www.espoch.edu.ec/wp-content/uploads/2025/03/{primer_apellido_mayus}-{primer_nombre_mayus}-500x500.jpg"
 
-        def _download(verify_flag):
-            headers = {
-                "User-Agent": "Mozilla/5.0",
-                "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-            }
-            resp = session.get(
-                url_imagen,
-                timeout=20,
-                verify=verify_flag,
-                allow_redirects=True,
-                headers=headers,
-            )
-            resp.raise_for_status()
+    def _get_photo_prefetch_workers(self):
+        raw = self.env['ir.config_parameter'].sudo().get_param('google_sheets_import.photo_prefetch_workers')
+        try:
+            return max(int(raw or PHOTO_PREFETCH_WORKERS), 1)
+        except (TypeError, ValueError):
+            return PHOTO_PREFETCH_WORKERS
 
-            ctype = (resp.headers.get("Content-Type") or "").lower()
-            if "image" not in ctype:
-                _logger.warning("La URL no devuelve imagen (Content-Type=%s): %s", ctype, url_imagen)
-                return b""
-            return resp.content
+    def _get_import_chunk_size(self):
+        raw = self.env['ir.config_parameter'].sudo().get_param('google_sheets_import.import_chunk_size')
+        try:
+            return max(int(raw or IMPORT_CHUNK_SIZE), 1)
+        except (TypeError, ValueError):
+            return IMPORT_CHUNK_SIZE
 
+    def _get_photo_pipeline_options(self):
+        """Parámetros de normalización; se leen en el hilo principal y se pasan a los hilos."""
+        ICP = self.env['ir.config_parameter'].sudo()
 
-        try:
+        def _int_param(name, default):
             try:
-                raw = _download(True)
-            except (requests.exceptions.SSLError, requests.exceptions.RequestException):
-                import urllib3
-                urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-                raw = _download(False)
+                return max(int(ICP.get_param(name) or default), 1)
+            except (TypeError, ValueError):
+                return default
 
-            if not raw:
-                return False
+        return {
+            'max_dimension': _int_param('google_sheets_import.photo_max_dimension', PHOTO_MAX_DIMENSION),
+            'jpeg_quality': min(_int_param('google_sheets_import.photo_jpeg_quality', PHOTO_JPEG_QUALITY), 95),
+        }
 
-            # Abrir 1 sola vez y convertir (evita verify + reopen)
-            try:
-                img = Image.open(BytesIO(raw))
-                img = img.convert("RGBA")
-                output = BytesIO()
-                img.save(output, format="PNG", optimize=True)
-                return base64.b64encode(output.getvalue())
-            except Exception:
-                _logger.warning("Contenido descargado no es imagen válida: %s", url_imagen)
-                return False
+    def _row_fingerprint(self, row, imagenes_dict):
+        """SHA-256 de una fila: columnas importadas + URL de foto resuelta."""
+        data = {k: (row.get(k) or '').strip() for k in EMPLOYEE_CSV_COLUMNS}
+        if data['NOMBRES'] and data['APELLIDOS']:
+            data['FOTO'] = self._url_foto_docente(data['NOMBRES'], data['APELLIDOS'], imagenes_dict)
+        blob = json.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(blob).hexdigest()
+
+    def _cedulas_sin_cambios(self, row_fps, scope):
+        """Modo delta: cédulas cuya fila es idéntica a la última versión importada con éxito."""
+        Version = self.env['google.sheets.dataset.version'].sudo()
+        previous = Version._get_last_successful(self.sheet_url, scope)
+        if not previous:
+            _logger.info("Modo delta: no hay versión previa importada con éxito; se procesan todas las filas")
+            return set()
+
+        diff = Version._diff_row_fingerprints(previous.get_row_fingerprints(), row_fps)
+        _logger.info(
+            "Modo delta contra versión %s: nuevas=%s modificadas=%s eliminadas=%s sin cambios=%s",
+            previous.id, len(diff['inserted']), len(diff['changed']),
+            len(diff['removed']), len(diff['unchanged'])
+        )
+        return diff['unchanged']
 
-        except Exception as e:
-            _logger.warning("requests no pudo descargar imagen %s: %s", url_imagen, str(e))
+    def _archivar_empleados_ausentes(self, cedulas_en_csv, facultad_seleccionada=None, dry_run=False):
+        """Archiva los empleados activos (de la facultad filtrada) cuya cédula no está en el CSV.
+
+        Una sola consulta sobre `facultad.name_normalized` devuelve el total de activos del
+        alcance y los ids candidatos; el archivado es un único write. Con `dry_run` solo se
+        devuelven los candidatos. Devuelve {'activos': int, 'candidatos': hr.employee}.
+        """
+        Employee = self.env['hr.employee'].sudo()
+        Employee.flush_model(['active', 'identification_id', 'facultad'])
+        self.env['facultad'].flush_model(['name_normalized'])
 
+        fac_norm = None
+        if facultad_seleccionada:
+            fac_norm = self.normalizar(self._clean_facultad_name(facultad_seleccionada), lower=True)
+
+        self.env.cr.execute("""
+            SELECT count(*),
+                   array_agg(e.id) FILTER (WHERE NOT (e.identification_id = ANY(%(cedulas)s)))
+              FROM hr_employee e
+              LEFT JOIN facultad f ON f.id = e.facultad
+             WHERE e.active
+               AND COALESCE(e.identification_id, '') != ''
+               AND (%(fac)s::varchar IS NULL OR f.name_normalized = %(fac)s)
+        """, {'cedulas': list(cedulas_en_csv), 'fac': fac_norm})
+        activos, candidato_ids = self.env.cr.fetchone()
+        candidatos = Employee.browse(candidato_ids or [])
+
+        _logger.info(
+            "Archivado%s: %s activos en alcance '%s', %s ausentes del CSV",
+            ' (simulación)' if dry_run else '', activos, fac_norm or 'todas', len(candidatos)
+        )
+        if not dry_run and candidatos:
+            candidatos.write({'active': False})
+        return {'activos': activos, 'candidatos': candidatos}
+
+    def _prefetch_imagenes(self, rows_emp, imagenes_dict, session, start_idx=2, facultad_seleccionada=None,
+                           omitir_cedulas=None):
+        """Descarga en paralelo las fotos de las filas a importar, antes del bucle de BD.
+
+        Devuelve {url: registro de google.sheets.photo.cache o False}. Los hilos comparten
+        el pool de conexiones de `session`.
+        """
+        urls = []
+        vistas = set()
+        for idx, record in enumerate(rows_emp, start=2):
+            if idx < start_idx:
+                continue
+            facultad_csv = (record.get('FACULTAD') or '').strip().upper()
+            if facultad_seleccionada and facultad_csv != facultad_seleccionada:
+                continue
+            if omitir_cedulas and self._normalize_cedula((record.get('CEDULA') or '').strip()) in omitir_cedulas:
+                continue
+            nombres_raw = (record.get('NOMBRES') or '').strip()
+            apellidos_raw = (record.get('APELLIDOS') or '').strip()
+            if not nombres_raw or not apellidos_raw:
+                continue
+            url = self._url_foto_docente(nombres_raw, apellidos_raw, imagenes_dict)
+            if url not in vistas:
+                vistas.add(url)
+                urls.append(url)
+
+        return self._obtener_fotos(urls, session)
+
+    def _obtener_fotos(self, urls, session):
+        """Resuelve fotos a través de google.sheets.photo.cache.
+
+        Las descargas condicionales corren en paralelo (solo I/O y PIL, sin ORM); la
+        lectura y escritura de la caché se hace en este hilo. Devuelve {url: registro de caché o False}.
+        """
+        if not urls:
+            return {}
+
+        opciones = self._get_photo_pipeline_options()
+        firma = pipeline_signature(**opciones)
+
+        PhotoCache = self.env['google.sheets.photo.cache'].sudo()
+        entries = PhotoCache._get_entries(urls)
+        # Solo se revalida lo procesado con la configuración actual; el resto se reprocesa
+        validadores = {
+            url: (e.etag, e.last_modified, e.content_hash)
+            for url, e in entries.items() if e.image_fingerprint and e.pipeline_signature == firma
+        }
+
+        workers = min(self._get_photo_prefetch_workers(), len(urls))
+        t0 = time.time()
+        resultados = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gs_photo') as pool:
+            futures = {
+                pool.submit(self._descargar_imagen_condicional, url, session, validadores.get(url), opciones): url
+                for url in urls
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    resultados[url] = future.result()
+                except Exception as e:
+                    _logger.warning("Error en descarga concurrente de imagen %s: %s", url, e)
+                    resultados[url] = {'status': 'error'}
+
+        fotos = PhotoCache._register_results(entries, resultados, pipeline_signature=firma)
+
+        estados = {}
+        for r in resultados.values():
+            estados[r.get('status')] = estados.get(r.get('status'), 0) + 1
+        _logger.info(
+            "📷 Fotos: %s URLs en %.1fs con %s hilos | 304=%s sin_cambios=%s nuevas=%s errores=%s",
+            len(urls), time.time() - t0, workers,
+            estados.get('not_modified', 0), estados.get('unchanged', 0),
+            estados.get('downloaded', 0), estados.get('error', 0),
+        )
+        return fotos
+
+    def _procesar_imagen(self, raw, opciones=None):
+        """Normaliza los bytes descargados (ver image_pipeline) y los devuelve en base64."""
+        return base64.b64encode(normalize_image(raw, **(opciones or {})))
+
+    def _descargar_con_curl(self, url_imagen):
         # Fallback curl (igual que tu lógica)
         try:
             if shutil.which("curl"):
@@ -894,20 +1143,89 @@ class EmployeeImport(models.Model):
                     timeout=20
                 )
                 if result.returncode == 0 and result.stdout:
-                    try:
-                        img = Image.open(BytesIO(result.stdout))
-                        img = img.convert("RGBA")
-                        output = BytesIO()
-                        img.save(output, format="PNG", optimize=True)
-                        return base64.b64encode(output.getvalue())
-                    except Exception:
-                        _logger.warning("La imagen descargada con curl no es válida: %s", url_imagen)
-                else:
-                    _logger.warning("curl -k falló para %s: %s", url_imagen, result.stderr.decode())
+                    return result.stdout
+                _logger.warning("curl -k falló para %s: %s", url_imagen, result.stderr.decode())
         except Exception as e:
             _logger.warning("Error al usar curl -k para descargar imagen desde %s: %s", url_imagen, str(e))
+        return b""
 
-        return None
+    def _descargar_imagen_condicional(self, url_imagen, session, validadores=None, opciones=None):
+        """GET condicional (If-None-Match / If-Modified-Since) de una foto.
+
+        Devuelve un dict con 'status': not_modified (304), unchanged (mismo contenido que la caché,
+        sin pasar por PIL), downloaded (con 'image' procesada) o error. No toca el ORM: apto para hilos.
+        """
+        etag, last_modified, content_hash = validadores or (None, None, None)
+        headers = {
+            "User-Agent": "Mozilla/5.0",
+            "Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        def _get(verify_flag):
+            return session.get(
+                url_imagen,
+                timeout=20,
+                verify=verify_flag,
+                allow_redirects=True,
+                headers=headers,
+            )
+
+        result = {}
+        try:
+            try:
+                resp = _get(True)
+            except requests.exceptions.SSLError:
+                resp = _get(False)
+
+            if resp.status_code == 304:
+                return {'status': 'not_modified'}
+            resp.raise_for_status()
+
+            ctype = (resp.headers.get("Content-Type") or "").lower()
+            if "image" not in ctype:
+                _logger.warning("La URL no devuelve imagen (Content-Type=%s): %s", ctype, url_imagen)
+                return {'status': 'error'}
+            raw = resp.content
+            result.update({
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+            })
+        except requests.exceptions.HTTPError as e:
+            _logger.warning("requests no pudo descargar imagen %s: %s", url_imagen, str(e))
+            return {'status': 'error'}
+        except Exception as e:
+            _logger.warning("requests no pudo descargar imagen %s: %s", url_imagen, str(e))
+            raw = self._descargar_con_curl(url_imagen)
+
+        if not raw:
+            return {'status': 'error'}
+
+        result['content_hash'] = hashlib.sha256(raw).hexdigest()
+        if content_hash and result['content_hash'] == content_hash:
+            result['status'] = 'unchanged'
+            return result
+
+        try:
+            result.update({'status': 'downloaded', 'image': self._procesar_imagen(raw, opciones)})
+        except Exception:
+            _logger.warning("Contenido descargado no es imagen válida: %s", url_imagen)
+            return {'status': 'error'}
+        return result
+
+    def descargar_imagen(self, url_imagen, session=None):
+        """Descarga directa sin caché (base64 o False/None si no hay imagen válida)."""
+        if not url_imagen:
+            return False
+
+        session = session or requests.Session()
+        result = self._descargar_imagen_condicional(
+            url_imagen, session, opciones=self._get_photo_pipeline_options()
+        )
+        return result.get('image') or None
 
 
     @api.constrains('employee_id')
@@ -929,8 +1247,6 @@ class EmployeeImport(models.Model):
 
     def _show_error_wizard(self, error_row, error_message, count, created_count, updated_count, skipped_count, facultad_seleccionada):
         """Mostrar wizard con el error y permitir continuar"""
-        import json
-        
         # Guardar el estado actual
         state_data = {
             'last_idx': error_row,
@@ -940,6 +1256,16 @@ class EmployeeImport(models.Model):
             'skipped_count': skipped_count,
             'facultad_seleccionada': facultad_seleccionada,
         }
+
+        checkpoint = self.env['google.sheets.import.checkpoint'].sudo().browse(
+            self.env.context.get('gs_import_checkpoint_id')
+        ).exists()
+        if checkpoint:
+            checkpoint.save_progress(
+                error_row, state='paused', error_message=error_message, count=count,
+                created_count=created_count, updated_count=updated_count, skipped_count=skipped_count,
+            )
+            state_data = checkpoint.get_resume_state()
         
         # Crear el wizard
         wizard = self.env['employee.import.wizard'].create({
@@ -966,68 +1292,210 @@ class EmployeeImport(models.Model):
         """Continuar importación desde donde se quedó"""
         return self.import_employees(resume_state=resume_state)
 
+    def action_resume_checkpoint(self):
+        """Reanuda una importación interrumpida desde su último bloque confirmado."""
+        self.ensure_one()
+        if not self.last_checkpoint_id or self.last_checkpoint_id.state == 'done':
+            raise UserError(_('No hay ninguna importación pendiente de reanudar.'))
+        return self.action_enqueue_import(resume_state=self.last_checkpoint_id.get_resume_state())
+
+    def action_enqueue_import(self, resume_state=None):
+        """Lanza la importación en segundo plano (cron) en lugar de ocupar el worker HTTP."""
+        self.ensure_one()
+        if not self.sheet_url or not self.imagenes_url:
+            raise UserError(_('Debes ingresar ambas URLs.'))
+        job = self.env['google.sheets.import.job'].enqueue(self, resume_state=resume_state)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Importación en segundo plano'),
+                'message': _('La importación #%s quedó en cola. Recibirá una notificación al terminar; '
+                             'el avance se puede seguir en Google Sheets Import > Importaciones en segundo plano.') % job.id,
+                'type': 'info',
+                'sticky': False,
+            }
+        }
+
+    def _report_import_progress(self, phase, **vals):
+        """Publica el avance si la importación corre como job (ver google.sheets.import.job)."""
+        job_id = self.env.context.get('gs_import_job_id')
+        if job_id:
+            self.env['google.sheets.import.job'].sudo().browse(job_id).update_progress(phase, **vals)
+
 
-    def _check_identity_conflicts(self, employee, cedula, email, user):
+    def _detectar_conflictos_identidad(self, filas, emp_by_cedula, emp_by_email, user_by_login):
+        """Detecta todos los conflictos de identidad del CSV en una sola pasada.
+
+        `filas` es una lista de (idx, cedula, email_l) con las filas que va a procesar el bucle.
+        Completa `emp_by_email` y `user_by_login` con coincidencias sin distinción de
+        mayúsculas (equivalente a los =ilike por fila) para que el bucle las reutilice.
+        Devuelve [(idx, [mensajes])] ordenado por fila.
+        """
         Employee = self.env['hr.employee'].sudo().with_context(active_test=False)
         Users = self.env['res.users'].sudo().with_context(active_test=False)
 
-        msgs = []
-
-        if cedula:
-            other_emp = Employee.search([
-                ('identification_id', '=', cedula),
-                ('id', '!=', employee.id)
-            ], limit=1)
-            if other_emp:
+        emails = sorted({email_l for _idx, _ced, email_l in filas if email_l})
+        if emails:
+            self.env.cr.execute("SELECT id FROM res_users WHERE lower(login) = ANY(%s)", [emails])
+            for u in Users.browse([r[0] for r in self.env.cr.fetchall()]):
+                user_by_login.setdefault(u.login.strip().lower(), u)
+            self.env.cr.execute("SELECT id FROM hr_employee WHERE lower(trim(work_email)) = ANY(%s)", [emails])
+            for e in Employee.browse([r[0] for r in self.env.cr.fetchall()]):
+                emp_by_email.setdefault(e.work_email.strip().lower(), e)
+
+        user_ids = [u.id for u in user_by_login.values()]
+        emp_by_user = {}
+        for e in (Employee.search([('user_id', 'in', user_ids)]) if user_ids else Employee.browse()):
+            emp_by_user.setdefault(e.user_id.id, e)
+
+        def _estado(emp):
+            return 'Archivado' if not emp.active else 'Activo'
+
+        conflictos = []
+        fila_por_email = {}
+        for idx, cedula, email_l in filas:
+            msgs = []
+
+            previa = fila_por_email.setdefault(email_l, (idx, cedula))
+            if previa[1] != cedula:
                 msgs.append(
-                    f"Conflicto de CÉDULA: {cedula} ya está asignada a '{other_emp.name}' "
-                    f"(ID {other_emp.id}, {'Archivado' if not other_emp.active else 'Activo'})."
+                    f"El email '{email_l}' también aparece en la fila {previa[0]} con la cédula {previa[1]}."
                 )
 
-        if email:
-            email_l = email.strip().lower()
-            u = Users.search([('login', '=ilike', email_l)], limit=1)
-            if u:
-                emp_with_user = Employee.search([('user_id', '=', u.id)], limit=1)
-                if emp_with_user and emp_with_user.id != employee.id:
+            user = user_by_login.get(email_l)
+            employee = (
+                emp_by_cedula.get(cedula)
+                or emp_by_email.get(email_l)
+                or (user and emp_by_user.get(user.id))
+            )
+
+            if employee:
+                current_email = (employee.work_email or '').strip().lower()
+                if employee.identification_id and employee.identification_id != cedula:
+                    msgs.append(
+                        f"El docente ya existía con cédula '{employee.identification_id}' y el CSV intenta cambiarla a '{cedula}'."
+                    )
+                if current_email and current_email != email_l:
+                    msgs.append(
+                        f"El docente ya existe con email '{employee.work_email}' y el CSV intenta cambiarlo a '{email_l}'."
+                    )
+                other_emp = emp_by_email.get(email_l)
+                if not current_email and other_emp and other_emp.id != employee.id:
                     msgs.append(
-                        f"Conflicto: el email '{email_l}' corresponde al usuario (ID {u.id}) "
-                        f"que ya está vinculado al empleado '{emp_with_user.name}' "
-                        f"(ID {emp_with_user.id}, {'Archivado' if not emp_with_user.active else 'Activo'})."
+                        f"El email '{email_l}' ya está asignado a '{other_emp.name}' "
+                        f"(Cédula: {other_emp.identification_id}, {_estado(other_emp)})."
                     )
 
-        if user:
-            emp_with_same_user = Employee.search([
-                ('user_id', '=', user.id),
-                ('id', '!=', employee.id)
-            ], limit=1)
-            if emp_with_same_user:
-                msgs.append(
-                    f"Conflicto: el usuario '{user.login}' (ID {user.id}) ya está vinculado al empleado "
-                    f"'{emp_with_same_user.name}' (ID {emp_with_same_user.id}, "
-                    f"{'Archivado' if not emp_with_same_user.active else 'Activo'})."
-                )
+            if user:
+                linked = emp_by_user.get(user.id)
+                if linked and (not employee or linked.id != employee.id):
+                    msgs.append(
+                        f"El usuario '{user.login}' (ID {user.id}) ya está vinculado al empleado "
+                        f"'{linked.name}' (ID {linked.id}, {_estado(linked)})."
+                    )
 
+            if msgs:
+                conflictos.append((idx, msgs))
 
-        if employee.identification_id and cedula and employee.identification_id != cedula:
-            msgs.append(
-                f"El docente ya existía con cédula '{employee.identification_id}' y el CSV intenta cambiarla a '{cedula}'."
-            )
-        if employee.work_email and email and (employee.work_email.strip().lower() != email.strip().lower()):
-            msgs.append(
-                f"El docente ya existía con email '{employee.work_email}' y el CSV intenta cambiarlo a '{email}'."
-            )
+        return conflictos
 
-        if msgs:
-            return (
-                "Conflicto de identidad detectado.\n\n"
-                + "\n".join(f"• {m}" for m in msgs)
-                + "\n\nCorrección: Ajusta el CSV con el valor correcto (cédula/email) y luego reanuda la importación."
-            )
+    def _formatear_conflictos(self, conflictos, limite=50):
+        lineas = [f"Conflictos de identidad detectados en {len(conflictos)} filas.\n"]
+        for idx, msgs in conflictos[:limite]:
+            lineas.append(f"Fila {idx}:")
+            lineas.extend(f"   • {m}" for m in msgs)
+        if len(conflictos) > limite:
+            lineas.append(f"... y {len(conflictos) - limite} filas más")
+        lineas.append(
+            "\nCorrección: Ajusta el CSV con el valor correcto (cédula/email) y luego reanuda la importación."
+        )
+        return "\n".join(lineas)
 
-        return False
+
+    def _validar_dataset(self, rows, facultad_seleccionada=None):
+        """
+        Validaciones que rechazan el CSV completo. Se ejecutan antes de escribir nada,
+        porque el bucle confirma por bloques y lo ya confirmado no se revierte.
+        Devuelve las cédulas del alcance (para el archivado).
+        """
+        cedulas_vistas = {}
+        cedulas_duplicadas = []
+
+        for idx, record in enumerate(rows, start=1):
+            cedula_raw = (record.get('CEDULA') or '').strip()
+            if cedula_raw:
+                cedula = self._normalize_cedula(cedula_raw)
+                if cedula in cedulas_vistas:
+                    cedulas_duplicadas.append(f"Fila {idx}: Cédula {cedula} (duplica fila {cedulas_vistas[cedula]})")
+                else:
+                    cedulas_vistas[cedula] = idx
+
+        if cedulas_duplicadas:
+            raise UserError(_(
+                f"Se encontraron {len(cedulas_duplicadas)} cédulas duplicadas en el CSV:\n\n" +
+                "\n".join(cedulas_duplicadas[:10]) +
+                (f"\n... y {len(cedulas_duplicadas)-10} más" if len(cedulas_duplicadas) > 10 else "")
+            ))
+
+        emails_vistos = {}
+        emails_duplicados = []
+
+        for idx, record in enumerate(rows, start=1):
+            email = (record.get('CORREO INSTITUCIONAL') or '').strip().lower()
+            if email:
+                if email in emails_vistos:
+                    emails_duplicados.append(f"Fila {idx}: {email} (duplica fila {emails_vistos[email]})")
+                else:
+                    emails_vistos[email] = idx
+
+        if emails_duplicados:
+            _logger.warning(f" Emails duplicados en CSV: {len(emails_duplicados)}")
 
 
+        cedulas_en_csv = set()
+        for record in rows:
+            cedula_raw = (record.get('CEDULA') or '').strip()
+            if not cedula_raw:
+                continue
+            
+            if facultad_seleccionada:
+                facultad_csv = (record.get('FACULTAD') or '').strip().upper()
+                if facultad_csv == facultad_seleccionada:
+                    cedulas_en_csv.add(self._normalize_cedula(cedula_raw))
+            else:
+                cedulas_en_csv.add(self._normalize_cedula(cedula_raw))
+
+        if not cedulas_en_csv:
+            raise UserError(_(
+                "ATENCIÓN: No se detectaron cédulas en el CSV.\n"
+                "No se archivará ningún empleado por seguridad.\n"
+                "Verifica que el archivo CSV tenga datos válidos."
+            ))
+
+        # Control de seguridad del archivado, estimado antes de importar: los ausentes no
+        # cambian con la importación y, como mucho, cada cédula del CSV queda activa en el
+        # alcance, así que el porcentaje real al final nunca es menor que este.
+        ausentes = self._archivar_empleados_ausentes(cedulas_en_csv, facultad_seleccionada, dry_run=True)['candidatos']
+        empleados_en_csv = len(cedulas_en_csv)
+        empleados_activos = len(ausentes) + empleados_en_csv
+        porcentaje = empleados_en_csv / empleados_activos * 100
+
+        _logger.info(f" Validación de seguridad (antes de importar):")
+        _logger.info(f"   - Empleados en CSV: {empleados_en_csv}")
+        _logger.info(f"   - Empleados activos (filtrados, estimado): {empleados_activos}")
+        _logger.info(f"   - Porcentaje: {porcentaje:.1f}%")
+
+        if porcentaje < 50 and empleados_activos > 10:
+            raise UserError(_(
+                f"ATENCIÓN: El CSV solo contiene {empleados_en_csv} empleados, "
+                f"pero hay {empleados_activos} activos en el sistema ({porcentaje:.1f}%).\n\n"
+                "Por seguridad, no se archivarán empleados.\n"
+                "Si esto es correcto, contacta al administrador del sistema."
+            ))
+
+        return cedulas_en_csv
+
     def import_employees(self, resume_state=None):
         """
         Importar empleados. Si resume_state está presente, continúa desde donde se quedó.
@@ -1039,15 +1507,60 @@ class EmployeeImport(models.Model):
         ctx_fast = dict(self.env.context, tracking_disable=True, mail_notrack=True, mail_create_nosubscribe=True)
         self = self.with_context(ctx_fast)
 
-        http_session = self._get_http_session()
+        if resume_state and isinstance(resume_state, str):
+            resume_state = json.loads(resume_state)
+
+        # Restaurar estado si es una reanudación
+        if resume_state:
+            count = resume_state.get('count', 0)
+            created_count = resume_state.get('created_count', 0)
+            updated_count = resume_state.get('updated_count', 0)
+            skipped_count = resume_state.get('skipped_count', 0)
+            sin_cambios_count = resume_state.get('sin_cambios_count', 0)
+            start_idx = resume_state.get('last_idx', 2)
+            facultad_seleccionada = resume_state.get('facultad_seleccionada')
+            _logger.info(f"🔄 REANUDANDO importación desde fila {start_idx}")
+        else:
+            count = 0
+            created_count = 0
+            updated_count = 0
+            skipped_count = 0
+            sin_cambios_count = 0
+            start_idx = 2
+            
+            if self.facultad_custom:
+                facultad_seleccionada = self.facultad_custom.strip().upper()
+                _logger.info("Usando filtro PERSONALIZADO: %s", facultad_seleccionada)
+            elif self.facultad_filter:
+                facultad_seleccionada = self.facultad_filter.strip().upper()
+                _logger.info("Usando filtro PREDEFINIDO: %s", facultad_seleccionada)
+            else:
+                facultad_seleccionada = None
+                _logger.info("Importando TODAS las facultades")
 
-        csv_reader_img = self._validar_y_leer_csv(self.imagenes_url, 'imágenes', session=http_session)
-        imagenes_dict = self.obtener_diccionario_imagenes(csv_reader_img)
+        checkpoint = self.env['google.sheets.import.checkpoint']
+        if resume_state and resume_state.get('checkpoint_id'):
+            checkpoint = checkpoint.sudo().browse(resume_state['checkpoint_id']).exists()
+        desde_cache = bool(checkpoint) and checkpoint.has_dataset() and not resume_state.get('recargar')
 
+        http_session = self._get_http_session()
 
+        self._report_import_progress('download')
+        if desde_cache:
+            # Reanudación: se continúa con el dataset del checkpoint, sin volver a descargar los CSV
+            imagenes_dict = checkpoint.get_imagenes()
+            fuente_filas = checkpoint.get_rows()
+            csv_reader_emp = None
+            _logger.info("Reanudando desde el checkpoint %s (dataset en caché)", checkpoint.id)
+        else:
+            csv_reader_img = self._validar_y_leer_csv(self.imagenes_url, 'imágenes', session=http_session)
+            imagenes_dict = self.obtener_diccionario_imagenes(csv_reader_img)
 
-        csv_reader_emp = self._validar_y_leer_csv(self.sheet_url, 'empleados', session=http_session)
-        rows_emp = list(csv_reader_emp)
+            csv_reader_emp = self._validar_y_leer_csv(self.sheet_url, 'empleados', session=http_session)
+            fuente_filas = (
+                {k: row[k] for k in EMPLOYEE_CSV_COLUMNS if row.get(k) is not None}
+                for row in csv_reader_emp
+            )
 
         # ========= PRE-CARGA (CACHE) PARA ACELERAR =========
         Users = self.env['res.users'].sudo().with_context(active_test=False)
@@ -1057,22 +1570,36 @@ class EmployeeImport(models.Model):
         emails_set = set()
         cedulas_set = set()
         cargos_set = set()
+        row_fps = {}  # cédula normalizada -> huella de la fila
+
+        # Una sola pasada sobre el stream (o el dataset del checkpoint): se retienen solo las
+        # columnas que usa la importación y se precargan únicamente las filas pendientes
+        rows_emp = []
+        for idx, r in enumerate(fuente_filas, start=2):
+            rows_emp.append(r)
+
+            ced_raw = (r.get('CEDULA') or '').strip()
+            ced = self._normalize_cedula(ced_raw) if ced_raw else None
+            if ced and not desde_cache:
+                row_fps[ced] = self._row_fingerprint(r, imagenes_dict)
+
+            if idx < start_idx:
+                continue
 
-        for r in rows_emp:
             em = (r.get('CORREO INSTITUCIONAL') or '').strip().lower()
             if em:
                 emails_set.add(em)
 
-            ced_raw = (r.get('CEDULA') or '').strip()
-            if ced_raw:
-                ced = self._normalize_cedula(ced_raw)
-                if ced:
-                    cedulas_set.add(ced)
+            if ced:
+                cedulas_set.add(ced)
 
             cargo_name = self.normalizar(r.get('CARGO') or 'Sin Cargo', lower=False)
             if cargo_name:
                 cargos_set.add(cargo_name)
 
+        # Rechazos del CSV completo: antes del primer commit por bloques
+        cedulas_en_csv = self._validar_dataset(rows_emp, facultad_seleccionada)
+
         users_pref = Users.search([('login', 'in', list(emails_set))]) if emails_set else Users.browse()
         user_by_login = {u.login.strip().lower(): u for u in users_pref}
 
@@ -1088,90 +1615,149 @@ class EmployeeImport(models.Model):
         # ========= FIN CACHE =========
 
 
-        try:
-            import hashlib, json
-            from urllib.parse import urlparse, parse_qs
-
-            content_bytes = json.dumps(rows_emp, ensure_ascii=False, sort_keys=True).encode('utf-8')
-            hash_sha256 = hashlib.sha256(content_bytes).hexdigest()
-
-            sheet_gid = None
+        dataset_version = checkpoint.dataset_version_id if desde_cache else None
+        if desde_cache and dataset_version:
+            row_fps = dataset_version.get_row_fingerprints()
+        # En una reanudación la versión ya se registró al iniciar la importación
+        if not desde_cache:
             try:
-                parsed = urlparse(self.sheet_url or '')
-                qs = parse_qs(parsed.query)
-                if 'gid' in qs:
-                    sheet_gid = qs['gid'][0]
-            except Exception:
-                sheet_gid = None
+                from urllib.parse import urlparse, parse_qs
 
-            name_ds = f"Importación {self.env.user.name}"
+                # Calculado sobre los bytes del CSV mientras se leía
+                hash_sha256 = csv_reader_emp.hasher.hexdigest()
 
-            headers = list(rows_emp[0].keys()) if rows_emp else []
-            sample_rows = rows_emp[:5] if rows_emp else []
-            meta = {
-                'headers': headers,
-                'sample_rows_count': len(sample_rows),
-            }
+                sheet_gid = None
+                try:
+                    parsed = urlparse(self.sheet_url or '')
+                    qs = parse_qs(parsed.query)
+                    if 'gid' in qs:
+                        sheet_gid = qs['gid'][0]
+                except Exception:
+                    sheet_gid = None
+
+                name_ds = f"Importación {self.env.user.name}"
+
+                headers = list(csv_reader_emp.fieldnames or [])
+                meta = {
+                    'headers': headers,
+                    'sample_rows_count': min(len(rows_emp), 5),
+                }
 
-            vals_ds = {
-                'name': name_ds,
-                'sheet_url': self.sheet_url or '',
-                'sheet_gid': sheet_gid or False,
-                'import_datetime': fields.Datetime.now(),
-                'user_id': self.env.user.id,
-                'row_count': len(rows_emp),
-                'hash_sha256': hash_sha256,
-                'json_schema': json.dumps({'headers': headers}, ensure_ascii=False),
-                'meta_json': json.dumps(meta, ensure_ascii=False),
-            }
+                vals_ds = {
+                    'name': name_ds,
+                    'sheet_url': self.sheet_url or '',
+                    'sheet_gid': sheet_gid or False,
+                    'import_datetime': fields.Datetime.now(),
+                    'user_id': self.env.user.id,
+                    'row_count': len(rows_emp),
+                    'hash_sha256': hash_sha256,
+                    'json_schema': json.dumps({'headers': headers}, ensure_ascii=False),
+                    'meta_json': json.dumps(meta, ensure_ascii=False),
+                    'row_fingerprints_json': json.dumps(row_fps, sort_keys=True),
+                }
 
-            ds = self.env['google.sheets.dataset.version'].sudo().search([('hash_sha256', '=', hash_sha256)], limit=1)
-            if ds:
-                ds.sudo().write({'import_datetime': vals_ds['import_datetime'], 'row_count': vals_ds['row_count']})
-            else:
-                self.env['google.sheets.dataset.version'].sudo().create(vals_ds)
-        except Exception as e:
-            _logger.warning("No se pudo registrar google_sheets.dataset.version: %s", e)
+                ds = self.env['google.sheets.dataset.version'].sudo().search([('hash_sha256', '=', hash_sha256)], limit=1)
+                if ds:
+                    ds.sudo().write({
+                        'import_datetime': vals_ds['import_datetime'],
+                        'row_count': vals_ds['row_count'],
+                        'row_fingerprints_json': vals_ds['row_fingerprints_json'],
+                    })
+                    dataset_version = ds
+                else:
+                    dataset_version = self.env['google.sheets.dataset.version'].sudo().create(vals_ds)
+            except Exception as e:
+                _logger.warning("No se pudo registrar google_sheets.dataset.version: %s", e)
 
         department = self.env['hr.department'].sudo().search([('name', '=', 'ESPOCH')], limit=1)
         if not department:
             department = self.env['hr.department'].sudo().create({'name': 'ESPOCH'})
 
 
-        if resume_state and isinstance(resume_state, str):
-            resume_state = json.loads(resume_state)
+        # Checkpoint: dataset en caché + siguiente fila y contadores, confirmado por bloques
+        if not checkpoint:
+            checkpoint = checkpoint.create_for_dataset(
+                self, rows_emp, imagenes_dict,
+                hash_sha256=csv_reader_emp.hasher.hexdigest(),
+                dataset_version=dataset_version,
+                facultad_seleccionada=facultad_seleccionada,
+            )
+            self.sudo().write({'last_checkpoint_id': checkpoint.id})
+        elif not desde_cache:
+            # Reanudación con el CSV recargado: se reemplaza el dataset en caché
+            checkpoint.sudo().write({
+                'rows_json': json.dumps(rows_emp, ensure_ascii=False),
+                'imagenes_json': json.dumps(imagenes_dict, ensure_ascii=False),
+                'hash_sha256': csv_reader_emp.hasher.hexdigest(),
+                'dataset_version_id': dataset_version.id if dataset_version else False,
+            })
+        checkpoint.save_progress(
+            start_idx, count=count, created_count=created_count, updated_count=updated_count,
+            skipped_count=skipped_count, sin_cambios_count=sin_cambios_count,
+        )
+        self.env.cr.commit()
+        self = self.with_context(gs_import_checkpoint_id=checkpoint.id)
+        chunk_size = self._get_import_chunk_size()
+        self._report_import_progress('prefetch', rows_total=len(rows_emp), rows_done=start_idx - 2)
+
+        import_scope = facultad_seleccionada or 'ALL'
+        cedulas_sin_cambios = set()
+        if self.import_mode == 'delta':
+            cedulas_sin_cambios = self._cedulas_sin_cambios(row_fps, import_scope)
+
+        # Conflictos de identidad: una pasada sobre todo el CSV antes de escribir nada
+        filas_a_procesar = []
+        for idx, record in enumerate(rows_emp, start=2):
+            if idx < start_idx:
+                continue
+            if facultad_seleccionada and (record.get('FACULTAD') or '').strip().upper() != facultad_seleccionada:
+                continue
+            cedula_raw = (record.get('CEDULA') or '').strip()
+            email_l = (record.get('CORREO INSTITUCIONAL') or '').strip().lower()
+            if not cedula_raw or not email_l:
+                continue  # el bucle reporta la fila incompleta
+            cedula = self._normalize_cedula(cedula_raw)
+            if cedula in cedulas_sin_cambios or not cedula.isdigit() or len(cedula) not in (9, 10):
+                continue
+            filas_a_procesar.append((idx, cedula, email_l))
+
+        conflictos = self._detectar_conflictos_identidad(filas_a_procesar, emp_by_cedula, emp_by_email, user_by_login)
+        if conflictos:
+            _logger.warning("Importación detenida: %s filas con conflictos de identidad", len(conflictos))
+            return self._show_error_wizard(
+                conflictos[0][0], self._formatear_conflictos(conflictos),
+                count, created_count, updated_count, skipped_count, facultad_seleccionada
+            )
 
-        # Restaurar estado si es una reanudación
-        if resume_state:
-            count = resume_state.get('count', 0)
-            created_count = resume_state.get('created_count', 0)
-            updated_count = resume_state.get('updated_count', 0)
-            skipped_count = resume_state.get('skipped_count', 0)
-            start_idx = resume_state.get('last_idx', 2)
-            facultad_seleccionada = resume_state.get('facultad_seleccionada')
-            _logger.info(f"🔄 REANUDANDO importación desde fila {start_idx}")
-        else:
-            count = 0
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
-            start_idx = 2
-            
-            if self.facultad_custom:
-                facultad_seleccionada = self.facultad_custom.strip().upper()
-                _logger.info("Usando filtro PERSONALIZADO: %s", facultad_seleccionada)
-            elif self.facultad_filter:
-                facultad_seleccionada = self.facultad_filter.strip().upper()
-                _logger.info("Usando filtro PREDEFINIDO: %s", facultad_seleccionada)
-            else:
-                facultad_seleccionada = None
-                _logger.info("Importando TODAS las facultades")
+        # Fotos: todas las descargas se hacen aquí, en paralelo; el bucle solo consume resultados
+        imagenes_prefetch = self._prefetch_imagenes(
+            rows_emp, imagenes_dict, http_session,
+            start_idx=start_idx, facultad_seleccionada=facultad_seleccionada,
+            omitir_cedulas=cedulas_sin_cambios,
+        )
 
         facultades_en_csv = set()
+        self._report_import_progress(
+            'rows', rows_total=len(rows_emp), rows_done=start_idx - 2, count=count,
+            created_count=created_count, updated_count=updated_count, skipped_count=skipped_count,
+        )
+        self.env.cr.commit()
 
         for idx, record in enumerate(rows_emp, start=2):
             if idx < start_idx:
                 continue
+            if idx > start_idx and (idx - start_idx) % chunk_size == 0:
+                # Fin de bloque: se confirma lo procesado para liberar bloqueos y poder reanudar aquí
+                checkpoint.save_progress(
+                    idx, count=count, created_count=created_count, updated_count=updated_count,
+                    skipped_count=skipped_count, sin_cambios_count=sin_cambios_count,
+                )
+                self._report_import_progress(
+                    'rows', rows_done=idx - 2, count=count, created_count=created_count,
+                    updated_count=updated_count, skipped_count=skipped_count,
+                )
+                self.env.cr.commit()
+                _logger.info("Checkpoint %s: bloque confirmado, siguiente fila %s", checkpoint.id, idx)
             with self.env.cr.savepoint():
                 try:
                     facultad_csv = (record.get('FACULTAD') or '').strip().upper()
@@ -1182,6 +1768,11 @@ class EmployeeImport(models.Model):
                         skipped_count += 1
                         continue
 
+                    # Modo delta: fila idéntica a la última versión aplicada
+                    if cedulas_sin_cambios and self._normalize_cedula((record.get('CEDULA') or '').strip()) in cedulas_sin_cambios:
+                        sin_cambios_count += 1
+                        continue
+
                     cedula_raw = (record.get('CEDULA') or '').strip()
                     if not cedula_raw:
                         error_msg = (
@@ -1214,10 +1805,6 @@ class EmployeeImport(models.Model):
                         )
                         return self._show_error_wizard(idx, error_msg, count, created_count, updated_count, skipped_count, facultad_seleccionada)
                     
-                    primer_nombre = nombres_raw.split()[0].title()
-                    primer_apellido = apellidos_raw.split()[0].title()
-                    clave_foto = f"{primer_nombre} {primer_apellido}"
-                    clave_foto = self.normalizar(clave_foto, lower=False)
                     nombre_completo = f"{nombres_raw} {apellidos_raw}"
                     
                     work_email = (record.get('CORREO INSTITUCIONAL') or '').strip()
@@ -1254,39 +1841,9 @@ class EmployeeImport(models.Model):
                         if existing_employee:
                             emp_by_cedula[cedula] = existing_employee
 
-                    # 2) Si ya existe empleado y el CSV intenta cambiarle el email -> wizard inmediato
-                    if existing_employee:
-                        current_email = (existing_employee.work_email or '').strip().lower()
-
-                        # Si el empleado ya tenía correo y el CSV quiere cambiarlo: bloquear
-                        if current_email and current_email != email_l:
-                            conflict_msg = (
-                                "Conflicto de identidad detectado.\n\n"
-                                f"• El docente ya existe con email '{existing_employee.work_email}'\n"
-                                f"• El CSV intenta cambiarlo a '{work_email}'\n\n"
-                                "Corrección: Ajusta el CSV con el correo correcto del docente y reanuda la importación."
-                            )
-                            return self._show_error_wizard(
-                                idx, conflict_msg, count, created_count, updated_count, skipped_count, facultad_seleccionada
-                            )
+                    # 2) Los conflictos de identidad ya se validaron antes del bucle (_detectar_conflictos_identidad)
 
-                        # Si el empleado NO tenía correo, pero ese email del CSV ya pertenece a otro empleado: bloquear también
-                        if not current_email:
-                            other_emp_same_email = emp_by_email.get(email_l)
-                            if other_emp_same_email and other_emp_same_email.id != existing_employee.id:
-                                conflict_msg = (
-                                    "Conflicto de identidad detectado.\n\n"
-                                    f"• El email '{work_email}' ya está asignado a '{other_emp_same_email.name}' "
-                                    f"(Cédula: {other_emp_same_email.identification_id}).\n"
-                                    f"• El CSV intenta usarlo para '{existing_employee.name}' (Cédula: {existing_employee.identification_id}).\n\n"
-                                    "Corrección: Corrige el correo en el CSV y reanuda la importación."
-                                )
-                                return self._show_error_wizard(
-                                    idx, conflict_msg, count, created_count, updated_count, skipped_count, facultad_seleccionada
-                                )
-
-
-                    # 3) Recién aquí busca/crea el usuario (porque ya no hay conflicto)
+                    # 3) Busca/crea el usuario
                     user = user_by_login.get(email_l)
                     if not user:
                         try:
@@ -1308,17 +1865,14 @@ class EmployeeImport(models.Model):
                             user.sudo().write({'name': nombre_completo})
         
                     try:
-                        url_imagen = imagenes_dict.get(clave_foto)
-                        if url_imagen:
-                            image_data = self.descargar_imagen(url_imagen, session=http_session)
+                        url_imagen = self._url_foto_docente(nombres_raw, apellidos_raw, imagenes_dict)
+                        if url_imagen in imagenes_prefetch:
+                            foto = imagenes_prefetch[url_imagen]
                         else:
-                            primer_apellido_mayus = self.normalizar(apellidos_raw.split()[0], lower=False)
-                            primer_nombre_mayus = self.normalizar(nombres_raw.split()[0], lower=False)
-                            url_default = f"https://www.espoch.edu.ec/wp-content/uploads/2025/03/{primer_apellido_mayus}-{primer_nombre_mayus}-500x500.jpg"
-                            image_data = self.descargar_imagen(url_default, session=http_session)
+                            foto = self._obtener_fotos([url_imagen], http_session).get(url_imagen)
 
-                            if not image_data:
-                                _logger.info("No se encontró imagen para: %s", nombre_completo)
+                        if not foto:
+                            _logger.info("No se encontró imagen para: %s", nombre_completo)
 
                         raw_facultad = record.get('FACULTAD') or 'Sin Facultad'
 
@@ -1413,15 +1967,6 @@ class EmployeeImport(models.Model):
                                 'name': nombre_completo,
                             }
 
-                            conflict_msg = self._check_identity_conflicts(existing_employee, cedula, work_email, user)
-
-                            if conflict_msg:
-                                return self._show_error_wizard(
-                                    idx,
-                                    conflict_msg,
-                                    count, created_count, updated_count, skipped_count, facultad_seleccionada
-                                )
-
                             safe_vals.update({
                                 'identification_id': cedula,
                                 'work_email': work_email,
@@ -1463,8 +2008,9 @@ class EmployeeImport(models.Model):
                                 existing_employee.sudo().write(to_write)
                                 changed = True
 
-                            if image_data and existing_employee.image_1920 != image_data:
-                                existing_employee.sudo().write({'image_1920': image_data})
+                            # Foto sin cambios (misma huella): ni se lee ni se reescribe image_1920
+                            if foto and existing_employee.image_fingerprint != foto.image_fingerprint:
+                                existing_employee.sudo().write({'image_1920': foto.image})
                                 changed = True
 
                             if changed:
@@ -1472,8 +2018,8 @@ class EmployeeImport(models.Model):
 
 
                         else:
-                            if image_data:
-                                employee_vals['image_1920'] = image_data
+                            if foto:
+                                employee_vals['image_1920'] = foto.image
                             new_employee = self.env['hr.employee'].sudo().create(employee_vals)
 
                             # refrescar caches
@@ -1538,127 +2084,17 @@ class EmployeeImport(models.Model):
             tipo = 'info'
             mensaje = _("No se procesó ningún empleado. Todos los registros ya estaban actualizados.")
 
-        cedulas_vistas = {}
-        cedulas_duplicadas = []
-
-        for idx, record in enumerate(rows_emp, start=1):
-            cedula_raw = (record.get('CEDULA') or '').strip()
-            if cedula_raw:
-                cedula = self._normalize_cedula(cedula_raw)
-                if cedula in cedulas_vistas:
-                    cedulas_duplicadas.append(f"Fila {idx}: Cédula {cedula} (duplica fila {cedulas_vistas[cedula]})")
-                else:
-                    cedulas_vistas[cedula] = idx
-
-        if cedulas_duplicadas:
-            raise UserError(_(
-                f"Se encontraron {len(cedulas_duplicadas)} cédulas duplicadas en el CSV:\n\n" +
-                "\n".join(cedulas_duplicadas[:10]) +
-                (f"\n... y {len(cedulas_duplicadas)-10} más" if len(cedulas_duplicadas) > 10 else "")
-            ))
-
-        emails_vistos = {}
-        emails_duplicados = []
-
-        for idx, record in enumerate(rows_emp, start=1):
-            email = (record.get('CORREO INSTITUCIONAL') or '').strip().lower()
-            if email:
-                if email in emails_vistos:
-                    emails_duplicados.append(f"Fila {idx}: {email} (duplica fila {emails_vistos[email]})")
-                else:
-                    emails_vistos[email] = idx
-
-        if emails_duplicados:
-            _logger.warning(f" Emails duplicados en CSV: {len(emails_duplicados)}")
-
-
-        cedulas_en_csv = set()
-        for record in rows_emp:
-            cedula_raw = (record.get('CEDULA') or '').strip()
-            if not cedula_raw:
-                continue
-            
-            if facultad_seleccionada:
-                facultad_csv = (record.get('FACULTAD') or '').strip().upper()
-                if facultad_csv == facultad_seleccionada:
-                    cedulas_en_csv.add(self._normalize_cedula(cedula_raw))
-            else:
-                cedulas_en_csv.add(self._normalize_cedula(cedula_raw))
-
-        all_employees_sistema = self.env['hr.employee'].sudo().search([
-            ('identification_id', '!=', False),
-            ('active', '=', True)
-        ])
-        
-        _logger.info(f" Total empleados activos en sistema: {len(all_employees_sistema)}")
-        
-        employees_to_check = all_employees_sistema
-        if facultad_seleccionada:
-            fac_sel_limpia = self._clean_facultad_name(facultad_seleccionada)
-            fac_sel_norm = self.normalizar(fac_sel_limpia, lower=True)
-            _logger.info(f" Buscando empleados de facultad: '{facultad_seleccionada}'")
-            _logger.info(f" Limpiado: '{fac_sel_limpia}'")
-            _logger.info(f" Normalizado: '{fac_sel_norm}'")
-            
-            empleados_con_facultad = 0
-            empleados_sin_facultad = 0
-            facultades_unicas = set()
-            
-            for emp in all_employees_sistema:
-                if emp.facultad:
-                    empleados_con_facultad += 1
-                    facultades_unicas.add(emp.facultad.name)
-                else:
-                    empleados_sin_facultad += 1
-            
-            _logger.info(f" De {len(all_employees_sistema)} empleados activos:")
-            _logger.info(f"   - Con facultad: {empleados_con_facultad}")
-            _logger.info(f"   - Sin facultad: {empleados_sin_facultad}")
-            _logger.info(f" Facultades únicas en sistema: {facultades_unicas}")
-            
-            employees_filtered = []
-            primera_facultad_mostrada = False
-            for emp in all_employees_sistema:
-                if emp.facultad:
-                    fac_emp_norm = self.normalizar(emp.facultad.name, lower=True)
-                    
-                    if not primera_facultad_mostrada:
-                        _logger.info(f"EJEMPLO de facultad en sistema:")
-                        _logger.info(f"   Original: '{emp.facultad.name}'")
-                        _logger.info(f"   Normalizado: '{fac_emp_norm}'")
-                        _logger.info(f"   Comparando con: '{fac_sel_norm}'")
-                        _logger.info(f"   ¿Son iguales? {fac_emp_norm == fac_sel_norm}")
-                        primera_facultad_mostrada = True
-                    
-                    if fac_emp_norm == fac_sel_norm:
-                        employees_filtered.append(emp)
-                    else:
-                        if len(employees_filtered) == 0:
-                            _logger.warning(f"NO COINCIDE: '{emp.facultad.name}' -> '{fac_emp_norm}' vs '{fac_sel_norm}'")
-            
-            employees_to_check = self.env['hr.employee'].browse([e.id for e in employees_filtered])
-            _logger.info(f"Filtrado: {len(employees_to_check)} empleados de {facultad_seleccionada}")
-            _logger.info(f"DEBUG: employees_to_check después de filtrar = {len(employees_to_check)} empleados")
-            _logger.info(f"DEBUG: IDs = {[e.id for e in employees_to_check[:3]]}")
-            
-            if len(employees_to_check) > 0:
-                _logger.info(f" Empleados encontrados:")
-                for emp in employees_to_check[:5]:
-                    _logger.info(f"   - {emp.name} (Cédula: {emp.identification_id}, Facultad: {emp.facultad.name})")
-                if len(employees_to_check) > 5:
-                    _logger.info(f"   ... y {len(employees_to_check) - 5} más")
-            else:
-                _logger.error(f" NO SE ENCONTRARON EMPLEADOS con facultad '{fac_sel_norm}'")
-
-        if not cedulas_en_csv:
-            raise UserError(_(
-                "ATENCIÓN: No se detectaron cédulas en el CSV.\n"
-                "No se archivará ningún empleado por seguridad.\n"
-                "Verifica que el archivo CSV tenga datos válidos."
-            ))
+        if self.import_mode == 'delta':
+            mensaje += f"\n• Sin cambios (omitidas en modo delta): {sin_cambios_count}"
 
-        _logger.info(f" DEBUG: Verificando employees_to_check, tipo={type(employees_to_check)}, len={len(employees_to_check)}")
-        empleados_activos = len(employees_to_check)
+        self._report_import_progress(
+            'archive', rows_done=len(rows_emp), count=count, created_count=created_count,
+            updated_count=updated_count, skipped_count=skipped_count,
+        )
+        # Simulación primero: el control de seguridad necesita el total de activos antes de archivar
+        resultado_archivo = self._archivar_empleados_ausentes(cedulas_en_csv, facultad_seleccionada, dry_run=True)
+        empleados_activos = resultado_archivo['activos']
+        candidatos_archivo = resultado_archivo['candidatos']
         empleados_en_csv = len(cedulas_en_csv)
         porcentaje = (empleados_en_csv / empleados_activos * 100) if empleados_activos > 0 else 0
         
@@ -1667,40 +2103,43 @@ class EmployeeImport(models.Model):
         _logger.info(f"   - Empleados activos (filtrados): {empleados_activos}")
         _logger.info(f"   - Porcentaje: {porcentaje:.1f}%")
 
-        if porcentaje < 50 and empleados_activos > 10:
-            raise UserError(_(
-                f"ATENCIÓN: El CSV solo contiene {empleados_en_csv} empleados, "
-                f"pero hay {empleados_activos} activos en el sistema ({porcentaje:.1f}%).\n\n"
-                "Por seguridad, no se archivarán empleados.\n"
-                "Si esto es correcto, contacta al administrador del sistema."
-            ))
-
-        
-        _logger.info(" Verificando empleados para archivar...")
-
         if not 'mensaje' in locals():
             mensaje = ""
 
         archived_count = 0
-        for emp in employees_to_check:
-            if emp.identification_id not in cedulas_en_csv:
-                _logger.warning(f" EMPLEADO FALTANTE DETECTADO:")
-                _logger.warning(f"   Nombre: {emp.name}")
-                _logger.warning(f"   Cédula: {emp.identification_id}")
-                _logger.warning(f"   Email: {emp.work_email}")
-                _logger.warning(f"   Facultad: {emp.facultad.name if emp.facultad else 'SIN FACULTAD'}")
-                _logger.warning(f"   Carrera: {emp.carrera.name if emp.carrera else 'SIN CARRERA'}")
-                _logger.warning(f"   ARCHIVANDO...")
-                
-                emp.sudo().write({'active': False})
-                archived_count += 1
-
-        if archived_count > 0:
+        if porcentaje < 50 and empleados_activos > 10:
+            # Ya se validó antes de importar; solo puede fallar si otro proceso activó empleados
+            # entretanto. Las filas ya están confirmadas, así que solo se omite el archivado.
+            mensaje += (
+                f"\n No se archivó a nadie: el CSV contiene {empleados_en_csv} de "
+                f"{empleados_activos} empleados activos ({porcentaje:.1f}%)."
+            )
+            _logger.warning("Archivado omitido por el control de seguridad (%.1f%%)", porcentaje)
+        elif candidatos_archivo and self.archive_dry_run:
+            mensaje += f"\n Se archivarían (simulación, no se aplicó): {len(candidatos_archivo)}"
+            for emp in candidatos_archivo[:20]:
+                mensaje += f"\n   - {emp.name} ({emp.identification_id})"
+            if len(candidatos_archivo) > 20:
+                mensaje += f"\n   ... y {len(candidatos_archivo) - 20} más"
+        elif candidatos_archivo:
+            candidatos_archivo.write({'active': False})
+            archived_count = len(candidatos_archivo)
             mensaje += f"\n Archivados (no están en CSV): {archived_count}"
-            _logger.warning(f" Total archivados: {archived_count} empleados")
+            _logger.warning(
+                " Total archivados: %s empleados (cédulas: %s)",
+                archived_count, ', '.join(candidatos_archivo.mapped('identification_id')[:50])
+            )
         else:
             _logger.info(" No hay empleados para archivar")
 
+        # Versión aplicada por completo: referencia para el próximo import en modo delta
+        if dataset_version:
+            dataset_version.write({'import_success': True, 'import_scope': import_scope})
+        checkpoint.mark_done(
+            count=count, created_count=created_count, updated_count=updated_count,
+            skipped_count=skipped_count, sin_cambios_count=sin_cambios_count,
+        )
+
         _logger.info("=" * 60)
         _logger.info("RESUMEN DETALLADO DE IMPORTACIÓN")
         _logger.info(f"Total filas procesadas: {count}")
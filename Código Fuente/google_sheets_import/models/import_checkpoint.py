@@ -0,0 +1,82 @@
+import json
+import logging
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class GoogleSheetsImportCheckpoint(models.Model):
+    _name = 'google.sheets.import.checkpoint'
+    _description = 'Punto de control de importación de Google Sheets'
+    _order = 'id desc'
+    _rec_name = 'hash_sha256'
+
+    import_id = fields.Many2one('employee.import', string='Importación', ondelete='cascade', index=True)
+    dataset_version_id = fields.Many2one('google.sheets.dataset.version', string='Versión del dataset', ondelete='set null')
+    hash_sha256 = fields.Char(string='Hash del dataset', readonly=True, index=True)
+    state = fields.Selection([
+        ('running', 'En curso'),
+        ('paused', 'Detenida por error'),
+        ('done', 'Completada'),
+    ], string='Estado', default='running', required=True, index=True)
+    facultad_seleccionada = fields.Char(string='Facultad filtrada')
+    last_idx = fields.Integer(string='Siguiente fila', default=2, help="Primera fila del CSV pendiente de procesar.")
+    count = fields.Integer(string='Procesadas')
+    created_count = fields.Integer(string='Creadas')
+    updated_count = fields.Integer(string='Actualizadas')
+    skipped_count = fields.Integer(string='Omitidas')
+    sin_cambios_count = fields.Integer(string='Sin cambios (delta)')
+    error_message = fields.Text(string='Último error', readonly=True)
+    rows_json = fields.Text(string='Filas del CSV (JSON)', readonly=True,
+                            help="Columnas usadas de cada fila; permite reanudar sin volver a descargar el CSV.")
+    imagenes_json = fields.Text(string='Diccionario de imágenes (JSON)', readonly=True)
+
+    COUNTERS = ('count', 'created_count', 'updated_count', 'skipped_count', 'sin_cambios_count')
+
+    @api.model
+    def create_for_dataset(self, import_rec, rows, imagenes_dict, hash_sha256=False, dataset_version=None,
+                           facultad_seleccionada=None):
+        return self.sudo().create({
+            'import_id': import_rec.id,
+            'dataset_version_id': dataset_version.id if dataset_version else False,
+            'hash_sha256': hash_sha256,
+            'facultad_seleccionada': facultad_seleccionada or False,
+            'rows_json': json.dumps(rows, ensure_ascii=False),
+            'imagenes_json': json.dumps(imagenes_dict, ensure_ascii=False),
+        })
+
+    def has_dataset(self):
+        self.ensure_one()
+        return bool(self.rows_json) and self.state != 'done'
+
+    def get_rows(self):
+        self.ensure_one()
+        return json.loads(self.rows_json or '[]')
+
+    def get_imagenes(self):
+        self.ensure_one()
+        return json.loads(self.imagenes_json or '{}')
+
+    def save_progress(self, last_idx, state='running', error_message=None, **counters):
+        """Guarda la siguiente fila pendiente y los contadores (el commit lo hace quien llama)."""
+        vals = {'last_idx': last_idx, 'state': state}
+        vals.update({k: v for k, v in counters.items() if k in self.COUNTERS and v is not None})
+        if error_message is not None:
+            vals['error_message'] = error_message
+        self.sudo().write(vals)
+
+    def mark_done(self, **counters):
+        """Importación terminada: se descarta el dataset en caché."""
+        vals = {'state': 'done', 'rows_json': False, 'imagenes_json': False, 'error_message': False}
+        vals.update({k: v for k, v in counters.items() if k in self.COUNTERS and v is not None})
+        self.sudo().write(vals)
+
+    def get_resume_state(self):
+        self.ensure_one()
+        state = {k: self[k] for k in self.COUNTERS}
+        state.update({
+            'checkpoint_id': self.id,
+            'last_idx': self.last_idx,
+            'facultad_seleccionada': self.facultad_seleccionada or None,
+        })
+        return state
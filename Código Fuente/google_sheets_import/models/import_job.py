@@ -0,0 +1,193 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Un job 'running' sin avances durante este tiempo se considera interrumpido (worker reiniciado)
+IMPORT_JOB_STALE_MINUTES = 60
+
+
+class GoogleSheetsImportJob(models.Model):
+    _name = 'google.sheets.import.job'
+    _description = 'Importación de Google Sheets en segundo plano'
+    _order = 'id desc'
+
+    import_id = fields.Many2one('employee.import', string='Importación', required=True, ondelete='cascade', index=True)
+    user_id = fields.Many2one('res.users', string='Solicitado por', required=True, default=lambda self: self.env.user)
+    state = fields.Selection([
+        ('pending', 'En cola'),
+        ('running', 'En ejecución'),
+        ('done', 'Completada'),
+        ('paused', 'Detenida por error'),
+        ('failed', 'Fallida'),
+    ], string='Estado', default='pending', required=True, index=True)
+    phase = fields.Selection([
+        ('queued', 'En cola'),
+        ('download', 'Descargando CSV'),
+        ('prefetch', 'Precargando datos y fotos'),
+        ('rows', 'Procesando filas'),
+        ('archive', 'Archivando ausentes'),
+        ('done', 'Finalizada'),
+    ], string='Fase', default='queued')
+    resume_state = fields.Text(string='Estado de reanudación (JSON)')
+    checkpoint_id = fields.Many2one('google.sheets.import.checkpoint', string='Checkpoint', ondelete='set null')
+    rows_total = fields.Integer(string='Filas totales')
+    rows_done = fields.Integer(string='Filas recorridas')
+    progress = fields.Float(string='Progreso (%)', compute='_compute_progress')
+    count = fields.Integer(string='Procesadas')
+    created_count = fields.Integer(string='Creadas')
+    updated_count = fields.Integer(string='Actualizadas')
+    skipped_count = fields.Integer(string='Omitidas')
+    message = fields.Text(string='Resultado')
+    started_at = fields.Datetime(string='Inicio')
+    finished_at = fields.Datetime(string='Fin')
+
+    PROGRESS_FIELDS = ('rows_total', 'rows_done', 'count', 'created_count', 'updated_count', 'skipped_count')
+
+    @api.depends('rows_total', 'rows_done', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.rows_total:
+                job.progress = min(100.0, 100.0 * job.rows_done / job.rows_total)
+            else:
+                job.progress = 0.0
+
+    @api.model
+    def enqueue(self, import_rec, resume_state=None):
+        """Encola la importación y despierta al worker."""
+        if self.sudo().search_count([('import_id', '=', import_rec.id), ('state', 'in', ('pending', 'running'))]):
+            raise UserError(_('Esta importación ya está en cola o en ejecución.'))
+        job = self.sudo().create({
+            'import_id': import_rec.id,
+            'user_id': self.env.user.id,
+            'resume_state': json.dumps(resume_state) if resume_state else False,
+        })
+        try:
+            self.env.ref('google_sheets_import.cron_google_sheets_import_jobs')._trigger()
+        except Exception as e:
+            _logger.warning("No se pudo disparar el worker de importaciones: %s", e)
+        _logger.info("Importación encolada job=%s import=%s", job.id, import_rec.id)
+        return job
+
+    def _notify(self, final=False):
+        """Publica el avance al usuario que lanzó la importación (se entrega al hacer commit)."""
+        self.ensure_one()
+        partner = self.user_id.partner_id
+        if not partner:
+            return
+        payload = {
+            'type': 'google_sheets_import_progress',
+            'job_id': self.id,
+            'state': self.state,
+            'phase': self.phase,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'count': self.count,
+            'created_count': self.created_count,
+            'updated_count': self.updated_count,
+            'skipped_count': self.skipped_count,
+            'is_final': final,
+        }
+        if final:
+            payload['message'] = self.message or ''
+        try:
+            self.env['bus.bus']._sendone(partner, 'google_sheets_import_progress', payload)
+        except Exception as e:
+            _logger.warning("No se pudo enviar el progreso por bus.bus: %s", e)
+
+    def update_progress(self, phase, **vals):
+        """Llamado desde employee.import; el envío sale con el siguiente commit del bloque."""
+        self.ensure_one()
+        to_write = {k: v for k, v in vals.items() if k in self.PROGRESS_FIELDS and v is not None}
+        to_write['phase'] = phase
+        self.sudo().write(to_write)
+        self._notify()
+
+    def _finish(self, result):
+        """Traduce la acción devuelta por import_employees al estado del job."""
+        self.ensure_one()
+        import_rec = self.import_id
+        vals = {'finished_at': fields.Datetime.now(), 'checkpoint_id': import_rec.last_checkpoint_id.id}
+        result = result or {}
+        if result.get('res_model') == 'employee.import.wizard':
+            wizard = self.env['employee.import.wizard'].sudo().browse(result.get('res_id')).exists()
+            vals.update({
+                'state': 'paused',
+                'message': wizard.error_message if wizard else _('Importación detenida por un error en el CSV.'),
+                'count': wizard.total_processed if wizard else self.count,
+                'created_count': wizard.total_created if wizard else self.created_count,
+                'updated_count': wizard.total_updated if wizard else self.updated_count,
+                'skipped_count': wizard.total_skipped if wizard else self.skipped_count,
+            })
+        else:
+            vals.update({
+                'state': 'done',
+                'phase': 'done',
+                'message': (result.get('params') or {}).get('message') or _('Importación completada.'),
+            })
+        self.sudo().write(vals)
+        self._notify(final=True)
+
+    @api.model
+    def cron_process_import_jobs(self, limit=1):
+        """Ejecuta las importaciones en cola, una a la vez y en orden de llegada."""
+        stale = self.sudo().search([
+            ('state', '=', 'running'),
+            ('write_date', '<', fields.Datetime.now() - timedelta(minutes=IMPORT_JOB_STALE_MINUTES)),
+        ])
+        if stale:
+            stale.write({
+                'state': 'failed',
+                'message': _('La importación se interrumpió sin terminar; puede reanudarse desde su checkpoint.'),
+                'finished_at': fields.Datetime.now(),
+            })
+            self.env.cr.commit()
+
+        jobs = self.sudo().search([('state', '=', 'pending')], order='id asc', limit=limit)
+        for job in jobs:
+            job.write({'state': 'running', 'phase': 'download', 'started_at': fields.Datetime.now()})
+            job._notify()
+            self.env.cr.commit()
+
+            resume_state = json.loads(job.resume_state) if job.resume_state else None
+            try:
+                importer = job.import_id.with_user(job.user_id).with_context(gs_import_job_id=job.id)
+                result = importer.import_employees(resume_state=resume_state)
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.error("Error en la importación en segundo plano job=%s: %s\n%s", job.id, e, traceback.format_exc())
+                job.write({
+                    'state': 'failed',
+                    'message': str(e),
+                    'finished_at': fields.Datetime.now(),
+                    'checkpoint_id': job.import_id.last_checkpoint_id.id,
+                })
+                job._notify(final=True)
+            else:
+                job._finish(result)
+            self.env.cr.commit()
+
+        if self.sudo().search_count([('state', '=', 'pending')]):
+            self.env.ref('google_sheets_import.cron_google_sheets_import_jobs')._trigger()
+        return True
+
+    def _action_resume(self, recargar=False):
+        self.ensure_one()
+        checkpoint = self.checkpoint_id or self.import_id.last_checkpoint_id
+        if not checkpoint or checkpoint.state == 'done':
+            raise UserError(_('No hay ninguna importación pendiente de reanudar.'))
+        state = checkpoint.get_resume_state()
+        state['recargar'] = recargar
+        return self.import_id.action_enqueue_import(resume_state=state)
+
+    def action_resume(self):
+        return self._action_resume()
+
+    def action_resume_reload(self):
+        return self._action_resume(recargar=True)
@@ -18,7 +18,14 @@ class EmployeeImportWizard(models.TransientModel):
     total_skipped = fields.Integer('Filas Omitidas', readonly=True)
 
     def action_retry_import(self):
-        """Reintentar la importación desde donde se quedó"""
+        """Reintentar la importación desde donde se quedó (con el dataset en caché del checkpoint)"""
+        return self._retry_import()
+
+    def action_retry_import_reload(self):
+        """Volver a descargar los CSV (ya corregidos) y continuar desde la misma fila"""
+        return self._retry_import(recargar=True)
+
+    def _retry_import(self, recargar=False):
         self.ensure_one()
         
         # Parsear el estado guardado
@@ -26,9 +33,10 @@ class EmployeeImportWizard(models.TransientModel):
             state = json.loads(self.state_data)
         except:
             raise UserError(_('Error al cargar el estado de la importación'))
+        state['recargar'] = recargar
         
-        # Llamar al método de importación con el estado
-        result = self.import_id.import_employees_resume(state)
+        # Encolar la reanudación con el estado (se ejecuta en segundo plano)
+        result = self.import_id.action_enqueue_import(resume_state=state)
         
         # Si el import devuelve una notificación, cerramos el wizard y luego mostramos el mensaje
         if result and result.get('type') == 'ir.actions.client' and result.get('tag') == 'display_notification':
@@ -0,0 +1,79 @@
+import base64
+import hashlib
+import logging
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+
+class GoogleSheetsPhotoCache(models.Model):
+    _name = 'google.sheets.photo.cache'
+    _description = 'Caché de fotos de docentes por URL de origen'
+    _rec_name = 'url'
+
+    url = fields.Char(required=True, index=True)
+    etag = fields.Char(help="ETag devuelto por el servidor de origen.")
+    last_modified = fields.Char(help="Cabecera Last-Modified tal cual la envió el origen.")
+    content_hash = fields.Char(help="SHA-256 del contenido descargado (antes de procesar).", index=True)
+    image = fields.Binary(attachment=True, help="Imagen ya procesada, lista para image_1920.")
+    image_fingerprint = fields.Char(help="SHA-256 de la imagen procesada (comparable con hr.employee.image_fingerprint).")
+    pipeline_signature = fields.Char(help="Configuración de normalización con la que se procesó la imagen.")
+    last_checked = fields.Datetime(default=lambda self: fields.Datetime.now())
+
+    _sql_constraints = [
+        ('uniq_url', 'unique(url)', 'Ya existe una entrada de caché para esta URL.')
+    ]
+
+    @api.model
+    def _get_entries(self, urls):
+        """{url: registro} para las URLs que ya están en caché (una sola consulta)."""
+        if not urls:
+            return {}
+        return {e.url: e for e in self.sudo().search([('url', 'in', list(urls))])}
+
+    @api.model
+    def _register_results(self, entries, results, pipeline_signature=False):
+        """Persiste los resultados de las descargas condicionales.
+
+        `results` es {url: dict} tal como lo devuelve employee.import._descargar_imagen_condicional.
+        Devuelve {url: registro de caché o False si no hay imagen utilizable}.
+        """
+        now = fields.Datetime.now()
+        fotos = {}
+        not_modified = self.browse()
+        for url, result in results.items():
+            entry = entries.get(url) or self.browse()
+            status = result.get('status')
+
+            if status == 'not_modified' and entry and entry.image_fingerprint:
+                not_modified |= entry
+                fotos[url] = entry
+            elif status == 'unchanged' and entry and entry.image_fingerprint:
+                entry.write({
+                    'etag': result.get('etag') or entry.etag,
+                    'last_modified': result.get('last_modified') or entry.last_modified,
+                    'last_checked': now,
+                })
+                fotos[url] = entry
+            elif status == 'downloaded' and result.get('image'):
+                image = result['image']
+                vals = {
+                    'etag': result.get('etag') or False,
+                    'last_modified': result.get('last_modified') or False,
+                    'content_hash': result.get('content_hash') or False,
+                    'image': image,
+                    'image_fingerprint': hashlib.sha256(base64.b64decode(image)).hexdigest(),
+                    'pipeline_signature': pipeline_signature,
+                    'last_checked': now,
+                }
+                if entry:
+                    entry.write(vals)
+                else:
+                    entry = self.sudo().create(dict(vals, url=url))
+                fotos[url] = entry
+            else:
+                fotos[url] = False
+
+        if not_modified:
+            not_modified.write({'last_checked': now})
+        return fotos
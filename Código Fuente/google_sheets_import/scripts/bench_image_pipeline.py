@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Benchmark del pipeline de normalización de fotos.
+
+Uso:
+    python3 scripts/bench_image_pipeline.py <carpeta_con_fotos> [--max-dimension 1024] [--quality 85]
+
+Reporta bytes y milisegundos por imagen con el pipeline anterior (RGBA -> PNG optimizado)
+y con el actual (google_sheets_import/image_pipeline.py). Solo necesita Pillow.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_spec = importlib.util.spec_from_file_location(
+    'image_pipeline', os.path.join(HERE, os.pardir, 'image_pipeline.py')
+)
+image_pipeline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(image_pipeline)
+
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff')
+
+
+def _measure(func, raw, repeat):
+    best = None
+    out = b''
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(raw)
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        best = elapsed if best is None else min(best, elapsed)
+    return len(out), best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder')
+    parser.add_argument('--max-dimension', type=int, default=image_pipeline.PHOTO_MAX_DIMENSION)
+    parser.add_argument('--quality', type=int, default=image_pipeline.PHOTO_JPEG_QUALITY)
+    parser.add_argument('--repeat', type=int, default=3, help='repeticiones por imagen (se toma la mejor)')
+    args = parser.parse_args(argv)
+
+    files = sorted(
+        os.path.join(args.folder, f) for f in os.listdir(args.folder)
+        if f.lower().endswith(EXTENSIONS)
+    )
+    if not files:
+        print("No hay imágenes en %s" % args.folder)
+        return 1
+
+    def nuevo(raw):
+        return image_pipeline.normalize_image(raw, args.max_dimension, args.quality)
+
+    print("%-40s %10s %10s %9s %10s %9s" % ('imagen', 'original', 'antes B', 'antes ms', 'ahora B', 'ahora ms'))
+    totals = [0, 0, 0.0, 0, 0.0]
+    n = 0
+    for path in files:
+        with open(path, 'rb') as fh:
+            raw = fh.read()
+        try:
+            old_bytes, old_ms = _measure(image_pipeline.legacy_normalize_image, raw, args.repeat)
+            new_bytes, new_ms = _measure(nuevo, raw, args.repeat)
+        except Exception as e:
+            print("%-40s error: %s" % (os.path.basename(path)[:40], e))
+            continue
+        n += 1
+        totals[0] += len(raw)
+        totals[1] += old_bytes
+        totals[2] += old_ms
+        totals[3] += new_bytes
+        totals[4] += new_ms
+        print("%-40s %10d %10d %9.1f %10d %9.1f" % (
+            os.path.basename(path)[:40], len(raw), old_bytes, old_ms, new_bytes, new_ms))
+
+    print("-" * 93)
+    if not n:
+        print("No se pudo medir ninguna imagen de %s" % args.folder)
+        return 1
+    print("%-40s %10d %10d %9.1f %10d %9.1f" % ('media por imagen (%d)' % n, totals[0] / n, totals[1] / n,
+                                                totals[2] / n, totals[3] / n, totals[4] / n))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+/** @odoo-module **/
+
+import { registry } from "@web/core/registry";
+import { _t } from "@web/core/l10n/translation";
+
+const PHASE_LABELS = {
+    queued: _t("En cola"),
+    download: _t("Descargando CSV"),
+    prefetch: _t("Precargando datos y fotos"),
+    rows: _t("Procesando filas"),
+    archive: _t("Archivando ausentes"),
+    done: _t("Finalizada"),
+};
+
+const googleSheetsImportBusService = {
+    dependencies: ["bus_service", "notification"],
+
+    start(env, { bus_service, notification }) {
+        if (!bus_service || !notification) {
+            console.warn("google_sheets_import: bus_service o notification no están disponibles.");
+            return;
+        }
+
+        // Último aviso de fase mostrado por job, para no repetir una notificación por bloque
+        const lastPhase = {};
+
+        bus_service.addEventListener("notification", ({ detail: notifications }) => {
+            for (const { type, payload } of notifications) {
+                if (type !== "google_sheets_import_progress") {
+                    continue;
+                }
+                const title = _t("Importación desde Google Sheets");
+
+                if (payload.is_final) {
+                    let notifType = "success";
+                    if (payload.state === "failed") {
+                        notifType = "danger";
+                    } else if (payload.state === "paused") {
+                        notifType = "warning";
+                    }
+                    notification.add(payload.message || PHASE_LABELS.done, {
+                        title,
+                        type: notifType,
+                        sticky: payload.state !== "done",
+                    });
+                    delete lastPhase[payload.job_id];
+                    continue;
+                }
+
+                if (lastPhase[payload.job_id] === payload.phase) {
+                    continue;
+                }
+                lastPhase[payload.job_id] = payload.phase;
+
+                let message = PHASE_LABELS[payload.phase] || payload.phase;
+                if (payload.phase === "rows" && payload.rows_total) {
+                    message += ` (${payload.rows_done}/${payload.rows_total})`;
+                }
+                notification.add(message, { title, type: "info", sticky: false });
+            }
+        });
+    },
+};
+
+registry.category("services").add(
+    "google_sheets_import_bus_listener",
+    googleSheetsImportBusService
+);